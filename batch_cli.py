@@ -0,0 +1,188 @@
+"""
+Headless batch mode: run one search per input line and stream a record per line.
+
+    python batch_cli.py parts.txt --format jsonl > results.jsonl
+    cut -f1,2 sheet.tsv | python batch_cli.py - --format csv --backend http
+    python batch_cli.py parts.txt --backend snapshot   # answer from snapshot_crawler.py's snapshot
+    python batch_cli.py parts.txt -o results.jsonl --journal parts.journal   # resumable
+
+Input lines are part numbers or "Front\\t05~10 Make Model" position/car lines,
+exactly as typed into the search bar. Records are written and flushed as soon
+as each line finishes, so memory stays flat however large the batch is.
+
+With --journal, every line's record is also checkpointed as soon as it
+finishes. Running the same command again replays the finished lines from the
+journal and searches only the failed, cancelled, interrupted or edited ones.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+from catalog_search import CatalogSearch
+from catalog_snapshot import DEFAULT_SNAPSHOT_PATH
+from job_journal import JobJournal
+from driver_pool import DEFAULT_POOL_SIZE
+from lookup_cache import DEFAULT_CACHE_PATH
+from tab_fanout import DEFAULT_MAX_TABS
+
+CSV_FIELDS = ["line", "input", "input_type", "answer", "previous_years", "elapsed", "error"]
+
+
+class BatchSearch(CatalogSearch):
+    """Collects the output of each search into a record instead of a window."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.output = []
+        self.answer = None
+
+    def report(self, text):
+        self.output.append(text)
+
+    def copy_to_clipboard(self, text):
+        # The clipboard value is the answer a person would paste, keep the last one
+        self.answer = text
+
+    def search_line(self, line_number, text):
+        """Run the search for one input line and return its record"""
+        self.output = []
+        self.answer = None
+        started = time.perf_counter()
+        error = None
+        try:
+            if not self.run_search(text):
+                error = "Search cancelled" if self.state.cancelled else "Could not start the browser"
+        except Exception as e:
+            self.logger.error(f"Search failed for line {line_number}: {str(e)}")
+            error = str(e)
+        if error is None and self.state.failures:
+            # The lookups caught their errors, but the answer rests on lookups that never answered
+            failures = self.state.failures
+            error = f"{len(failures)} lookups failed: {failures[0]}"
+
+        return {
+            "line": line_number,
+            "input": text,
+            "input_type": self.classify_input(text)[0],
+            "answer": self.answer,
+            "previous_years": [previous._asdict() for previous in self.state.previous_years],
+            "fitments": [result._asdict() for result in self.state.final_results],
+            "output": "".join(self.output).strip(),
+            "elapsed": round(time.perf_counter() - started, 3),
+            "error": error,
+            "cancelled": self.state.cancelled,
+        }
+
+
+class JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+
+class CsvWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self.writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, record):
+        row = dict(record)
+        row["previous_years"] = "; ".join(
+            f"{previous['year']} {previous['make']} {previous['model']}" for previous in record["previous_years"])
+        self.writer.writerow(row)
+        self.stream.flush()
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter}
+
+
+def read_lines(stream):
+    """Yield (line number, text) for every non-blank input line, keeping tabs intact"""
+    for line_number, line in enumerate(stream, start=1):
+        text = line.rstrip("\r\n")
+        if text.strip():
+            yield line_number, text
+
+
+def run_batch(lines, writer, search, journal=None):
+    """
+    Search every line and hand each record to the writer as soon as it is done.
+    Lines the journal has finished records for are written from it, not searched.
+    """
+    count = 0
+    for line_number, text in lines:
+        record = journal.completed(line_number, text) if journal else None
+        if record is None:
+            if journal:
+                journal.start(line_number, text)
+            record = search.search_line(line_number, text)
+            if journal:
+                journal.finish(line_number, record)
+        writer.write(record)
+        count += 1
+    return count
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run previous generation lookups in batch")
+    parser.add_argument("input", nargs="?", default="-", help="Input file, one search per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output file ('-' for stdout)")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="jsonl")
+    parser.add_argument("--backend", choices=["selenium", "http", "snapshot"], default="selenium")
+    parser.add_argument("--snapshot", default=DEFAULT_SNAPSHOT_PATH, help="Snapshot database for --backend snapshot")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--generations", action="store_true",
+                        help="Bisect the true generation boundaries instead of trusting the given year ranges")
+    parser.add_argument("--max-tabs", type=int, default=DEFAULT_MAX_TABS,
+                        help="Engine listings opened at once in tabs of a browser session (1 to walk them in turn)")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the lookup cache")
+    parser.add_argument("--lean", action="store_true", help="Skip images, fonts, ads and trackers in the browser")
+    parser.add_argument("--profile-dir", help="Keep Chrome profiles here so the browser cache stays warm between runs")
+    parser.add_argument("--journal", help="Checkpoint file; rerunning with it skips lines already done")
+    parser.add_argument("--metrics", help="Write per-stage timings when done (.prom for Prometheus text, else JSON)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    search = BatchSearch(pool_size=args.pool_size,
+                         cache_path=None if args.no_cache else args.cache_path,
+                         backend=args.backend,
+                         profile_dir=args.profile_dir,
+                         lean=args.lean,
+                         snapshot_path=args.snapshot,
+                         max_tabs=args.max_tabs,
+                         find_generations=args.generations)
+    # Browser startup overlaps with opening and reading the input
+    search.prewarm()
+
+    input_stream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    journal = JobJournal(args.journal) if args.journal else None
+    try:
+        count = run_batch(read_lines(input_stream), WRITERS[args.format](output_stream), search, journal)
+        search.logger.info(f"Processed {count} input lines")
+        if journal:
+            search.logger.info(f"Journal {args.journal}: {journal.stats()}")
+    finally:
+        if journal:
+            journal.close()
+        if args.metrics:
+            search.tracer.dump(args.metrics)
+        search.close()
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+Offline benchmark of the search flows against a local stand-in of the catalog site.
+
+    python benchmark.py                                  # all scenarios, Selenium backend
+    python benchmark.py --backend http --repeat 5
+    python benchmark.py --scenario single_part --compare benchmarks/results/<earlier>.json
+
+Each scenario's pages are generated by benchmark_site.py and served by
+standin_server.py, so runs never touch the live site. For every scenario the
+median of the timed runs is reported for wall time, page loads, autocomplete
+calls, WebDriver commands and time spent sleeping (summed over all threads,
+which includes WebDriverWait polling), along with the per-stage spans of the
+timed runs. Results are written to a JSON file named after the current commit
+so runs can be compared across commits.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmark_site import build_site
+from catalog_search import CatalogSearch
+from driver_pool import DEFAULT_POOL_SIZE
+from http_backend import AUTOCOMPLETE_PATH
+from standin_server import StandInServer
+from tab_fanout import DEFAULT_MAX_TABS
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+METRICS = ["wall_time", "page_loads", "autocomplete_calls", "webdriver_commands", "sleep_time"]
+
+BRANDS = ["MOOG", "TIMKEN", "SKF"]
+MAKES = ["Chevrolet", "Ford", "Dodge", "Toyota", "Nissan"]
+
+
+def vehicle(make, model, years, engines):
+    return {"make": make, "model": model, "years": list(years), "engines": engines}
+
+
+def single_part_catalog():
+    """One part fitting one vehicle whose previous year has a rear fitment"""
+    listing = [("SKF", "BR930", "Front; FWD"), ("MOOG", "513121", "Rear; FWD")]
+    return {
+        "parts": {"513121": [("MOOG", [("Honda", "Accord", "2010-2012")])]},
+        "vehicles": [vehicle("Honda", "Accord", range(2009, 2013), {"2.4L L4": listing})],
+    }
+
+
+def buyers_guide_catalog(count=50):
+    """
+    One part fitting `count` vehicles. Every other vehicle also exists the year
+    before its range starts, and every fifth one has two engines.
+    """
+    part_number = "BG5050"
+    guide = []
+    vehicles = []
+    for i in range(count):
+        make = MAKES[i % len(MAKES)]
+        model = f"Model{i:02d}"
+        start = 2005 + i % 10
+        end = start + 3
+        guide.append((make, model, f"{start}-{end}"))
+        engines = {"2.0L L4": [(BRANDS[i % len(BRANDS)], part_number, "Front; FWD")]}
+        if i % 5 == 0:
+            engines["3.0L V6"] = [("MOOG", part_number, "Front; 4WD")]
+        first_year = start - 1 if i % 2 == 0 else start
+        vehicles.append(vehicle(make, model, range(first_year, end + 1), engines))
+    return {"parts": {part_number: [("WJB", guide[:1]), ("TIMKEN", guide)]}, "vehicles": vehicles}
+
+
+def multi_engine_catalog():
+    """A position search where only the last of three engines has the front fitment"""
+    rear_only = [("SKF", "BR900", "Rear; FWD"), ("TIMKEN", "HA590", "Rear; FWD")]
+    engines = {
+        "2.4L L4": rear_only,
+        "2.5L L4": rear_only,
+        "3.5L V6": rear_only + [("MOOG", "512350", "Front; FWD")],
+    }
+    return {"vehicles": [vehicle("Toyota", "Camry", range(2009, 2013), engines)]}
+
+
+SCENARIOS = {
+    "single_part": {"input": "513121", "expected": "513121", "catalog": single_part_catalog},
+    "buyers_guide_50": {"input": "BG5050", "expected": "BG5050", "catalog": buyers_guide_catalog},
+    "multi_engine": {"input": "Front\t10~12 Toyota Camry", "expected": "512350", "catalog": multi_engine_catalog},
+}
+
+
+class SleepMeter:
+    """Patches time.sleep while active and sums how long every thread slept."""
+
+    def __init__(self):
+        self.total = 0.0
+        self._lock = threading.Lock()
+        self._sleep = None
+
+    def __enter__(self):
+        self._sleep = time.sleep
+        sleep = self._sleep
+
+        def measured_sleep(seconds):
+            started = time.perf_counter()
+            try:
+                sleep(seconds)
+            finally:
+                with self._lock:
+                    self.total += time.perf_counter() - started
+
+        time.sleep = measured_sleep
+        return self
+
+    def __exit__(self, *exc):
+        time.sleep = self._sleep
+        return False
+
+
+class BenchmarkSearch(CatalogSearch):
+    """Runs searches quietly and keeps the last answer."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.answer = None
+
+    def report(self, text):
+        pass
+
+    def copy_to_clipboard(self, text):
+        self.answer = text
+
+    def display_results(self, results_list):
+        pass
+
+
+def run_once(search, server, text):
+    """Time one search and collect its counters"""
+    search.answer = None
+    server.reset_counts()
+    commands_before = search.tracer.commands
+    # Every run does its own lookups instead of reusing the previous run's answers
+    search.flights.forget()
+
+    with SleepMeter() as sleeps:
+        started = time.perf_counter()
+        completed = search.run_search(text)
+        wall_time = time.perf_counter() - started
+
+    requests = list(server.requests)
+    return {
+        "wall_time": round(wall_time, 3),
+        "page_loads": sum(1 for method, _ in requests if method == "GET"),
+        "autocomplete_calls": sum(1 for method, path in requests if method == "POST" and path == AUTOCOMPLETE_PATH),
+        "webdriver_commands": search.tracer.commands - commands_before,
+        "sleep_time": round(sleeps.total, 3),
+        "completed": completed,
+        "answer": search.answer,
+    }
+
+
+def run_scenario(name, scenario, backend, pool_size, lean, repeat, warmup, workdir, max_tabs=DEFAULT_MAX_TABS):
+    """Serve the scenario's pages and run its search warmup + repeat times"""
+    directory = build_site(os.path.join(workdir, name), scenario["catalog"]())
+    server = StandInServer(directory)
+    base_url = server.start()
+    search = BenchmarkSearch(pool_size=pool_size, cache_path=None, backend=backend, base_url=base_url, lean=lean,
+                             max_tabs=max_tabs)
+    try:
+        # Warmup runs start the browser sessions so the timed runs measure searches only
+        for _ in range(warmup):
+            run_once(search, server, scenario["input"])
+        search.tracer.reset()
+        runs = [run_once(search, server, scenario["input"]) for _ in range(repeat)]
+        stages = search.tracer.snapshot()
+        lean_report = search.lean_report() if lean and backend == "selenium" else None
+    finally:
+        search.close()
+        server.stop()
+
+    result = {metric: statistics.median(run[metric] for run in runs) for metric in METRICS}
+    result["answer"] = runs[-1]["answer"]
+    result["ok"] = all(run["completed"] and run["answer"] == scenario["expected"] for run in runs)
+    result["stages"] = stages
+    if lean_report:
+        result["lean"] = lean_report
+    result["runs"] = runs
+    return result
+
+
+def current_commit():
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return output.stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def print_summary(results, previous=None):
+    """Print one line per scenario, with the change from an earlier results file if given"""
+    previous_scenarios = (previous or {}).get("scenarios", {})
+    print(f"{'scenario':<18}" + "".join(f"{metric:>22}" for metric in METRICS) + "  ok")
+    for name, result in results["scenarios"].items():
+        line = f"{name:<18}"
+        for metric in METRICS:
+            cell = f"{result[metric]:g}"
+            before = previous_scenarios.get(name, {}).get(metric)
+            if before:
+                cell += f" ({(result[metric] - before) / before:+.0%})"
+            line += f"{cell:>22}"
+        print(line + f"  {'yes' if result['ok'] else 'NO'}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the search flows against a local stand-in site")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run, may be repeated (default: all)")
+    parser.add_argument("--backend", choices=["selenium", "http"], default="selenium")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--lean", action="store_true", help="Use the lean browsing profile")
+    parser.add_argument("--max-tabs", type=int, default=DEFAULT_MAX_TABS, help="Engine listings opened at once per session")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per scenario")
+    parser.add_argument("-o", "--output", help="Results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to show changes against")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    commit = current_commit()
+    results = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "backend": args.backend,
+        "pool_size": args.pool_size,
+        "lean": args.lean,
+        "max_tabs": args.max_tabs,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "scenarios": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="benchmark-site-") as workdir:
+        for name in args.scenario or SCENARIOS:
+            results["scenarios"][name] = run_scenario(name, SCENARIOS[name], args.backend, args.pool_size,
+                                                      args.lean, args.repeat, args.warmup, workdir, args.max_tabs)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    print_summary(results, previous)
+    print(f"Results written to {output}")
+    return 0 if all(result["ok"] for result in results["scenarios"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Synthetic catalog recordings for the offline benchmark.
+
+build_site() writes a recording directory that standin_server.py can replay:
+part search and buyers guide pages, top search autocomplete answers, and the
+make/year/model -> engine -> Brake & Wheel Hub -> Wheel Bearing & Hub pages.
+The pages carry just enough script for the Selenium flows to work the way they
+do on the live site (debounced autocomplete, Enter to pick and open a
+suggestion, buyers guide popup), and the same markup is read by the HTTP backend.
+"""
+import html
+import json
+import os
+
+from http_backend import AUTOCOMPLETE_PATH, CATALOG_PATH, PART_SEARCH_PATH
+
+SEARCH_BOX = """
+<input id="topsearchinput[input]" type="text" autocomplete="off">
+<div id="topsearchinput-suggestions"></div>
+<script>
+(function () {
+    var input = document.getElementById('topsearchinput[input]');
+    var box = document.getElementById('topsearchinput-suggestions');
+    var timer = null;
+    var picked = null;
+    input.addEventListener('input', function () {
+        picked = null;
+        clearTimeout(timer);
+        timer = setTimeout(function () {
+            var body = 'func=gettopsearchsuggestions&payload=' + encodeURIComponent(JSON.stringify({text: input.value}));
+            fetch('%(autocomplete)s', {method: 'POST', body: body,
+                headers: {'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8'}})
+                .then(function (response) { return response.text(); })
+                .then(function (markup) { box.innerHTML = markup; });
+        }, 50);
+    });
+    input.addEventListener('keydown', function (event) {
+        if (event.key !== 'Enter') { return; }
+        var link = box.querySelector('a[href]');
+        if (!link) { return; }
+        // First Enter picks the top suggestion, the second one opens it
+        if (picked === null) {
+            picked = link.getAttribute('href');
+            input.value = link.textContent;
+        } else {
+            window.location.href = picked;
+        }
+    });
+})();
+</script>
+""" % {"autocomplete": AUTOCOMPLETE_PATH}
+
+POPUP_SCRIPT = """
+<div id="popup-host"></div>
+<script>
+(function () {
+    var host = document.getElementById('popup-host');
+    document.addEventListener('click', function (event) {
+        if (event.target.closest('.dialog-close')) {
+            host.innerHTML = '';
+            return;
+        }
+        var link = event.target.closest('a[id^="vew_partnumber"]');
+        if (!link) { return; }
+        event.preventDefault();
+        fetch(link.getAttribute('href'))
+            .then(function (response) { return response.text(); })
+            .then(function (markup) { host.innerHTML = markup + '<button class="dialog-close">Close</button>'; });
+    });
+})();
+</script>
+"""
+
+
+def page(title, body):
+    return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title></head>"
+            f"<body>{body}</body></html>")
+
+
+def slug(value):
+    """Catalog URL segment, the same way HttpCatalogBackend builds it"""
+    return str(value).lower().replace(" ", "+")
+
+
+class SiteBuilder:
+    """Accumulates pages and their routes, then writes them as a recording directory."""
+
+    def __init__(self):
+        self.routes = []
+        self.files = {}
+
+    def add(self, path, markup, method="GET", body_contains=None):
+        name = f"page{len(self.files):04d}.html"
+        self.files[name] = markup
+        route = {"method": method, "path": path, "file": name}
+        if body_contains:
+            route["body_contains"] = body_contains
+        self.routes.append(route)
+
+    def add_autocomplete(self, fragment, rows):
+        """
+        Answer the top search box for queries containing fragment. rows are
+        (text, href) pairs; a "Vehicles" heading row comes first like on the site.
+        """
+        cells = "".join(f"<tr><td><a href=\"{html.escape(href)}\">{html.escape(text)}</a></td></tr>"
+                        for text, href in rows)
+        markup = (f"<table id=\"autosuggestions[topsearchinput]\"><tbody>"
+                  f"<tr><td>Vehicles</td></tr>{cells}</tbody></table>")
+        self.add(AUTOCOMPLETE_PATH, markup, method="POST", body_contains=[fragment])
+
+    def write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name, markup in self.files.items():
+            with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+                f.write(markup)
+        with open(os.path.join(directory, "routes.json"), "w", encoding="utf-8") as f:
+            json.dump(self.routes, f, indent=1)
+
+
+def add_vehicle(site, vehicle):
+    """
+    Catalog pages for every year of one make/model. A vehicle with several
+    engines sends its autocomplete rows to the model page, so the Selenium flow
+    has to disambiguate the engine there.
+    """
+    make, model = vehicle["make"], vehicle["model"]
+    engines = vehicle["engines"]
+    query = f"{make} {model}".lower()
+
+    year_rows = []
+    for year in vehicle["years"]:
+        model_path = CATALOG_PATH + ",".join(slug(part) for part in (make, year, model))
+        year_rows.append((f"{make} {model} {year}".upper(), model_path))
+
+        engine_links = []
+        engine_rows = []
+        for index, (engine, listings) in enumerate(engines.items(), start=1):
+            engine_path = f"{model_path},{slug(engine)},{index}"
+            category_path = f"{engine_path},brake"
+            listing_path = f"{category_path},wbh"
+            engine_links.append(f"<a href=\"{engine_path}\">{html.escape(engine)}</a>")
+            engine_rows.append((f"{query} {year} {engine.lower()}", engine_path if len(engines) == 1 else model_path))
+
+            site.add(engine_path, page(engine, f"<a href=\"{category_path}\">Brake &amp; Wheel Hub</a>"))
+            site.add(category_path, page("Brake & Wheel Hub", f"<a href=\"{listing_path}\">Wheel Bearing &amp; Hub</a>"))
+            rows = "".join(
+                f"<tr><td><span class=\"listing-final-manufacturer\">{html.escape(manufacturer)}</span> "
+                f"<span class=\"listing-final-partnumber\">{html.escape(part_number)}</span>"
+                f"<div class=\"listing-text-row\">{html.escape(drive_info)}</div></td></tr>"
+                for manufacturer, part_number, drive_info in listings)
+            site.add(listing_path, page("Wheel Bearing & Hub",
+                                        "<input class=\"filter-input\" type=\"text\">"
+                                        f"<table class=\"nobmp\"><tbody>{rows}</tbody></table>"))
+
+        site.add(model_path, page(f"{year} {make} {model}", "<br>".join(engine_links)))
+        # Opening quote only, so the typed engine names match this year's answer too
+        site.add_autocomplete(f"\"{query} {year}", engine_rows)
+
+    site.add_autocomplete(f"\"{query}\"", year_rows)
+
+
+def add_make(site, make, vehicles):
+    """The make's catalog page listing its years, and each year's page listing its models"""
+    make_path = CATALOG_PATH + slug(make)
+    years = sorted({year for vehicle in vehicles for year in vehicle["years"]})
+    site.add(make_path, page(make, "<br>".join(f"<a href=\"{make_path},{year}\">{year}</a>" for year in years)))
+    for year in years:
+        links = [f"<a href=\"{make_path},{year},{slug(vehicle['model'])}\">{html.escape(vehicle['model'].upper())}</a>"
+                 for vehicle in vehicles if year in vehicle["years"]]
+        site.add(f"{make_path},{year}", page(f"{year} {make}", "<br>".join(links)))
+
+
+def add_part(site, part_number, listings):
+    """
+    Part search page plus one buyers guide per listing. listings are
+    (manufacturer, [(make, model, years text), ...]) pairs.
+    """
+    items = []
+    for pk, (manufacturer, vehicles) in enumerate(listings, start=1):
+        info_path = f"/en/moreinfo.php?pk={part_number}-{pk}"
+        items.append(
+            "<div class=\"listing-border-top-line listing-inner-content\">"
+            f"<span class=\"listing-final-manufacturer\">{html.escape(manufacturer)}</span> "
+            f"<span class=\"listing-final-partnumber\">{html.escape(part_number)}</span>"
+            "<div class=\"listing-text-row\">Category: Wheel Bearing &amp; Hub</div>"
+            f"<a id=\"vew_partnumber[{pk}]\" href=\"{info_path}\">Info</a></div>")
+        rows = "".join(f"<tr><td>{html.escape(make)}</td><td>{html.escape(model)}</td><td>{html.escape(years)}</td></tr>"
+                       for make, model, years in vehicles)
+        site.add(info_path, "<div id=\"buyersguidepopup-outer_b\"><div><div><table><tbody>"
+                            f"<tr><th>Buyers Guide</th></tr>{rows}</tbody></table></div></div></div>")
+    site.add(PART_SEARCH_PATH.format(part_number=part_number),
+             page(part_number, f"<div class=\"listings-container\">{''.join(items)}</div>{POPUP_SCRIPT}"))
+
+
+def build_site(directory, catalog):
+    """
+    Write a recording directory for a catalog description:
+    {"parts": {part_number: [(manufacturer, vehicles)]}, "vehicles": [vehicle, ...]}
+    where each vehicle is {"make", "model", "years", "engines": {engine: listing rows}}.
+    """
+    site = SiteBuilder()
+    home = page("Catalog", SEARCH_BOX)
+    site.add("/", home)
+    site.add(CATALOG_PATH, home)
+    for part_number, listings in catalog.get("parts", {}).items():
+        add_part(site, part_number, listings)
+    makes = {}
+    for vehicle in catalog.get("vehicles", []):
+        add_vehicle(site, vehicle)
+        makes.setdefault(vehicle["make"], []).append(vehicle)
+    for make, vehicles in makes.items():
+        add_make(site, make, vehicles)
+    # Partially typed queries get an empty suggestion table
+    site.add(AUTOCOMPLETE_PATH, "<table id=\"autosuggestions[topsearchinput]\"><tbody></tbody></table>", method="POST")
+    site.write(directory)
+    return directory
@@ -0,0 +1,1363 @@
+import logging
+import threading
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from selenium.webdriver.common.keys import Keys
+from driver_pool import DriverPool, DEFAULT_POOL_SIZE, create_chrome_driver, quit_driver, session_lost
+from lookup_cache import LookupCache, DEFAULT_CACHE_PATH, MISS, normalize_key
+from http_backend import HttpCatalogBackend, BASE_URL, CATALOG_PATH, engine_substring
+from waits import AdaptiveWaiter, rows_stable
+from dom_snapshot import snapshot_links, snapshot_listings, snapshot_table, snapshot_texts
+from records import Vehicle, Fitment, SearchState, vehicle_key
+from tracing import Tracer
+from lean_profile import LeanStats
+from model_index import ModelYearIndex
+from catalog_snapshot import CatalogSnapshot, SnapshotBackend, SnapshotMiss, DEFAULT_SNAPSHOT_PATH
+from tab_fanout import TabFanout, Load, Wait, DEFAULT_MAX_TABS
+from single_flight import SingleFlight
+from search_plan import merge_ranges, representative_year
+from generations import GenerationFinder
+from rate_control import AdaptiveLimiter
+from vehicle_names import VehicleNames
+from engine_ranking import EngineRanking
+
+SEARCH_INPUT = (By.XPATH, '//input[@id="topsearchinput[input]"]')
+AUTOCOMPLETE_ROWS_XPATH = '//*[@id="autosuggestions[topsearchinput]"]/tbody/tr'
+AUTOCOMPLETE_ROWS = (By.XPATH, AUTOCOMPLETE_ROWS_XPATH)
+AUTOCOMPLETE_TABLE = (By.XPATH, '//*[@id="autosuggestions[topsearchinput]"]')
+BRAKE_HUB_LINK = (By.XPATH, "//a[contains(text(), 'Brake & Wheel Hub')]")
+WHEEL_BEARING_LINK = (By.XPATH, "//a[contains(text(), 'Wheel Bearing & Hub')]")
+FILTER_INPUT = (By.CLASS_NAME, 'filter-input')
+LISTING_ROWS_XPATH = '//table[contains(@class, "nobmp")]/tbody/tr'
+LISTING_ROWS = (By.XPATH, LISTING_ROWS_XPATH)
+PART_SEARCH_LISTINGS_XPATH = '//*[contains(@class, "listing-border-top-line listing-inner-content")]'
+BUYERS_GUIDE_ROWS_XPATH = '//*[@id="buyersguidepopup-outer_b"]/div/div/table/tbody/tr'
+
+# Catalog URLs for a vehicle/engine listing are stable, keep them longer than lookup results
+LISTING_URL_TTL = 90 * 24 * 3600
+
+# Cache namespaces keyed by make and model first; those two parts are stored
+# as vehicle_key() so every spelling of a vehicle shares one entry
+VEHICLE_NAMESPACES = {"engines", "previous_year", "listing_url", "listing_rows", "position_fitment", "fitment"}
+
+class SearchCancelled(BaseException):
+    """
+    Raised at the next navigation boundary after cancel() is called.
+    Derives from BaseException (like asyncio.CancelledError) so the lookup
+    methods' `except Exception` handlers do not swallow it.
+    """
+
+class CatalogSearch:
+    """
+    Previous generation lookup logic, independent of any user interface.
+    Subclasses decide where report(), copy_to_clipboard() and display_results() output goes.
+    """
+    preferred_manufacturers = ["moog", "timken", "skf", "ultra-power", "wjb", "durago", "acdelco"]
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, cache_path=DEFAULT_CACHE_PATH, backend="selenium", base_url=BASE_URL,
+                 profile_dir=None, lean=False, snapshot_path=DEFAULT_SNAPSHOT_PATH, max_tabs=DEFAULT_MAX_TABS,
+                 find_generations=False):
+        # Set up logging
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+        
+        # Site every page is loaded from, a local stand-in server when benchmarking
+        self.base_url = base_url.rstrip("/")
+
+        # Initialize driver as None - will be created when needed
+        self.driver = None
+        # Set when a lookup lost the main session, it is replaced before the next search
+        self.driver_lost = False
+
+        # Pool of extra sessions for parallel lookups, created on first use
+        self.pool_size = pool_size
+        self.driver_pool = None
+        self.driver_pool_lock = threading.Lock()
+
+        # Engine listings of one vehicle are opened in up to this many tabs of a session at once
+        self.max_tabs = max_tabs
+
+        # Optional root for persistent Chrome user-data directories, keeps the browser cache warm across runs
+        self.profile_dir = profile_dir
+
+        # Lean sessions skip images, fonts, ads and trackers; lean_stats counts what was avoided
+        self.lean = lean
+        self.lean_stats = LeanStats()
+
+        # Background browser startup, see prewarm(); driver_ready is set once it is done with self.driver
+        self.prewarm_thread = None
+        self.driver_ready = threading.Event()
+
+        # Persistent lookup cache shared across searches and runs (None disables it)
+        self.cache = LookupCache(cache_path) if cache_path else None
+
+        # Years listed per make/model, answers previous-year checks without a page load
+        self.year_index = ModelYearIndex(self.cache)
+        # Background builds of makes the index missed (browserless backends only)
+        self.index_thread = None
+        self.index_thread_lock = threading.Lock()
+
+        # Catalog spellings of makes and models, typed names are resolved to them before searching
+        self.names = VehicleNames(self.cache)
+
+        # Engine variants that held position fitments before, tried first by find_position_fitment
+        self.engine_ranking = EngineRanking(self.cache)
+
+        # Identical previous-year and fitment lookups share one in-flight browser operation
+        self.flights = SingleFlight(retry_on=(SearchCancelled,))
+
+        # With find_generations, the true generation boundaries are bisected from fitment changes
+        # instead of trusting the typed or buyers guide year ranges (several listing reads per vehicle)
+        self.find_generations = find_generations
+        self.generations = GenerationFinder(self)
+
+        # Results of the current search, replaced at the start of every search
+        self.state = SearchState()
+
+        # Listing rows read during the current search, shared by find_fitment and find_position_fitment
+        self.listing_memo = {}
+        self.listing_lock = threading.Lock()
+
+        # Set by cancel() from any thread, checked before each page load
+        self.cancel_event = threading.Event()
+
+        # Per-stage timing spans and WebDriver command counts, dumped with tracer.dump()
+        self.tracer = Tracer()
+
+        # Every explicit browser wait goes through here so timeouts follow observed page speed
+        self.waiter = AdaptiveWaiter(tracer=self.tracer)
+
+        # Every page load and HTTP request takes a slot, the number of slots adapts to the site
+        self.limiter = AdaptiveLimiter(initial=max(pool_size, 1), retry_on=(TimeoutException, TimeoutError))
+
+        # Browserless backend: "http" fetches catalog pages, "snapshot" answers from a crawled
+        # local copy (see snapshot_crawler.py); "selenium" leaves it unset and drives Chrome
+        self.http_backend = None
+        if backend == "http":
+            self.http_backend = HttpCatalogBackend(base_url=self.base_url, pool_size=max(pool_size, 1),
+                                                   tracer=self.tracer, limiter=self.limiter)
+        elif backend == "snapshot":
+            self.http_backend = SnapshotBackend(CatalogSnapshot(snapshot_path))
+            # The snapshot already knows every year it holds, no make listing needs reading
+            for make, models in self.http_backend.snapshot.model_years().items():
+                self.year_index.store_make(make, models, persist=False)
+
+    def report(self, text):
+        """Output a chunk of progress/result text"""
+        self.logger.info(text.strip())
+
+    def copy_to_clipboard(self, text):
+        """Hand the answer of a search to the user"""
+        self.logger.info(f"Result: {text}")
+
+    def display_results(self, results_list):
+        """Output the buyers guide vehicles found for a part number"""
+        if not results_list:
+            self.report("No results found.\n")
+            return
+        for make, model, start_year, end_year in results_list:
+            self.report(f"Make: {make}\nModel: {model}\nYear Range: {start_year}-{end_year}\n")
+
+    def cancel(self):
+        """Ask the running search to stop at its next navigation boundary"""
+        self.cancel_event.set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise SearchCancelled()
+
+    def run_search(self, text):
+        """
+        Reset per-search state and run a part number or position/car search for one input line.
+        Returns False if the search could not start or was cancelled (state.cancelled is set).
+        """
+        self.cancel_event.clear()
+
+        # Start from fresh per-search data
+        with self.listing_lock:
+            self.listing_memo.clear()
+        self.state = SearchState()
+
+        # Use the session a background prewarm is starting rather than launching a second one
+        if self.prewarm_thread:
+            self.driver_ready.wait()
+
+        # Initialize driver in headless mode if it doesn't exist or the last search lost it
+        if self.driver_lost and self.driver:
+            self.logger.info("Replacing the WebDriver session lost by the last search")
+            self.setup_driver(headless=True)
+        if not self.http_backend and not self.driver and not self.setup_driver(headless=True):
+            self.display_results([])
+            return False
+
+        self.state.search_text = text
+        input_type, search_text = self.classify_input(text)
+        
+        try:
+            with self.tracer.span("search", input_type=input_type):
+                if input_type == 'part_number':
+                    self.perform_part_number_search(search_text)
+                else:
+                    self.perform_position_car_search(search_text.split('\t')[0], search_text.split('\t')[1])
+        except SearchCancelled:
+            self.logger.info(f"Search cancelled: {text}")
+            self.state.cancelled = True
+            self.report("\nSearch cancelled\n")
+            return False
+        if self.state.failures:
+            self.report(f"\n{len(self.state.failures)} catalog lookups failed, the answer may be incomplete\n")
+        return True
+
+    def setup_driver(self, headless=True):
+        """Initialize the WebDriver with the specified mode."""
+        if self.driver:
+            # Close existing driver if any
+            try:
+                quit_driver(self.driver)
+            except Exception as e:
+                self.logger.info(f"Error closing the previous WebDriver: {str(e)}")
+            self.driver = None
+            
+        self.driver_lost = False
+        try:
+            # Initialize the Chrome driver
+            self.driver = self.create_driver(headless=headless)
+            self.logger.info(f"Selenium WebDriver initialized successfully in {'headless' if headless else 'visible'} mode")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to initialize WebDriver: {str(e)}")
+            self.driver = None
+            return False
+
+    def create_driver(self, headless=True):
+        """Start one Chrome session; used for the main driver and every pooled session"""
+        with self.tracer.span("driver_startup"):
+            return self.tracer.instrument(create_chrome_driver(headless=headless, profile_root=self.profile_dir,
+                                                               lean=self.lean))
+
+    def get_driver_pool(self):
+        """The pool of extra sessions, created on first use"""
+        with self.driver_pool_lock:
+            if not self.driver_pool:
+                self.driver_pool = DriverPool(size=self.pool_size, headless=True, factory=self.create_driver)
+            return self.driver_pool
+
+    def prewarm(self):
+        """
+        Launch the headless sessions on a background thread as soon as the app starts,
+        so the first search pays for its page loads only. run_search waits for the
+        main session; pooled sessions keep starting behind it.
+        """
+        if self.http_backend or self.prewarm_thread:
+            return
+        self.prewarm_thread = threading.Thread(target=self.prewarm_sessions, name="driver-prewarm", daemon=True)
+        self.prewarm_thread.start()
+
+    def prewarm_sessions(self):
+        try:
+            with self.tracer.span("prewarm"):
+                if self.driver or self.setup_driver(headless=True):
+                    try:
+                        # Fetch the home page so its cookies and cached assets are ready
+                        self.load(self.driver, f"{self.base_url}/")
+                    except Exception as e:
+                        self.logger.info(f"Prewarm page load failed: {str(e)}")
+        finally:
+            self.driver_ready.set()
+
+        if self.driver and self.pool_size > 1:
+            try:
+                started = self.get_driver_pool().prewarm()
+                self.logger.info(f"Prewarmed {started} pooled sessions")
+            except Exception as e:
+                self.logger.error(f"Failed to prewarm the driver pool: {str(e)}")
+
+    def load(self, driver, url):
+        """driver.get() timed as a page_load span"""
+        with self.tracer.span("page_load", url=url):
+            self.limiter.run(lambda: driver.get(url), "page_load")
+
+    def autocomplete_rows(self, driver, path, query):
+        """
+        Type query into the search box of the page at path and read the settled
+        suggestion rows. An empty suggestion table is an answer (no such model or
+        year); no table at all raises TimeoutException, so callers never cache or
+        answer from a response that did not arrive. Only the page load goes
+        through the limiter's timeout handling.
+        """
+        self.load(driver, f"{self.base_url}{path}")
+        input_element = self.waiter.until(driver, EC.presence_of_element_located(SEARCH_INPUT), "page")
+        input_element.send_keys(query)
+        # Wait until the autocomplete answer is in and its rows stop changing, then read them in one call
+        self.waiter.until(driver, rows_stable(AUTOCOMPLETE_ROWS, container=AUTOCOMPLETE_TABLE), "autocomplete")
+        return snapshot_texts(driver, AUTOCOMPLETE_ROWS_XPATH)
+
+    def run_steps(self, driver, steps):
+        """Drive a tab_fanout step generator on the driver's current tab, blocking on every step"""
+        method, value = steps.send, None
+        while True:
+            try:
+                step = method(value)
+            except StopIteration as done:
+                return done.value
+            if isinstance(step, Load):
+                self.load(driver, step.url)
+                method, value = steps.send, None
+                continue
+            if not step.required:
+                method, value = steps.send, self.waiter.poll(driver, step.condition, step.stage)
+                continue
+            try:
+                method, value = steps.send, self.waiter.until(driver, step.condition, step.stage)
+            except TimeoutException as e:
+                method, value = steps.throw, e
+
+    def map_lookups(self, fn, items):
+        """
+        Call fn(driver, item) for every item and return the results in input order.
+        Uses the driver pool when pool_size > 1, otherwise runs serially on self.driver.
+        """
+        items = list(items)
+        lookup = fn
+
+        def fn(driver, item):
+            # Every lookup starts with a page load, so this is a navigation boundary
+            self.check_cancelled()
+            return lookup(driver, item)
+
+        if self.pool_size <= 1 or len(items) <= 1:
+            return [fn(self.driver, item) for item in items]
+
+        if self.http_backend:
+            # The HTTP backend is thread-safe, so no browser sessions are needed
+            with ThreadPoolExecutor(max_workers=min(self.pool_size, len(items))) as executor:
+                return list(executor.map(lambda item: fn(None, item), items))
+
+        return self.get_driver_pool().map(fn, items)
+
+    def lookup_failed(self, driver, error):
+        """
+        Lookups handle their own errors so one failure does not stop the search.
+        The failure is recorded on the search state, so the search is reported as
+        failed rather than answered, and a session lost on the way is replaced
+        instead of failing every later lookup.
+        """
+        self.state.add_failure(f"{type(error).__name__}: {str(error).strip() or 'no details'}")
+        self.replace_lost_session(driver, error)
+
+    def replace_lost_session(self, driver, error):
+        """Have driver replaced if error means its session is gone"""
+        if driver is None or not session_lost(error):
+            return
+        if driver is self.driver:
+            self.driver_lost = True
+        elif self.driver_pool:
+            self.driver_pool.mark_broken(driver)
+
+    def shared_lookup(self, key, driver, fn):
+        """
+        flights.do(key, fn) for a lookup driven on driver. Only the call that ran
+        fn replaces its session when fn loses it; calls that shared the lookup get
+        the same error, but their own sessions are fine.
+        """
+        def lead():
+            try:
+                return fn()
+            except WebDriverException as e:
+                self.replace_lost_session(driver, e)
+                raise
+        return self.flights.do(key, lead)
+
+    def cache_key(self, namespace, key_parts):
+        """Key parts with a leading make and model replaced by their vehicle_key()"""
+        if namespace in VEHICLE_NAMESPACES:
+            return (*vehicle_key(key_parts[0], key_parts[1]), *key_parts[2:])
+        return tuple(key_parts)
+
+    def cache_get(self, namespace, *key_parts):
+        """Look up a cached result, returning MISS when caching is disabled"""
+        if not self.cache:
+            return MISS
+        try:
+            return self.cache.get(namespace, *self.cache_key(namespace, key_parts))
+        except Exception as e:
+            self.logger.error(f"Cache read failed: {str(e)}")
+            return MISS
+
+    def cache_set(self, namespace, key_parts, value, negative=False, ttl=None):
+        """Store a result in the persistent cache if it is enabled"""
+        if not self.cache:
+            return
+        try:
+            self.cache.set(namespace, self.cache_key(namespace, key_parts), value, ttl=ttl, negative=negative)
+        except Exception as e:
+            self.logger.error(f"Cache write failed: {str(e)}")
+
+    def fetch_engines(self, make, model, year, driver=None):
+        """Return the catalog autocomplete engine list for a make, model and year"""
+        driver = driver or self.driver
+        cached = self.cache_get("engines", make, model, year)
+        if cached is not MISS:
+            return cached
+
+        search_string = f"{make} {model} {year}"
+        self.check_cancelled()
+        if self.http_backend:
+            engines = self.http_backend.autocomplete(search_string)
+        else:
+            engines = self.autocomplete_rows(driver, "/en/catalog/", search_string)
+
+        # Remove the 'Vehicles' heading row
+        if 'Vehicles' in engines:
+            engines.remove('Vehicles')
+
+        self.cache_set("engines", (make, model, year), engines, negative=not engines)
+        return engines
+
+    def check_previous_year_model(self, make, model, year, driver=None):
+        """Check if a model exists for the previous year"""
+        driver = driver or self.driver
+        try:
+            # Navigate to the catalog for the previous year
+            prev_year = str(int(year) - 1)
+            found = self.shared_lookup(normalize_key("previous_year", *vehicle_key(make, model), prev_year), driver,
+                                       lambda: self.lookup_previous_year(make, model, prev_year, driver))
+            if found:
+                # Duplicates are handled by the ordered set in SearchState
+                self.state.add_previous_year(make, model, prev_year)
+            return found
+
+        except Exception as e:
+            self.logger.error(f"Error checking previous year model: {str(e)}")
+            # A lost session was replaced by shared_lookup() if it was this driver's
+            self.lookup_failed(None, e)
+            # Get the current page source for debugging
+            if driver and not session_lost(e):
+                self.logger.info(f"Current page content: {driver.page_source[:500]}...")
+            return False
+
+    def lookup_previous_year(self, make, model, prev_year, driver):
+        """Whether the catalog lists make/model in prev_year: year index, then cache, then autocomplete"""
+        indexed = self.previous_year_from_index(make, model, prev_year, driver)
+        if indexed is not None:
+            self.logger.info(f"Year index answer for {make} {model} {prev_year}: {indexed}")
+            return indexed
+
+        cached = self.cache_get("previous_year", make, model, prev_year)
+        if cached is not MISS:
+            self.logger.info(f"Cached previous year answer for {make} {model} {prev_year}: {cached}")
+            return cached
+
+        self.check_cancelled()
+        with self.tracer.span("previous_year", vehicle=f"{make} {model} {prev_year}"):
+            if self.http_backend:
+                autocomplete_rows = self.http_backend.autocomplete(f'{make} {model}')
+            else:
+                self.logger.info(f"Navigating to {make} {model} catalog...")
+                autocomplete_rows = self.autocomplete_rows(driver, "/", f'{make} {model}')
+        self.logger.info(f"Found {len(autocomplete_rows)} autocomplete results")
+
+        # Extract years from autocomplete results
+        valid_years = []
+        for result in autocomplete_rows:
+            # Split text and look for year-like strings (4 digits)
+            words = result.split()
+            for word in words:
+                if word.isdigit() and len(word) == 4:
+                    valid_years.append(word)
+        # Keep the years so the next check for this make/model needs no page load
+        if valid_years:
+            self.year_index.store_model(make, model, valid_years)
+
+        if prev_year in valid_years:
+            self.logger.info(f"Found previous year model: {make} {model} {prev_year}")
+            self.cache_set("previous_year", (make, model, prev_year), True)
+            return True
+        else:
+            self.logger.info(f"Previous year model not found: {make} {model} {prev_year}")
+            self.cache_set("previous_year", (make, model, prev_year), False, negative=True)
+            return False
+
+    def generation_span(self, make, model, year, driver=None):
+        """(first year, last year) of the generation containing year, None if it could not be found"""
+        driver = driver or self.driver
+        try:
+            return self.generations.span(make, model, year, driver)
+        except Exception as e:
+            self.logger.error(f"Could not find the generation of {year} {make} {model}: {str(e)}")
+            self.lookup_failed(driver, e)
+            return None
+
+    def previous_year_from_index(self, make, model, year, driver=None):
+        """
+        Whether the catalog lists make/model in year according to the year index,
+        None when the index cannot tell. Reading a make's listing takes a page per
+        year, so a miss queues the make for indexing off this lookup's path:
+        on a background thread with a browserless backend, else in refresh_year_index().
+        """
+        answer = self.year_index.has_year(make, model, year)
+        if answer is None and self.year_index.needs_build(make):
+            self.year_index.want(make)
+            if self.http_backend:
+                self.start_index_builds()
+        return answer
+
+    def start_index_builds(self):
+        """Index the queued makes on a background thread, unless one is already at it"""
+        with self.index_thread_lock:
+            if self.index_thread and self.index_thread.is_alive():
+                return
+            self.index_thread = threading.Thread(target=self.build_wanted_indexes, name="year-index", daemon=True)
+            self.index_thread.start()
+
+    def build_wanted_indexes(self, driver=None):
+        """Index every make queued by a year index miss"""
+        try:
+            while True:
+                makes = self.year_index.take_wanted()
+                if not makes:
+                    return
+                for make in makes:
+                    self.index_make(make, driver)
+        except SearchCancelled:
+            # A make left unbuilt is queued again by its next miss
+            self.logger.info("Year index build stopped by a cancelled search")
+
+    def index_make(self, make, driver=None):
+        """build_make_index() once per make, however many lookups asked for it"""
+        with self.year_index.build_lock(make):
+            # Another thread may have indexed the make while this one waited
+            if not self.year_index.needs_build(make):
+                return
+            try:
+                built = self.build_make_index(make, driver)
+            except SnapshotMiss:
+                self.logger.info(f"{make} is not in the catalog snapshot")
+                built = False
+            except Exception as e:
+                self.logger.error(f"Could not index {make}: {str(e)}")
+                built = False
+            if not built:
+                self.year_index.mark_failed(make)
+
+    def catalog_links(self, path, driver=None):
+        """(text, href) of every link on a catalog page"""
+        self.check_cancelled()
+        if self.http_backend:
+            _, tree = self.http_backend.get_page(path)
+            return [(link.text.strip(), link.attrs.get("href", "")) for link in tree.find_all(tag="a")]
+        driver = driver or self.driver
+        self.load(driver, f"{self.base_url}{path}")
+        return snapshot_links(driver, "//a[@href]")
+
+    def catalog_path_parts(self, href):
+        """['make', 'year', 'model', ...] for a catalog link, or None for other links"""
+        path = urlsplit(href).path
+        if not path.startswith(CATALOG_PATH) or path == CATALOG_PATH:
+            return None
+        return path[len(CATALOG_PATH):].lower().split(",")
+
+    def build_make_index(self, make, driver=None):
+        """
+        Read every model listed under every year of a make's catalog page into the
+        year index. Runs on the caller's session (lookups may already hold every pooled
+        one), or on threads with the HTTP backend. Returns False if no years were found.
+        """
+        with self.tracer.span("make_index", make=make):
+            make_slug = make.lower().replace(" ", "+")
+            make_path = f"{CATALOG_PATH}{make_slug}"
+            years = set()
+            for _, href in self.catalog_links(make_path, driver):
+                parts = self.catalog_path_parts(href)
+                if parts and len(parts) == 2 and parts[0] == make_slug and parts[1].isdigit():
+                    years.add(int(parts[1]))
+            years = sorted(years)
+            if not years:
+                self.logger.info(f"No catalog years found for {make}")
+                return False
+
+            year_paths = [f"{make_path},{year}" for year in years]
+            if self.http_backend:
+                with ThreadPoolExecutor(max_workers=max(self.pool_size, 1)) as executor:
+                    listings = list(executor.map(self.catalog_links, year_paths))
+            else:
+                listings = [self.catalog_links(path, driver) for path in year_paths]
+
+            models = {}
+            for year, links in zip(years, listings):
+                for text, href in links:
+                    parts = self.catalog_path_parts(href)
+                    if parts and len(parts) == 3 and parts[0] == make_slug and parts[1] == str(year) and text:
+                        models.setdefault(text, set()).add(year)
+
+            self.year_index.store_make(make, models)
+            self.names.learn(make, models)
+            self.logger.info(f"Indexed {len(models)} {make} models over {len(years)} years")
+            return True
+
+    def refresh_year_index(self):
+        """
+        Rebuild every make whose index is older than its maximum age, and index the
+        makes lookups missed. cancel() stops it between pages like a search.
+        """
+        # A cancel meant for the search before this job must not stop it
+        self.cancel_event.clear()
+        stale = self.year_index.stale_makes()
+        wanted = self.year_index.has_wanted()
+        if (stale or wanted) and not self.http_backend and not self.driver and not self.setup_driver(headless=True):
+            return
+        try:
+            for make_key in stale:
+                # The index holds make keys, the catalog path needs the make's name
+                make = self.names.resolve(make_key, "")[0]
+                try:
+                    self.build_make_index(make)
+                except Exception as e:
+                    self.logger.error(f"Could not refresh the year index for {make}: {str(e)}")
+        except SearchCancelled:
+            # Makes not rebuilt yet stay stale and are picked up by the next refresh
+            self.logger.info("Year index refresh cancelled")
+            return
+        finally:
+            if stale:
+                # Shared answers may predate the rebuilt listings
+                self.flights.forget()
+        self.build_wanted_indexes()
+
+    def classify_input(self, input_text):
+        """
+        Classify the input text as either a part number or position/car description.
+        Returns: ('part_number', text) or ('position_car', text)
+        """
+        # Check if input matches position and car pattern
+        # Position should be Front/Rear followed by tab and year range with car make/model
+        if '\t' in input_text and any(pos in input_text.lower() for pos in ['front', 'rear']):
+            return ('position_car', input_text)
+        
+        # Otherwise treat as part number (alphanumeric)
+        return ('part_number', input_text)
+
+    def parse_car_description(self, description):
+        """
+        Parse a car description in the format 'XX~YY Make Model' or 'XX Make Model'
+        Handles special cases:
+        - Mercedes~Benz or MBZ
+        - Model names with ~ (e.g. F~150, F~250)
+        Returns: (make, model, start_year, end_year)
+        """
+        try:
+            # Split into parts but preserve the original string
+            parts = description.strip().split(' ', 1)
+            if len(parts) < 2:
+                raise ValueError(f"Invalid car description format: {description}")
+                
+            year_part = parts[0]
+            make_model_part = parts[1]
+            
+            # Parse year part - only split on ~ if it's between two 2-digit numbers
+            if '~' in year_part and len(year_part) == 5 and year_part[2] == '~':
+                start_year_str, end_year_str = year_part.split('~')
+                if start_year_str.isdigit() and end_year_str.isdigit():
+                    start_year = '20' + start_year_str if int(start_year_str) < 50 else '19' + start_year_str
+                    end_year = '20' + end_year_str if int(end_year_str) < 50 else '19' + end_year_str
+                else:
+                    raise ValueError(f"Invalid year format: {year_part}")
+            else:
+                if not year_part.isdigit():
+                    raise ValueError(f"Invalid year format: {year_part}")
+                start_year = '20' + year_part if int(year_part) < 50 else '19' + year_part
+                end_year = start_year
+            
+            # Handle special cases in make/model, two-word makes must stay one token
+            if 'MBZ' in make_model_part:
+                make_model_part = make_model_part.replace('MBZ', 'Mercedes-Benz')
+            elif 'Mercedes~Benz' in make_model_part:
+                make_model_part = make_model_part.replace('Mercedes~Benz', 'Mercedes-Benz')
+                
+            # Split make and model, multi-word makes (Land Rover) stay whole
+            if ' ' not in make_model_part:
+                raise ValueError(f"Invalid make/model format: {make_model_part}")
+                
+            make, model = self.names.split_make(make_model_part)
+            
+            # Handle special model cases (e.g., F~150, F~250)
+            if '~' in model:
+                # Don't split the ~ in model numbers
+                model = model.replace('~', '')
+
+            # Aliases and other spellings become the catalog's own names (Chevy -> Chevrolet)
+            make, model = self.names.resolve(make, model)
+            
+            self.logger.info(f"Parsed car description: {make} {model} ({start_year}-{end_year})")
+            return make, model, start_year, end_year
+            
+        except Exception as e:
+            self.logger.error(f"Error parsing car description '{description}': {str(e)}")
+            return None, None, None, None
+
+    def click(self, driver, element):
+        """Click an element, falling back to a JavaScript click if something overlays it"""
+        try:
+            element.click()
+        except Exception as click_error:
+            self.logger.info(f"Regular click failed, trying JavaScript click: {str(click_error)}")
+            driver.execute_script("arguments[0].click();", element)
+
+    def open_listing(self, driver, make, model, year, engine):
+        """
+        Bring the driver to the Wheel Bearing & Hub listing for one engine.
+        Returns False if the listing was not reached.
+        """
+        return self.run_steps(driver, self.open_listing_steps(driver, make, model, year, engine))
+
+    def open_listing_steps(self, driver, make, model, year, engine):
+        """
+        Steps of open_listing(). Jumps straight to the URL recorded on an earlier visit;
+        otherwise clicks through the catalog and records the URL it ends on.
+        """
+        cached_url = self.cache_get("listing_url", make, model, year, engine)
+        if cached_url is not MISS:
+            yield Load(cached_url)
+            if (yield Wait(EC.presence_of_element_located(FILTER_INPUT), "filter_input", required=False)):
+                self.logger.info(f"Opened cached listing for {engine}")
+                return True
+            self.logger.info(f"Cached listing URL did not load for {engine}, navigating from the catalog")
+
+        if not (yield from self.navigate_steps(driver, make, model, year, engine)):
+            return False
+        self.cache_set("listing_url", (make, model, year, engine), driver.current_url, ttl=LISTING_URL_TTL)
+        return True
+
+    def navigate_to_listing(self, driver, make, model, year, engine):
+        """Click from the catalog search box through to the Wheel Bearing & Hub listing"""
+        return self.run_steps(driver, self.navigate_steps(driver, make, model, year, engine))
+
+    def navigate_steps(self, driver, make, model, year, engine):
+        """Steps of navigate_to_listing()"""
+        yield Load(f"{self.base_url}/en/catalog/")
+        input_element = yield Wait(EC.presence_of_element_located(SEARCH_INPUT), "page")
+        input_element.send_keys(engine)
+        # Let the suggestions for the typed engine settle before submitting
+        yield Wait(rows_stable(AUTOCOMPLETE_ROWS), "engine_autocomplete", required=False)
+        input_element.send_keys(Keys.ENTER)
+        input_element.send_keys(Keys.ENTER)
+
+        try:
+            # Find Brake & Wheel Hub, its absence means the engine needs disambiguation
+            car_part = yield Wait(EC.element_to_be_clickable(BRAKE_HUB_LINK), "catalog_category")
+            self.click(driver, car_part)
+        except TimeoutException:
+            self.logger.info("Disambiguation found")
+            with self.tracer.span("disambiguation", engine=engine):
+                # Extract engine substring by removing every make, model and year word
+                engine_text = engine_substring(make, model, year, engine)
+                self.logger.info(f"Engine substring: {engine_text}")
+                try:
+                    engine_disambiguation = yield Wait(
+                        EC.element_to_be_clickable((By.XPATH, f"//a[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{engine_text}')]")),
+                        "disambiguation")
+                    # Scroll element into view
+                    driver.execute_script("arguments[0].scrollIntoView(true);", engine_disambiguation)
+                    self.click(driver, engine_disambiguation)
+
+                    car_part = yield Wait(EC.element_to_be_clickable(BRAKE_HUB_LINK), "disambiguated_category")
+                    # Scroll and click with same pattern
+                    driver.execute_script("arguments[0].scrollIntoView(true);", car_part)
+                    self.click(driver, car_part)
+                except TimeoutException:
+                    self.logger.info(f"Could not find disambiguation for engine: {engine}")
+                    return False
+
+        try:
+            part_type = yield Wait(EC.element_to_be_clickable(WHEEL_BEARING_LINK), "part_type")
+            # Scroll and click with same pattern
+            driver.execute_script("arguments[0].scrollIntoView(true);", part_type)
+            self.click(driver, part_type)
+        except TimeoutException:
+            self.logger.info(f"Could not access Wheel Bearing & Hub")
+            return False
+        return True
+
+    def get_listing_rows(self, make, model, year, engine, driver=None):
+        """
+        Every row of the Wheel Bearing & Hub listing for one engine, read in a single visit.
+        Each row is a dict with manufacturer, part_number, drive_info and the full row text.
+        Rows are kept in memory for the current search and in the lookup cache, so
+        find_fitment and find_position_fitment share one traversal. Returns None if the
+        listing could not be reached.
+        """
+        rows = self.recall_listing(make, model, year, engine)
+        if rows is not MISS:
+            return rows
+
+        with self.tracer.span("listing", engine=engine):
+            if self.http_backend:
+                rows = self.http_backend.listing_rows(make, model, year, engine)
+            else:
+                rows = self.read_listing_rows(driver or self.driver, make, model, year, engine)
+        self.remember_listing(make, model, year, engine, rows)
+        return rows
+
+    def recall_listing(self, make, model, year, engine):
+        """Listing rows from the search memo or the lookup cache, MISS if neither has them"""
+        key = normalize_key(*vehicle_key(make, model), year, engine)
+        with self.listing_lock:
+            if key in self.listing_memo:
+                return self.listing_memo[key]
+        rows = self.cache_get("listing_rows", make, model, year, engine)
+        if rows is not MISS:
+            with self.listing_lock:
+                self.listing_memo[key] = rows
+        return rows
+
+    def remember_listing(self, make, model, year, engine, rows):
+        if rows is not None:
+            self.cache_set("listing_rows", (make, model, year, engine), rows, negative=not rows)
+        with self.listing_lock:
+            self.listing_memo[normalize_key(*vehicle_key(make, model), year, engine)] = rows
+
+    def listings_as_completed(self, make, model, year, engines, driver=None):
+        """
+        (engine, rows) for every engine, as each listing becomes available.
+        Remembered listings come first. In the browser the rest are opened in
+        parallel tabs of the one session, max_tabs at a time; closing the
+        generator early closes the tabs still loading.
+        """
+        driver = driver or self.driver
+        remaining = []
+        for engine in engines:
+            rows = self.recall_listing(make, model, year, engine)
+            if rows is MISS:
+                remaining.append(engine)
+            else:
+                yield engine, rows
+
+        if self.http_backend or self.max_tabs <= 1 or len(remaining) <= 1:
+            for engine in remaining:
+                self.check_cancelled()
+                yield engine, self.get_listing_rows(make, model, year, engine, driver)
+            return
+
+        self.logger.info(f"Opening {len(remaining)} engine listings in tabs")
+        fanout = TabFanout(driver, self.waiter, max_tabs=self.max_tabs, check=self.check_cancelled,
+                           limiter=self.limiter)
+        jobs = [(engine, lambda engine=engine: self.listing_steps(driver, make, model, year, engine))
+                for engine in remaining]
+        for engine, rows in fanout.run(jobs):
+            self.remember_listing(make, model, year, engine, rows)
+            yield engine, rows
+
+    def read_listing_rows(self, driver, make, model, year, engine):
+        """Open the listing in the browser and extract all of its rows without filtering"""
+        return self.run_steps(driver, self.listing_steps(driver, make, model, year, engine))
+
+    def listing_steps(self, driver, make, model, year, engine):
+        """Steps of read_listing_rows()"""
+        if not (yield from self.open_listing_steps(driver, make, model, year, engine)):
+            return None
+        return (yield from self.listing_rows_steps(driver, engine))
+
+    def engine_listing_rows(self, driver, path, engine):
+        """Listing rows of an engine read from its catalog page at path, without the search box"""
+        self.check_cancelled()
+        if self.http_backend:
+            return self.http_backend.engine_listing(path)
+        return self.run_steps(driver, self.engine_listing_steps(driver, path, engine))
+
+    def engine_listing_steps(self, driver, path, engine):
+        """Steps of engine_listing_rows() in the browser"""
+        yield Load(f"{self.base_url}{path}")
+        for locator, stage in ((BRAKE_HUB_LINK, "catalog_category"), (WHEEL_BEARING_LINK, "part_type")):
+            link = yield Wait(EC.element_to_be_clickable(locator), stage, required=False)
+            if not link:
+                self.logger.info(f"No {stage} link on the catalog page of {engine}")
+                return None
+            self.click(driver, link)
+        return (yield from self.listing_rows_steps(driver, engine))
+
+    def listing_rows_steps(self, driver, engine):
+        """Steps reading every row of the listing the driver is on"""
+        if not (yield Wait(EC.presence_of_all_elements_located(LISTING_ROWS), "listings", required=False)):
+            self.logger.info(f"No listings found for engine: {engine}")
+            return []
+
+        # One script call for the whole table; header and spacer rows are dropped
+        with self.tracer.span("row_extraction"):
+            rows = [{"manufacturer": row["manufacturer"], "part_number": row["part_number"],
+                     "drive_info": row["drive_info"], "text": row["text"]}
+                    for row in snapshot_listings(driver, LISTING_ROWS_XPATH)]
+        self.logger.info(f"Read {len(rows)} listing rows for engine: {engine}")
+        return rows
+
+    def find_position_fitment(self, make, model, year, position, driver=None):
+        """
+        Find fitment information for a specific position (front/rear).
+        Returns the part number if found, None otherwise.
+        """
+        driver = driver or self.driver
+        try:
+            # Construct search string
+            search_string = f"{make} {model} {year}"
+            self.logger.info(f"Searching position fitment for: {search_string} ({position})")
+            
+            # Split compound filters (e.g., "front-awd" -> ["front", "awd"])
+            filters = position.lower().replace('-', ' ').split()
+            self.logger.info(f"Applying filters: {filters}")
+            
+            cached = self.cache_get("position_fitment", make, model, year, position)
+            if cached is not MISS:
+                self.logger.info(f"Cached {position} fitment for {search_string}: {cached}")
+                return tuple(cached)
+
+            # Engines that held a fitment for this make/model before are read first
+            engines = self.engine_ranking.order(make, model, year, self.fetch_engines(make, model, year, driver))
+            self.logger.info(f"Found {len(engines)} engine types")
+            
+            matches = {}
+            listings = self.listings_as_completed(make, model, year, engines, driver)
+            try:
+                for engine, rows in listings:
+                    self.logger.info(f"Checking engine: {engine}")
+                    matches[engine] = self.match_position_rows(rows, filters)
+                    # The first engine in ranked order with a hit wins, as if they were walked one by one
+                    for candidate in engines:
+                        if candidate not in matches:
+                            break
+                        match = matches[candidate]
+                        if match:
+                            self.logger.info(f"Found part number {match[0]} from {match[1]} "
+                                             f"after {len(matches)} of {len(engines)} engines")
+                            self.engine_ranking.record(make, model, year, matches, winner=candidate)
+                            self.cache_set("position_fitment", (make, model, year, position), list(match))
+                            return match
+            finally:
+                # Stops the listings still loading
+                listings.close()
+
+            self.engine_ranking.record(make, model, year, matches)
+            self.cache_set("position_fitment", (make, model, year, position), [None, None], negative=True)
+            return None, None
+            
+        except Exception as e:
+            self.logger.error(f"Error in find_position_fitment: {str(e)}")
+            self.lookup_failed(driver, e)
+            return None, None
+
+    def match_position_rows(self, rows, filters):
+        """
+        Apply the position filters to listing rows and return (part_number, manufacturer)
+        for the most preferred manufacturer, or None.
+        """
+        if not rows:
+            return None
+        with self.tracer.span("filter"):
+            filtered = [row for row in rows if all(term in row["text"].lower() for term in filters)]
+            for manufacturer in self.preferred_manufacturers:
+                for row in filtered:
+                    if manufacturer in row["text"].lower():
+                        return row["part_number"], row["manufacturer"]
+        return None
+
+    def perform_position_car_search(self, position, car_description):
+        """Perform the position and car based search"""
+        cars = car_description.split(",")
+        found_any_previous = False
+
+        vehicles = []
+        for car in cars:
+            make, model, start_year, end_year = self.parse_car_description(car)
+            if not make:  # Skip if parsing failed
+                continue
+            vehicles.append((make, model, start_year))
+
+        if self.find_generations:
+            # The typed range may start mid-generation, the previous generation ends before its first year
+            spans = self.map_lookups(lambda driver, vehicle: self.generation_span(*vehicle, driver=driver), vehicles)
+            for index, ((make, model, start_year), span) in enumerate(zip(vehicles, spans)):
+                if span and span[0] < int(start_year):
+                    self.report(f"{make} {model} {start_year} belongs to the {span[0]}-{span[1]} generation\n")
+                    vehicles[index] = (make, model, str(span[0]))
+
+        for make, model, start_year in vehicles:
+            self.report(f"Checking previous year model: {make} {model} {int(start_year)-1}\n")
+
+        # Check for previous year models in parallel
+        has_previous = self.map_lookups(
+            lambda driver, vehicle: self.check_previous_year_model(*vehicle, driver=driver), vehicles)
+        candidates = [vehicle for vehicle, found in zip(vehicles, has_previous) if found]
+
+        # Search for fitment in every previous year model at once, results stay in input order
+        fitments = self.map_lookups(
+            lambda driver, vehicle: self.find_position_fitment(vehicle[0], vehicle[1], int(vehicle[2]) - 1, position, driver=driver),
+            candidates)
+        fitment_by_vehicle = dict(zip(candidates, fitments))
+
+        for make, model, start_year in vehicles:
+            if (make, model, start_year) in fitment_by_vehicle:
+                found_any_previous = True
+                prev_year = int(start_year) - 1
+                
+                result_text = f"\nFound previous year model:\n"
+                result_text += f"Make: {make}\n"
+                result_text += f"Model: {model}\n"
+                result_text += f"Year: {prev_year}\n"
+                
+                part_number, manufacturer = fitment_by_vehicle[(make, model, start_year)]
+                
+                if part_number:
+                    # Copy part number to clipboard
+                    self.copy_to_clipboard(part_number)
+                    result_text += f"\nFound {position} fitment:\n"
+                    result_text += f"Part Number: {part_number} (copied to clipboard)\n"
+                    result_text += f"Manufacturer: {manufacturer}\n"
+                    result_text += "-" * 40 + "\n"
+                    self.report(result_text)
+                    # Stop processing if fitment is found
+                    return
+                else:
+                    result_text += f"\nNo {position} fitment found\n"
+                    result_text += "-" * 40 + "\n"
+                    self.report(result_text)
+            else:
+                result_text = f"No results for {int(start_year)-1} {make} {model}\n"
+                self.report(result_text)
+        
+        # If we get here and haven't found any previous models
+        if not found_any_previous:
+            no_prev_message = "no previous generation"
+            self.copy_to_clipboard(no_prev_message)
+            self.report(f"\n{no_prev_message} (copied to clipboard)\n")
+
+    def choose_listing(self, manufacturers):
+        """Return the index of the most preferred manufacturer, falling back to the first listing"""
+        for preferred_brand in self.preferred_manufacturers:
+            for i, manufacturer in enumerate(manufacturers):
+                if preferred_brand in manufacturer.lower():
+                    self.logger.info(f"Matched preferred brand '{manufacturer.lower()}' at index {i}")
+                    return i
+        return 0
+
+    def fetch_buyers_guide(self, part_number):
+        """
+        Open the buyers guide of the preferred listing for a part number.
+        Returns a list of (make, model, years text) rows, or None if it could not be read.
+        """
+        self.check_cancelled()
+        self.load(self.driver, f"{self.base_url}/en/partsearch/?partnum={part_number}")
+        
+        # Wait for page listings
+        try:
+            self.waiter.until(self.driver, EC.presence_of_element_located((By.CLASS_NAME, 'listings-container')), "part_search")
+        except TimeoutException:
+            self.logger.error("No listings found within timeout period")
+            return None
+
+        # Read every listing in one call and rank manufacturers in Python
+        listings = snapshot_listings(self.driver, PART_SEARCH_LISTINGS_XPATH)
+        if not listings:
+            self.logger.info("No results found.")
+            return None
+
+        # Choose listing by brand or fallback to first
+        chosen = listings[self.choose_listing([listing["manufacturer"] for listing in listings])]
+        self.logger.info(f"Category: {chosen['drive_info'][10:]}")
+
+        # Click part number to open popup
+        try:
+            chosen_item = self.driver.find_elements(By.XPATH, PART_SEARCH_LISTINGS_XPATH)[chosen["index"]]
+            part_link = chosen_item.find_element(By.XPATH, './/*[contains(@id, "vew_partnumber")]')
+            part_link.click()
+            self.waiter.until(
+                self.driver,
+                EC.presence_of_element_located((By.XPATH, '//*[@id="buyersguidepopup-outer_b"]/div/div/table')),
+                "buyers_guide")
+            # Whole buyers guide table in a single round trip
+            rows = [tuple(cells[:3]) for cells in snapshot_table(self.driver, BUYERS_GUIDE_ROWS_XPATH) if len(cells) >= 3]
+        except Exception as e:
+            self.logger.error(f"Error opening part details - {str(e)}")
+            self.lookup_failed(self.driver, e)
+            return None
+
+        #close dialog box
+        self.waiter.until(self.driver, EC.element_to_be_clickable((By.CLASS_NAME, 'dialog-close')), "page").click()
+        return rows
+
+    def fetch_buyers_guide_http(self, part_number):
+        """Same as fetch_buyers_guide, read through the HTTP backend"""
+        self.check_cancelled()
+        listings = self.http_backend.part_search(part_number)
+        if not listings:
+            self.logger.info("No results found.")
+            return None
+        chosen = listings[self.choose_listing([listing["manufacturer"] for listing in listings])]
+        self.logger.info(f"Category: {chosen['drive_info'][10:]}")
+        try:
+            return self.http_backend.buyers_guide(chosen)
+        except Exception as e:
+            self.logger.error(f"Error opening part details - {str(e)}")
+            self.lookup_failed(None, e)
+            return None
+
+    def perform_part_number_search(self, part_number):
+        """Perform the original part number based search"""
+            
+        try:
+            self.logger.info(f"Searching for part number: {part_number}")
+            with self.tracer.span("buyers_guide", part_number=part_number):
+                if self.http_backend:
+                    model_car_lst = self.fetch_buyers_guide_http(part_number)
+                else:
+                    model_car_lst = self.fetch_buyers_guide(part_number)
+            if model_car_lst is None:
+                self.display_results([])
+                return
+            
+            results = []
+            for car_make, car_model, car_year in model_car_lst:
+                if "-" in car_year:
+                    years = car_year.split("-")
+                    start_year, end_year = years[0].strip(), years[1].strip()
+                else:
+                    start_year = end_year = car_year.strip()
+                # The buyers guide uses the catalog's spelling, later typed searches resolve to it
+                self.names.learn(car_make, [car_model])
+                try:
+                    results.append(Vehicle(car_make, car_model, int(start_year), int(end_year)))
+                except ValueError:
+                    self.logger.info(f"Skipping buyers guide row with unreadable years: {car_make} {car_model} {car_year}")
+            
+            # Display results in the text widget
+            self.display_results(results)
+
+            # Only the first year of each continuous run can have a distinct previous generation
+            planned = merge_ranges(results)
+            self.logger.info(f"Planned {len(planned)} vehicle ranges from {len(results)} buyers guide rows")
+
+            # Search for previous version of each model
+            self.report("\nChecking previous year models...\n")
+
+            found_any_previous = False  # Track if we found any previous models
+
+            # The year before each range's first year is checked for a previous generation
+            first_years = [vehicle.start_year for vehicle in planned]
+            if self.find_generations:
+                # A range may start mid-generation, the previous generation ends before the generation's first year
+                spans = self.map_lookups(
+                    lambda driver, vehicle: self.generation_span(vehicle.make, vehicle.model, vehicle.start_year, driver=driver),
+                    planned)
+                for index, (vehicle, span) in enumerate(zip(planned, spans)):
+                    if span and span[0] < vehicle.start_year:
+                        self.report(f"{vehicle.make} {vehicle.model} {vehicle.start_year} belongs to the {span[0]}-{span[1]} generation\n")
+                        first_years[index] = span[0]
+
+            # Run the previous year checks across the driver pool
+            has_previous = self.map_lookups(
+                lambda driver, item: self.check_previous_year_model(item[0].make, item[0].model, item[1], driver=driver),
+                list(zip(planned, first_years)))
+            
+            models_with_previous = []
+            for vehicle, first_year, found in zip(planned, first_years, has_previous):
+                if found:
+                    found_any_previous = True
+                    result_text = f"\nFound previous year model:\n"
+                    result_text += f"Make: {vehicle.make}\n"
+                    result_text += f"Model: {vehicle.model}\n"
+                    result_text += f"Year: {first_year - 1}\n"
+                    result_text += "-" * 40 + "\n"
+                    # The fitment is read from a year the part fits, inside the buyers guide range
+                    models_with_previous.append((vehicle.make, vehicle.model, representative_year(vehicle)))
+                    self.report(result_text)
+                else:
+                    result_text = f"No results for {first_year - 1} {vehicle.make} {vehicle.model}\n"
+                    self.report(result_text)
+
+            
+            if not found_any_previous:
+                no_prev_message = "no previous generation"
+                self.copy_to_clipboard(no_prev_message)
+                self.report(f"\n{no_prev_message} (copied to clipboard)\n")
+            else:
+                try:
+                    fitments = self.map_lookups(
+                        lambda driver, vehicle: self.find_fitment(*vehicle, driver=driver), models_with_previous)
+                    for (make, model, year), fitment_info in zip(models_with_previous, fitments):
+                        self.logger.info(f"Fitment lookup finished for {make} {model} {year}")
+                        if fitment_info is None:
+                            self.report("\nError occurred while checking fitment\n")
+                            fitment_info = {}
+                        
+                        # Process and display the fitment info
+                        formatted_result = self.process_fitment_info(fitment_info, make, model, year)
+                        self.report(formatted_result)
+
+                    # Display final results after all searches are complete
+                    self.report("\nFinal Results:\n")
+                    self.report("-" * 40 + "\n")
+                    
+                    final_results = self.state.join()
+                    for entry in final_results:
+                        self.logger.info(f"Matched {entry.prev_year} {entry.make} {entry.model} with {entry.current_year} fitment")
+                        self.report(f"{entry.prev_year} {entry.make} {entry.model}\n")
+                        self.report(f"Current fitment ({entry.current_year}): {entry.position}, {entry.drive_type}\n")
+                        self.report("-" * 40 + "\n")
+
+                    position_fitments = self.map_lookups(
+                        lambda driver, entry: self.find_position_fitment(
+                            entry.make, entry.model, entry.prev_year, entry.position, driver=driver),
+                        final_results)
+
+                    for entry, (part_number, manufacturer) in zip(final_results, position_fitments):
+                        if part_number:
+                            # Copy part number to clipboard
+                            self.copy_to_clipboard(part_number)
+                            result_text = f"\nFound {entry.position} fitment:\n"
+                            result_text += f"Part Number: {part_number} (copied to clipboard)\n"
+                            result_text += f"Manufacturer: {manufacturer}\n"
+                            result_text += "-" * 40 + "\n"
+                            self.report(result_text)
+                            # Stop processing if fitment is found
+                            break
+                        else:
+                            self.logger.info(f"No fitment found for {entry.make} {entry.model} {entry.prev_year} {entry.position}")
+                            self.report(f"No fitment found for {entry.make} {entry.model} {entry.prev_year} {entry.position}\n")
+                            self.report("-" * 40 + "\n")
+
+                except Exception as e:
+                    self.logger.error(f"Search failed: {str(e)}")
+                    self.lookup_failed(None, e)
+                    self.display_results([])
+
+        except Exception as e:
+            self.logger.error(f"Search failed: {str(e)}")
+            self.lookup_failed(self.driver, e)
+            self.display_results([])
+
+    def find_fitment(self, make, model, year, driver=None):
+        """Fitment of one vehicle, shared with an identical lookup already in flight"""
+        key = normalize_key("fitment", *vehicle_key(make, model), year, self.state.search_text)
+        try:
+            return self.shared_lookup(key, driver or self.driver,
+                                      lambda: self.lookup_fitment(make, model, year, driver))
+        except Exception as e:
+            # Runs on pool workers too, so leave reporting to the caller; every
+            # search sharing the failed lookup records the failure, shared_lookup()
+            # already replaced the session if it was lost on this driver
+            self.logger.error(f"Error in find_fitment: {str(e)}")
+            self.lookup_failed(None, e)
+            return None
+
+    def lookup_fitment(self, make, model, year, driver=None):
+        """find_fitment() without the sharing; errors are left to the caller"""
+        fitment_info = {} # fitment info is a dict with key: engine, value: drive info
+        driver = driver or self.driver
+        # Construct search string
+        search_string = f"{make} {model} {year}"
+        self.logger.info(f"Searching fitment for: {search_string}...")
+
+        # Fitment rows are filtered by the searched part number, so it is part of the key
+        cached = self.cache_get("fitment", make, model, year, self.state.search_text)
+        if cached is not MISS:
+            self.logger.info(f"Cached fitment for {search_string}")
+            return cached
+
+        engines = self.fetch_engines(make, model, year, driver)
+        self.logger.info(f"Found {len(engines)} engines")
+        self.logger.debug(f"Engines: {engines}")
+
+        listings = dict(self.listings_as_completed(make, model, year, engines, driver))
+        for engine in engines:
+            self.logger.info(f"Searching for {engine}")
+            rows = listings.get(engine) or []
+            with self.tracer.span("filter"):
+                for row in rows:
+                    # Same text match the listing filter box applies for the searched part number
+                    row_text = row["text"].lower()
+                    if self.state.search_text.lower() in row_text and any(brand in row_text for brand in self.preferred_manufacturers):
+                        self.logger.info(f"Manufacturer: {row['manufacturer']}")
+                        self.logger.info(f"Drive info: {row['drive_info']}")
+                        fitment_info[engine] = row["drive_info"]
+
+        self.cache_set("fitment", (make, model, year, self.state.search_text), fitment_info, negative=not fitment_info)
+        return fitment_info
+
+    def process_fitment_info(self, fitment_info, make, model, year):
+        """Process the fitment information and return a formatted string for display."""
+        if not fitment_info:
+            return f"No fitment information found for {year} {make} {model}\n"
+            
+        # Get the first drive info text (they should all be the same for a given model)
+        drive_info = next(iter(fitment_info.values())).lower()
+        
+        # Determine position (front/rear)
+        position = "front" if "front" in drive_info else "rear" if "rear" in drive_info else ""
+        
+        # Determine drive type
+        drive_type = ""
+        if "4wd" in drive_info or "4x4" in drive_info or "awd" in drive_info:
+            drive_type = "4wd"
+        elif "fwd" in drive_info or "front wheel drive" in drive_info:
+            drive_type = "fwd"
+        elif "rwd" in drive_info or "rear wheel drive" in drive_info:
+            drive_type = "rwd"
+            
+        # Index the fitment by make/model - store even if we only have partial info
+        self.state.add_fitment(Fitment(make, model, int(year), position, drive_type))
+        self.logger.info(f"Added fitment info for {make} {model} {year}: {position}, {drive_type}")
+            
+        # Build the output string for display
+        result = f"Fitment for {year} {make} {model}:\n"
+        
+        # Group engines by their fitment info for display
+        fitment_groups = {}
+        for engine, info in fitment_info.items():
+            if info in fitment_groups:
+                fitment_groups[info].append(engine)
+            else:
+                fitment_groups[info] = [engine]
+        
+        # Display the grouped fitment info
+        if len(fitment_groups) == 1:
+            drive_info = list(fitment_groups.keys())[0]
+            result += f"{drive_info}\n"
+        else:
+            for drive_info, engines in fitment_groups.items():
+                if len(engines) > 1:
+                    result += f"Engines ({', '.join(engines)}):\n"
+                else:
+                    result += f"Engine {engines[0]}:\n"
+                result += f"  {drive_info}\n"
+                
+        return result
+
+    def lean_report(self):
+        """Requests and bytes the lean profile avoided so far, across every session"""
+        if self.lean:
+            sessions = [self.driver] if self.driver else []
+            if self.driver_pool:
+                sessions += self.driver_pool.drivers()
+            for driver in sessions:
+                self.lean_stats.collect(driver)
+        return self.lean_stats.report()
+
+    def close(self):
+        """Release the browser sessions, cache and HTTP connections"""
+        if self.lean and not self.http_backend:
+            report = self.lean_report()
+            self.logger.info(f"Lean profile avoided {report['requests_blocked']} requests, "
+                             f"about {report['estimated_bytes_avoided'] // 1024} KB")
+        if self.driver:
+            self.logger.info("Closing WebDriver")
+            quit_driver(self.driver)
+            self.driver = None
+        if self.driver_pool:
+            self.logger.info("Closing WebDriver pool")
+            self.driver_pool.close()
+            self.driver_pool = None
+        if self.cache:
+            self.cache.close()
+            self.cache = None
+        if self.http_backend:
+            self.http_backend.close()
+            self.http_backend = None
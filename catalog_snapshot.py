@@ -0,0 +1,284 @@
+"""
+Local snapshot of the Wheel Bearing & Hub listings, filled by snapshot_crawler.py,
+and a backend that answers searches from it (backend="snapshot").
+
+Listings are stored per make/model/year/engine with indexes on part number
+and vehicle, so every lookup the search flows make is a single indexed query.
+Makes and models are stored by their vehicle_key(), so "Chevy F150" finds what
+was crawled as "Chevrolet F-150".
+"""
+import logging
+import sqlite3
+import threading
+import time
+
+from lookup_cache import DEFAULT_CACHE_PATH
+from records import vehicle_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = DEFAULT_CACHE_PATH.replace("lookup_cache.sqlite3", "catalog_snapshot.sqlite3")
+# Crawl pages that failed this many times are left alone until the next refresh
+MAX_ATTEMPTS = 3
+# Bumped when the stored keys change, older snapshots are rekeyed when opened
+SCHEMA_VERSION = 1
+
+
+def normalize(value):
+    return " ".join(str(value).lower().split())
+
+
+def make_model_key(make_key, model_key):
+    return f"{make_key}|{model_key}"
+
+
+def drive_position(drive_info):
+    """front/rear as process_fitment_info reads it from a listing text row"""
+    text = drive_info.lower()
+    return "front" if "front" in text else "rear" if "rear" in text else ""
+
+
+class CatalogSnapshot:
+    """SQLite store for the crawl queue and the listings it collected."""
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS crawl_nodes (
+                path TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                make TEXT, year INTEGER, model TEXT, engine TEXT,
+                label TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                crawled_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS crawl_nodes_pending ON crawl_nodes (status, kind);
+
+            CREATE TABLE IF NOT EXISTS vehicles (
+                make TEXT NOT NULL, model TEXT NOT NULL, year INTEGER NOT NULL, engine TEXT NOT NULL,
+                make_model TEXT NOT NULL,
+                display_make TEXT NOT NULL, display_model TEXT NOT NULL,
+                crawled_at REAL NOT NULL,
+                PRIMARY KEY (make, model, year, engine)
+            );
+            CREATE INDEX IF NOT EXISTS vehicles_make_model ON vehicles (make_model, year);
+
+            CREATE TABLE IF NOT EXISTS parts (
+                make TEXT NOT NULL, model TEXT NOT NULL, year INTEGER NOT NULL, engine TEXT NOT NULL,
+                manufacturer TEXT NOT NULL,
+                part_number TEXT NOT NULL,
+                position TEXT NOT NULL,
+                drive_info TEXT NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS parts_part_number ON parts (part_number);
+            CREATE INDEX IF NOT EXISTS parts_vehicle ON parts (make, model, year, engine);
+        """)
+        self._conn.commit()
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._rekey()
+
+    def _rekey(self):
+        """Move listings stored under normalize()d names to vehicle_key() keys"""
+        self._conn.create_function("make_key", 1, lambda make: vehicle_key(make, "")[0])
+        self._conn.create_function("model_key", 1, lambda model: vehicle_key("", model)[1])
+        self._conn.executescript(f"""
+            UPDATE OR REPLACE vehicles SET make = make_key(make), model = model_key(model);
+            UPDATE vehicles SET make_model = make || '|' || model;
+            UPDATE parts SET make = make_key(make), model = model_key(model);
+            PRAGMA user_version = {SCHEMA_VERSION};
+        """)
+        self._conn.commit()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # Crawl queue
+
+    def add_nodes(self, nodes):
+        """Queue catalog pages not seen before; known pages keep their status"""
+        with self._lock:
+            self._conn.executemany("""
+                INSERT OR IGNORE INTO crawl_nodes (path, kind, make, year, model, engine, label)
+                VALUES (:path, :kind, :make, :year, :model, :engine, :label)
+            """, nodes)
+            self._conn.commit()
+
+    def pending_nodes(self, limit):
+        """Pending pages, shallowest first so the tree is discovered before it is drained"""
+        rows = self._query("""
+            SELECT path, kind, make, year, model, engine, label FROM crawl_nodes
+            WHERE status = 'pending'
+            ORDER BY CASE kind WHEN 'root' THEN 0 WHEN 'make' THEN 1 WHEN 'year' THEN 2
+                               WHEN 'model' THEN 3 ELSE 4 END, path
+            LIMIT ?
+        """, (limit,))
+        keys = ["path", "kind", "make", "year", "model", "engine", "label"]
+        return [dict(zip(keys, row)) for row in rows]
+
+    def finish_node(self, path, failed=False):
+        with self._lock:
+            if failed:
+                self._conn.execute("""
+                    UPDATE crawl_nodes SET attempts = attempts + 1,
+                        status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END
+                    WHERE path = ?
+                """, (MAX_ATTEMPTS, path))
+            else:
+                self._conn.execute("UPDATE crawl_nodes SET status = 'done', attempts = 0, crawled_at = ? WHERE path = ?",
+                                   (time.time(), path))
+            self._conn.commit()
+
+    def mark_stale(self, max_age):
+        """Queue every page crawled more than max_age seconds ago (and failed ones) again"""
+        with self._lock:
+            cursor = self._conn.execute("""
+                UPDATE crawl_nodes SET status = 'pending', attempts = 0
+                WHERE status = 'failed' OR (status = 'done' AND crawled_at < ?)
+            """, (time.time() - max_age,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    # Listings
+
+    def store_listing(self, node, display_make, display_model, rows):
+        """Replace the listing rows of one vehicle engine"""
+        make, model = vehicle_key(node["make"], node["model"])
+        year, engine = node["year"], node["engine"]
+        with self._lock:
+            self._conn.execute("DELETE FROM parts WHERE make = ? AND model = ? AND year = ? AND engine = ?",
+                               (make, model, year, engine))
+            self._conn.executemany("""
+                INSERT INTO parts (make, model, year, engine, manufacturer, part_number, position, drive_info, text)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(make, model, year, engine, row["manufacturer"], row["part_number"],
+                   drive_position(row["drive_info"]), row["drive_info"], row["text"]) for row in rows])
+            self._conn.execute("""
+                INSERT OR REPLACE INTO vehicles
+                    (make, model, year, engine, make_model, display_make, display_model, crawled_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (make, model, year, engine, make_model_key(make, model), display_make, display_model, time.time()))
+            self._conn.commit()
+
+    def match_make_model(self, query):
+        """(make key, model key, rest of query) for the longest make/model the query starts with"""
+        words = normalize(query).split()
+        # Try the longest word prefix first, split at every word into make and model;
+        # each one is an indexed equality lookup
+        for length in range(len(words), 1, -1):
+            for make_length in range(1, length):
+                key = vehicle_key(" ".join(words[:make_length]), " ".join(words[make_length:length]))
+                rows = self._query("SELECT make, model FROM vehicles WHERE make_model = ? LIMIT 1",
+                                   (make_model_key(*key),))
+                if rows:
+                    make, model = rows[0]
+                    return make, model, " ".join(words[length:])
+        return None
+
+    def display_name(self, make, model):
+        rows = self._query("SELECT display_make, display_model FROM vehicles WHERE make = ? AND model = ? LIMIT 1",
+                           (make, model))
+        return rows[0] if rows else (make.title(), model.title())
+
+    def years(self, make, model):
+        return [row[0] for row in self._query(
+            "SELECT DISTINCT year FROM vehicles WHERE make_model = ? ORDER BY year", (make_model_key(make, model),))]
+
+    def engines(self, make, model, year):
+        return [row[0] for row in self._query(
+            "SELECT engine FROM vehicles WHERE make_model = ? AND year = ? ORDER BY engine",
+            (make_model_key(make, model), int(year)))]
+
+    def listing(self, make, model, year, engine):
+        return self._query("""
+            SELECT manufacturer, part_number, drive_info, text FROM parts
+            WHERE make = ? AND model = ? AND year = ? AND engine = ?
+        """, (make, model, int(year), engine))
+
+    def part_manufacturers(self, part_number):
+        return [row[0] for row in self._query(
+            "SELECT DISTINCT manufacturer FROM parts WHERE part_number = ? ORDER BY manufacturer", (part_number,))]
+
+    def part_vehicles(self, part_number, manufacturer):
+        return self._query("""
+            SELECT DISTINCT make, model, year FROM parts
+            WHERE part_number = ? AND manufacturer = ? ORDER BY make, model, year
+        """, (part_number, manufacturer))
+
+    def model_years(self):
+        """{make key: {model key: [years]}} for every vehicle in the snapshot"""
+        makes = {}
+        for make, model, year in self._query("SELECT DISTINCT make, model, year FROM vehicles"):
+            makes.setdefault(make, {}).setdefault(model, []).append(year)
+        return makes
+
+    def stats(self):
+        counts = dict(self._query("SELECT status, COUNT(*) FROM crawl_nodes GROUP BY status"))
+        return {
+            "nodes": counts,
+            "vehicles": self._query("SELECT COUNT(*) FROM vehicles")[0][0],
+            "parts": self._query("SELECT COUNT(*) FROM parts")[0][0],
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SnapshotMiss(Exception):
+    """Raised for pages the snapshot does not hold."""
+
+
+class SnapshotBackend:
+    """
+    Answers the same calls as HttpCatalogBackend from a CatalogSnapshot, so
+    the search flows run unchanged without touching the site.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def autocomplete(self, query):
+        """Years for "make model", engine rows for "make model year", like the search box"""
+        match = self.snapshot.match_make_model(query)
+        if not match:
+            return []
+        make, model, rest = match
+        if rest.isdigit():
+            return self.snapshot.engines(make, model, int(rest))
+        display_make, display_model = self.snapshot.display_name(make, model)
+        return [f"{display_make} {display_model} {year}".upper() for year in self.snapshot.years(make, model)]
+
+    def part_search(self, part_number):
+        return [{"manufacturer": manufacturer, "part_number": part_number,
+                 "drive_info": "Category: Wheel Bearing & Hub", "text": f"{manufacturer} {part_number}",
+                 "info_url": None}
+                for manufacturer in self.snapshot.part_manufacturers(part_number)]
+
+    def buyers_guide(self, listing):
+        """(make, model, years text) rows, consecutive years folded into ranges"""
+        rows = []
+        for make, model, year in self.snapshot.part_vehicles(listing["part_number"], listing["manufacturer"]):
+            display_make, display_model = self.snapshot.display_name(make, model)
+            if rows and rows[-1][:2] == [display_make, display_model] and rows[-1][3] == year - 1:
+                rows[-1][3] = year
+            else:
+                rows.append([display_make, display_model, year, year])
+        return [(make, model, f"{start}-{end}" if end != start else str(start)) for make, model, start, end in rows]
+
+    def listing_rows(self, make, model, year, engine):
+        return [{"manufacturer": manufacturer, "part_number": part_number, "drive_info": drive_info, "text": text}
+                for manufacturer, part_number, drive_info, text
+                in self.snapshot.listing(*vehicle_key(make, model), year, normalize(engine))]
+
+    def get_page(self, path):
+        raise SnapshotMiss(f"{path} is not part of the snapshot")
+
+    def close(self):
+        self.snapshot.close()
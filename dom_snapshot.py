@@ -0,0 +1,76 @@
+"""
+One-shot DOM extractors. Each function pulls a whole table out of the page with a
+single execute_script call and returns plain Python data, instead of issuing one
+WebDriver command per row and cell.
+"""
+
+# Shared prelude: evaluate an XPath and return the matching nodes as an array
+_NODES = """
+    var result = document.evaluate(arguments[0], document, null,
+        XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var nodes = [];
+    for (var i = 0; i < result.snapshotLength; i++) { nodes.push(result.snapshotItem(i)); }
+    function text(node) { return node ? (node.innerText || node.textContent || '').trim() : ''; }
+"""
+
+TEXTS_SCRIPT = _NODES + """
+    return nodes.map(function (node) { return text(node); });
+"""
+
+TABLE_SCRIPT = _NODES + """
+    return nodes.map(function (row) {
+        var cells = [];
+        for (var i = 0; i < row.children.length; i++) {
+            var cell = row.children[i];
+            if (cell.tagName === 'TD' || cell.tagName === 'TH') { cells.push(text(cell)); }
+        }
+        return cells;
+    });
+"""
+
+LISTINGS_SCRIPT = _NODES + """
+    return nodes.map(function (row, index) {
+        var manufacturer = row.querySelector('.listing-final-manufacturer');
+        var partNumber = row.querySelector('.listing-final-partnumber');
+        var driveInfo = row.querySelector('.listing-text-row');
+        return {
+            index: index,
+            has_listing: manufacturer !== null,
+            manufacturer: text(manufacturer),
+            part_number: text(partNumber),
+            drive_info: text(driveInfo),
+            text: text(row)
+        };
+    });
+"""
+
+
+LINKS_SCRIPT = _NODES + """
+    return nodes.map(function (node) { return [text(node), node.getAttribute('href') || '']; });
+"""
+
+
+def snapshot_texts(driver, xpath):
+    """Visible text of every node matching xpath, e.g. autocomplete rows."""
+    return driver.execute_script(TEXTS_SCRIPT, xpath) or []
+
+
+def snapshot_links(driver, xpath):
+    """(text, raw href attribute) of every link matching xpath."""
+    return [tuple(link) for link in driver.execute_script(LINKS_SCRIPT, xpath) or []]
+
+
+def snapshot_table(driver, xpath):
+    """Cell texts of every table row matching xpath, as a list of lists."""
+    return driver.execute_script(TABLE_SCRIPT, xpath) or []
+
+
+def snapshot_listings(driver, xpath):
+    """
+    Manufacturer, part number, listing text row and full text of every listing
+    matching xpath. Rows without a manufacturer (headers, spacers) are dropped;
+    "index" is the row's position among all matches, for clicking it afterwards.
+    """
+    rows = driver.execute_script(LISTINGS_SCRIPT, xpath) or []
+    return [{key: value for key, value in row.items() if key != "has_listing"}
+            for row in rows if row.get("has_listing")]
@@ -0,0 +1,308 @@
+import logging
+import os
+import queue
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import (ElementClickInterceptedException, ElementNotInteractableException,
+                                        JavascriptException, NoSuchElementException,
+                                        StaleElementReferenceException, TimeoutException, WebDriverException)
+from webdriver_manager.chrome import ChromeDriverManager
+
+from lean_profile import apply_lean_options, enable_url_blocking
+
+logger = logging.getLogger(__name__)
+
+# Number of headless Chrome sessions used to fan out catalog lookups
+DEFAULT_POOL_SIZE = 4
+
+# Where the chromedriver path resolved by webdriver-manager is remembered between runs
+DRIVER_PATH_FILE = os.path.join(os.path.expanduser("~"), ".prev_version", "chromedriver_path")
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+_claimed_profiles = set()
+_profile_lock = threading.Lock()
+
+# WebDriver errors about the page rather than the browser; the session stays usable
+PAGE_ERRORS = (TimeoutException, NoSuchElementException, StaleElementReferenceException,
+               ElementClickInterceptedException, ElementNotInteractableException, JavascriptException)
+
+
+def session_lost(error):
+    """Whether an error means the browser session is gone or unusable and must be replaced"""
+    return isinstance(error, WebDriverException) and not isinstance(error, PAGE_ERRORS)
+
+
+def resolve_driver_path(refresh=False):
+    """
+    Path of the chromedriver binary. ChromeDriverManager().install() checks for
+    updates over the network, so it only runs when nothing valid is remembered
+    in this process or in DRIVER_PATH_FILE, or when refresh is set.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if not refresh:
+            if _driver_path and os.path.exists(_driver_path):
+                return _driver_path
+            try:
+                with open(DRIVER_PATH_FILE, encoding="utf-8") as f:
+                    path = f.read().strip()
+                if path and os.path.exists(path):
+                    _driver_path = path
+                    return path
+            except OSError:
+                pass
+
+        path = ChromeDriverManager().install()
+        _driver_path = path
+        try:
+            os.makedirs(os.path.dirname(DRIVER_PATH_FILE), exist_ok=True)
+            with open(DRIVER_PATH_FILE, "w", encoding="utf-8") as f:
+                f.write(path)
+        except OSError as e:
+            logger.info(f"Could not remember chromedriver path: {str(e)}")
+        logger.info(f"Resolved chromedriver at {path}")
+        return path
+
+
+def profile_in_use(path):
+    """
+    Whether a Chrome process holds the profile. SingletonLock links to
+    "<host>-<pid>" of its owner; a lock left by a crashed Chrome is stale, and
+    Chrome takes such a profile over when it starts.
+    """
+    lock = os.path.join(path, "SingletonLock")
+    if not os.path.lexists(lock):
+        return False
+    try:
+        owner = os.readlink(lock)
+    except OSError:
+        # Not a link (another platform's lock), the owner cannot be checked
+        return True
+    host, _, pid = owner.rpartition("-")
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def claim_profile_dir(root):
+    """
+    A user-data directory under root that no other session is using. Chrome
+    locks a profile while it runs, so every session needs its own; the same
+    directories are picked again on the next run so their disk caches stay warm.
+    """
+    with _profile_lock:
+        index = 0
+        while True:
+            path = os.path.abspath(os.path.join(root, f"session-{index}"))
+            if path not in _claimed_profiles and not profile_in_use(path):
+                _claimed_profiles.add(path)
+                os.makedirs(path, exist_ok=True)
+                return path
+            index += 1
+
+
+def release_profile_dir(path):
+    """Let the next session reuse a profile directory (and its warm cache)"""
+    with _profile_lock:
+        _claimed_profiles.discard(path)
+
+
+def quit_driver(driver):
+    """Quit a session and release the profile directory it claimed"""
+    try:
+        driver.quit()
+    finally:
+        profile = getattr(driver, "profile_dir", None)
+        if profile:
+            release_profile_dir(profile)
+
+
+def create_chrome_driver(headless=True, profile_root=None, lean=False):
+    """
+    Create a Chrome WebDriver with the options every session uses. With a
+    profile_root the session keeps its cache and cookies in a persistent
+    user-data directory under it; lean skips images, fonts, ads and trackers.
+    """
+    options = Options()
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+
+    if headless:
+        options.add_argument("--headless")  # Run in headless mode
+
+    profile = claim_profile_dir(profile_root) if profile_root else None
+    if profile:
+        options.add_argument(f"--user-data-dir={profile}")
+
+    if lean:
+        apply_lean_options(options)
+
+    try:
+        try:
+            driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
+        except WebDriverException as e:
+            # A remembered driver can fall behind after a Chrome update, resolve it again once
+            logger.info(f"Chrome did not start with the remembered driver, resolving it again: {str(e)}")
+            driver = webdriver.Chrome(service=Service(resolve_driver_path(refresh=True)), options=options)
+    except Exception:
+        if profile:
+            release_profile_dir(profile)
+        raise
+    # quit_driver() hands the directory back
+    driver.profile_dir = profile
+
+    if lean:
+        enable_url_blocking(driver)
+    return driver
+
+
+class DriverPool:
+    """
+    Bounded pool of Chrome sessions that lookups can be fanned out over.
+    Sessions are created lazily, up to `size`, and reused between calls.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, headless=True, factory=create_chrome_driver):
+        self.size = max(1, int(size))
+        self.headless = headless
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._drivers = []
+        # Borrowed sessions a lookup reported lost, replaced when handed back
+        self._broken = set()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def acquire(self, timeout=None):
+        """Return an idle session, creating one if the pool is not full yet."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+
+        if not create:
+            return self._idle.get(timeout=timeout)
+
+        try:
+            driver = self.factory(headless=self.headless)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._drivers.append(driver)
+        logger.info(f"Driver pool started session {self._created}/{self.size}")
+        return driver
+
+    def release(self, driver, broken=False):
+        """Hand a session back to the pool, discarding it if it is broken."""
+        if not broken:
+            self._idle.put(driver)
+            return
+
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+            self._created -= 1
+        try:
+            quit_driver(driver)
+        except Exception as e:
+            logger.info(f"Error closing broken session: {str(e)}")
+
+    def mark_broken(self, driver):
+        """
+        Have a borrowed session replaced when it is handed back, for lookups that
+        handle their own errors instead of letting them reach session().
+        """
+        with self._lock:
+            if driver in self._drivers:
+                self._broken.add(driver)
+
+    @contextmanager
+    def session(self):
+        """Borrow a session for the duration of a with-block."""
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except WebDriverException as e:
+            broken = session_lost(e)
+            raise
+        finally:
+            with self._lock:
+                broken = broken or driver in self._broken
+                self._broken.discard(driver)
+            if broken:
+                logger.info("Replacing a lost pooled session")
+            self.release(driver, broken=broken)
+
+    def map(self, fn, items):
+        """
+        Call fn(driver, item) for every item, spread across the pool.
+        Results are returned in the same order as items.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        def run(item):
+            with self.session() as driver:
+                return fn(driver, item)
+
+        workers = min(self.size, len(items))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="driver-pool") as executor:
+            return list(executor.map(run, items))
+
+    def drivers(self):
+        """Every session the pool currently owns, idle or in use."""
+        with self._lock:
+            return list(self._drivers)
+
+    def prewarm(self, count=None):
+        """Start up to count sessions (default: the pool size) in parallel and leave them idle."""
+        with self._lock:
+            missing = self.size - self._created
+        count = missing if count is None else min(count, missing)
+        if count <= 0:
+            return 0
+
+        # Hold every session until all are started, so each acquire creates a new one
+        with ThreadPoolExecutor(max_workers=count, thread_name_prefix="driver-prewarm") as executor:
+            drivers = list(executor.map(lambda _: self.acquire(), range(count)))
+        for driver in drivers:
+            self.release(driver)
+        return count
+
+    def close(self):
+        """Quit every session owned by the pool."""
+        with self._lock:
+            drivers = list(self._drivers)
+            self._drivers.clear()
+            self._broken.clear()
+            self._created = 0
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        for driver in drivers:
+            try:
+                quit_driver(driver)
+            except Exception as e:
+                logger.info(f"Error closing pooled session: {str(e)}")
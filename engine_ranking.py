@@ -0,0 +1,118 @@
+"""
+Learned engine order for position fitment lookups.
+
+find_position_fitment reads engine listings until one has a preferred
+manufacturer's part for the position. Which engine variants of a make/model
+carry such parts is much the same from year to year, so every lookup records
+the variants it read and which ones hit, and the next lookup of the make/model
+tries the likeliest variants first and stops sooner.
+"""
+import logging
+import threading
+
+from lookup_cache import MISS
+from records import vehicle_key
+from vehicle_names import compact
+
+logger = logging.getLogger(__name__)
+
+RANKING_NAMESPACE = "engine_hits"
+# Hit counts only grow more useful with age; every lookup re-saves its make/model
+RANKING_TTL = 180 * 24 * 3600
+
+
+def engine_variant(make, model, year, engine):
+    """An autocomplete engine row without its make, model and year: "5.0l v8" """
+    names = {compact(word) for word in f"{make} {model}".split()} | {compact(make), compact(model), str(year)}
+    return " ".join(word for word in engine.lower().split() if compact(word) not in names)
+
+
+class EngineRanking:
+    """
+    Per make/model hit counts of engine variants and of the manufacturers whose
+    parts were picked, kept in memory and in the lookup cache. Thread-safe.
+    The manufacturer counts are reported only; the preferred manufacturer
+    order stays fixed.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._counts = {"lookups": 0, "hits": 0, "engines_visited": 0}
+        # Manufacturer -> parts picked from it by this process's lookups
+        self._manufacturers = {}
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        entry = {"engines": {}, "manufacturers": {}}
+        if self.cache:
+            try:
+                stored = self.cache.get(RANKING_NAMESPACE, *key)
+                if stored is not MISS:
+                    # Rankings stored without manufacturer counts start them at zero
+                    entry = {"engines": stored["engines"], "manufacturers": stored.get("manufacturers", {})}
+            except Exception as e:
+                logger.error(f"Could not read the engine ranking for {' '.join(key)}: {str(e)}")
+        with self._lock:
+            return self._entries.setdefault(key, entry)
+
+    def order(self, make, model, year, engines):
+        """
+        Engines sorted by the smoothed hit rate of their variant, so variants never
+        read rank between known hits and known misses. Ties keep autocomplete order.
+        """
+        entry = self._load(vehicle_key(make, model))
+        with self._lock:
+            counts = dict(entry["engines"])
+
+        def hit_rate(engine):
+            hits, tries = counts.get(engine_variant(make, model, year, engine), (0, 0))
+            return (hits + 1) / (tries + 2)
+
+        return sorted(engines, key=hit_rate, reverse=True)
+
+    def record(self, make, model, year, matches, winner=None):
+        """
+        Learn from one lookup: matches is {engine: (part number, manufacturer) or None}
+        for every listing read, winner the engine whose part was returned.
+        """
+        key = vehicle_key(make, model)
+        entry = self._load(key)
+        with self._lock:
+            for engine, match in matches.items():
+                variant = engine_variant(make, model, year, engine)
+                hits, tries = entry["engines"].get(variant, (0, 0))
+                entry["engines"][variant] = (hits + bool(match), tries + 1)
+            if winner is not None:
+                manufacturer = matches[winner][1]
+                entry["manufacturers"][manufacturer] = entry["manufacturers"].get(manufacturer, 0) + 1
+                self._manufacturers[manufacturer] = self._manufacturers.get(manufacturer, 0) + 1
+                self._counts["hits"] += 1
+                self._counts["engines_visited"] += len(matches)
+            self._counts["lookups"] += 1
+            stored = {"engines": dict(entry["engines"]), "manufacturers": dict(entry["manufacturers"])}
+        if self.cache:
+            try:
+                self.cache.set(RANKING_NAMESPACE, key, stored, ttl=RANKING_TTL)
+            except Exception as e:
+                logger.error(f"Could not store the engine ranking for {' '.join(key)}: {str(e)}")
+
+    def manufacturers(self, make, model):
+        """Parts picked per manufacturer for a make/model, across runs"""
+        entry = self._load(vehicle_key(make, model))
+        with self._lock:
+            return dict(entry["manufacturers"])
+
+    def stats(self):
+        """Lookup counts, the average engines read per successful lookup and parts picked per manufacturer"""
+        with self._lock:
+            counts = dict(self._counts)
+            manufacturers = dict(self._manufacturers)
+        counts["average_visited"] = round(counts["engines_visited"] / counts["hits"], 2) if counts["hits"] else None
+        counts["manufacturers"] = manufacturers
+        return counts
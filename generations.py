@@ -0,0 +1,147 @@
+"""
+Generation boundaries of a make/model, found by bisection.
+
+Two model years belong to the same generation when their fitment fingerprint
+matches: the preferred manufacturers' part numbers and drive info per
+position, over every engine of the year. Generations are contiguous runs of
+years, so the first and last year of the run around a given year are each
+found with O(log n) fingerprint probes instead of a year-by-year scan.
+Discovered spans are kept in memory and in the lookup cache, and any later
+search for a year inside a known span is answered without catalog work.
+"""
+import logging
+import threading
+
+from catalog_snapshot import drive_position
+from lookup_cache import MISS
+from records import vehicle_key
+
+logger = logging.getLogger(__name__)
+
+# Generations rarely run longer than this, it bounds the years probed when the
+# year index does not know the make/model
+MAX_GENERATION_YEARS = 12
+SPAN_NAMESPACE = "generation_spans"
+
+
+def fitment_fingerprint(listings, preferred_manufacturers):
+    """
+    Hashable summary of a year's listings ({engine: rows}): the sorted
+    (position, part number, drive info) of every preferred manufacturer's row.
+    """
+    entries = set()
+    for rows in listings.values():
+        for row in rows or []:
+            text = row["text"].lower()
+            if any(brand in text for brand in preferred_manufacturers):
+                entries.add((drive_position(row["drive_info"]), row["part_number"],
+                             " ".join(row["drive_info"].lower().split())))
+    return tuple(sorted(entries))
+
+
+class GenerationFinder:
+    """Finds and remembers generation spans using a CatalogSearch for the catalog reads."""
+
+    def __init__(self, search):
+        self.search = search
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def known_span(self, make, model, year):
+        """A remembered (start, end) containing year, or None"""
+        key = vehicle_key(make, model)
+        with self._lock:
+            spans = self._spans.get(key)
+        if spans is None:
+            stored = self.search.cache_get(SPAN_NAMESPACE, *key)
+            spans = [tuple(span) for span in stored] if stored is not MISS else []
+            with self._lock:
+                spans = self._spans.setdefault(key, spans)
+        for start, end in spans:
+            if start <= int(year) <= end:
+                return start, end
+        return None
+
+    def remember(self, make, model, span):
+        key = vehicle_key(make, model)
+        with self._lock:
+            spans = self._spans.setdefault(key, [])
+            # A longer span found later replaces the ones it covers
+            spans[:] = [known for known in spans if not (span[0] <= known[0] and known[1] <= span[1])]
+            spans.append(span)
+            stored = sorted(spans)
+        self.search.cache_set(SPAN_NAMESPACE, key, [list(known) for known in stored])
+
+    def fingerprint(self, make, model, year, driver=None):
+        """Fitment fingerprint of one model year, None if the catalog has no engines for it"""
+        engines = self.search.fetch_engines(make, model, year, driver)
+        if not engines:
+            return None
+        listings = dict(self.search.listings_as_completed(make, model, year, engines, driver))
+        return fitment_fingerprint(listings, self.search.preferred_manufacturers)
+
+    def candidate_years(self, make, model, year):
+        """Years that can share year's generation: the indexed years without gaps, or a bounded window"""
+        year = int(year)
+        years = self.search.year_index.years(make, model)
+        if not years or year not in years:
+            return list(range(year - MAX_GENERATION_YEARS, year + MAX_GENERATION_YEARS + 1))
+        index = years.index(year)
+        low = index
+        while low > 0 and years[low - 1] == years[low] - 1 and year - years[low - 1] <= MAX_GENERATION_YEARS:
+            low -= 1
+        high = index
+        while (high < len(years) - 1 and years[high + 1] == years[high] + 1
+               and years[high + 1] - year <= MAX_GENERATION_YEARS):
+            high += 1
+        return years[low:high + 1]
+
+    def span(self, make, model, year, driver=None):
+        """
+        (first year, last year) of the generation containing year, or None if
+        year itself has no listings to compare with.
+        """
+        year = int(year)
+        known = self.known_span(make, model, year)
+        if known:
+            return known
+
+        # On an index miss the model's autocomplete lists its years into the index
+        self.search.lookup_previous_year(make, model, str(year), driver)
+        years = self.candidate_years(make, model, year)
+        fingerprints = {}
+
+        def same(candidate):
+            if candidate not in fingerprints:
+                with self.search.tracer.span("generation_probe", vehicle=f"{make} {model} {candidate}"):
+                    fingerprints[candidate] = self.fingerprint(make, model, candidate, driver)
+            return fingerprints[candidate] == fingerprints[year]
+
+        same(year)
+        if fingerprints[year] is None:
+            return None
+
+        anchor = years.index(year)
+        # First index whose year matches: everything from there up to the anchor does
+        low, high = 0, anchor
+        while low < high:
+            middle = (low + high) // 2
+            if same(years[middle]):
+                high = middle
+            else:
+                low = middle + 1
+        start = years[low]
+        # Last index whose year matches
+        low, high = anchor, len(years) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if same(years[middle]):
+                low = middle
+            else:
+                high = middle - 1
+        end = years[low]
+
+        logger.info(f"{make} {model} {year} belongs to the {start}-{end} generation "
+                    f"({len(fingerprints)} years probed)")
+        self.remember(make, model, (start, end))
+        return start, end
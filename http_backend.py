@@ -0,0 +1,388 @@
+import gzip
+import http.client
+import json
+import logging
+import queue
+import threading
+import zlib
+from contextlib import nullcontext
+from html.parser import HTMLParser
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from rate_control import Throttled
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://www.rockauto.com"
+PART_SEARCH_PATH = "/en/partsearch/?partnum={part_number}"
+CATALOG_PATH = "/en/catalog/"
+# XHR endpoint the top search box calls for its autocomplete rows
+AUTOCOMPLETE_PATH = "/catalog/catalogapi.php"
+AUTOCOMPLETE_FUNC = "gettopsearchsuggestions"
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+
+# Elements that never have a closing tag
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr"}
+# Elements whose text is not visible page content
+SKIP_TEXT_TAGS = {"script", "style", "noscript", "template"}
+# Elements that start on a new line or cell, innerText separates their text from its neighbours
+BLOCK_TAGS = {"br", "div", "p", "tr", "li", "ul", "ol", "dl", "dt", "dd", "table", "thead", "tbody", "tfoot",
+              "td", "th", "caption", "section", "article", "header", "footer", "form", "h1", "h2", "h3", "h4",
+              "h5", "h6"}
+
+
+def engine_substring(make, model, year, engine):
+    """
+    The words of an autocomplete engine row that name the engine, as shown on
+    the catalog's engine links: every word of make, model and year removed.
+    """
+    names = set(f"{make} {model} {year}".lower().split())
+    return " ".join(word for word in engine.lower().split() if word not in names)
+
+
+class HttpError(Exception):
+    """Raised when the catalog answers with a non-success status."""
+
+
+class Node:
+    """Minimal element node produced by parse_html."""
+
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.children = []
+        self.parent = parent
+
+    @property
+    def classes(self):
+        return self.attrs.get("class", "").split()
+
+    @property
+    def text(self):
+        """Visible text with whitespace collapsed, similar to WebElement.text."""
+        parts = []
+        self._collect_text(parts)
+        return " ".join("".join(parts).split())
+
+    def _collect_text(self, parts):
+        if self.tag in SKIP_TEXT_TAGS:
+            return
+        for child in self.children:
+            if isinstance(child, str):
+                parts.append(child)
+            elif child.tag in BLOCK_TAGS:
+                parts.append(" ")
+                child._collect_text(parts)
+                parts.append(" ")
+            else:
+                child._collect_text(parts)
+
+    def iter(self):
+        """Yield every descendant element, depth first."""
+        for child in self.children:
+            if isinstance(child, Node):
+                yield child
+                yield from child.iter()
+
+    def find_all(self, tag=None, class_name=None, id_contains=None, class_contains=None):
+        """Return descendant elements matching every given criterion."""
+        matches = []
+        for node in self.iter():
+            if tag and node.tag != tag:
+                continue
+            if class_name and class_name not in node.classes:
+                continue
+            if class_contains and class_contains not in node.attrs.get("class", ""):
+                continue
+            if id_contains and id_contains not in node.attrs.get("id", ""):
+                continue
+            matches.append(node)
+        return matches
+
+    def find(self, **criteria):
+        matches = self.find_all(**criteria)
+        return matches[0] if matches else None
+
+    def cells(self):
+        """Direct td/th children of a table row."""
+        return [child for child in self.children if isinstance(child, Node) and child.tag in ("td", "th")]
+
+
+class TreeBuilder(HTMLParser):
+    """Builds a Node tree, tolerating the unclosed tags real catalog pages contain."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("#document")
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, {name: value or "" for name, value in attrs}, parent=self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        node = Node(tag, {name: value or "" for name, value in attrs}, parent=self.current)
+        self.current.children.append(node)
+
+    def handle_endtag(self, tag):
+        # Close up to the nearest matching open element, ignore stray end tags
+        node = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+def parse_html(markup):
+    """Parse markup into a Node tree."""
+    builder = TreeBuilder()
+    builder.feed(markup)
+    builder.close()
+    return builder.root
+
+
+class HttpClientPool:
+    """Thread-safe pool of keep-alive connections to one host."""
+
+    def __init__(self, base_url=BASE_URL, size=8, timeout=15):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None, retries=1):
+        """Send a request and return (status, headers, text), reusing idle connections."""
+        request_headers = {
+            "User-Agent": USER_AGENT,
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        }
+        request_headers.update(headers or {})
+        for attempt in range(retries + 1):
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                conn.request(method, path, body=body, headers=request_headers)
+                response = conn.getresponse()
+                raw = response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                # A pooled connection may have been closed by the server, retry on a fresh one
+                if attempt < retries:
+                    continue
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                try:
+                    self._idle.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+            return response.status, dict(response.getheaders()), self._decode(response, raw)
+
+    def _decode(self, response, raw):
+        encoding = (response.getheader("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            raw = gzip.decompress(raw)
+        elif encoding == "deflate":
+            raw = zlib.decompress(raw)
+        charset = response.headers.get_content_charset() or "utf-8"
+        return raw.decode(charset, errors="replace")
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class HttpCatalogBackend:
+    """
+    Browserless access to the catalog pages the Selenium flows read:
+    part search results, the top search autocomplete and the
+    "Wheel Bearing & Hub" listings.
+    """
+
+    def __init__(self, base_url=BASE_URL, pool_size=8, timeout=15, tracer=None, limiter=None):
+        self.base_url = base_url.rstrip("/")
+        self.client = HttpClientPool(self.base_url, size=pool_size, timeout=timeout)
+        # Optional tracing.Tracer for page_load and autocomplete spans
+        self.tracer = tracer
+        # Optional rate_control.AdaptiveLimiter every request waits for
+        self.limiter = limiter
+        self._cookies = {}
+        self._cookie_lock = threading.Lock()
+
+    def get_page(self, path, max_redirects=5):
+        """GET a page, following redirects, and return (final_path, Node tree)."""
+        for _ in range(max_redirects + 1):
+            with self._span("page_load", url=path):
+                status, headers, text = self._request("page_load", "GET", path, headers=self._cookie_header())
+            self._store_cookies(headers)
+            if status in (301, 302, 303, 307, 308) and headers.get("Location"):
+                path = self._relative(headers["Location"], path)
+                continue
+            if status >= 400:
+                raise HttpError(f"GET {path} returned {status}")
+            return path, parse_html(text)
+        raise HttpError(f"Too many redirects for {path}")
+
+    def _request(self, stage, method, path, body=None, headers=None):
+        """client.request() through the limiter; throttling answers count as timeouts"""
+        def send():
+            status, response_headers, text = self.client.request(method, path, body=body, headers=headers)
+            if status in (429, 503):
+                raise Throttled(f"{method} {path} returned {status}")
+            return status, response_headers, text
+        return self.limiter.run(send, stage) if self.limiter else send()
+
+    def _span(self, stage, **fields):
+        return self.tracer.span(stage, **fields) if self.tracer else nullcontext()
+
+    def _relative(self, location, current_path):
+        url = urljoin(self.base_url + current_path, location)
+        parts = urlsplit(url)
+        return parts.path + (f"?{parts.query}" if parts.query else "")
+
+    def _cookie_header(self):
+        with self._cookie_lock:
+            if not self._cookies:
+                return {}
+            return {"Cookie": "; ".join(f"{name}={value}" for name, value in self._cookies.items())}
+
+    def _store_cookies(self, headers):
+        cookie = headers.get("Set-Cookie")
+        if not cookie:
+            return
+        name, _, rest = cookie.partition("=")
+        with self._cookie_lock:
+            self._cookies[name.strip()] = rest.split(";", 1)[0]
+
+    def autocomplete(self, query):
+        """Return the text of each top search autocomplete row for a query."""
+        body = urlencode({"func": AUTOCOMPLETE_FUNC, "payload": json.dumps({"text": query})})
+        headers = {"Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+                   "X-Requested-With": "XMLHttpRequest"}
+        headers.update(self._cookie_header())
+        with self._span("wait_autocomplete", query=query):
+            status, response_headers, text = self._request("autocomplete", "POST", AUTOCOMPLETE_PATH, body=body,
+                                                           headers=headers)
+        if status >= 400:
+            raise HttpError(f"Autocomplete for '{query}' returned {status}")
+
+        # The endpoint answers with JSON wrapping an HTML fragment, or the fragment itself
+        markup = text
+        if "json" in response_headers.get("Content-Type", ""):
+            payload = json.loads(text)
+            markup = payload.get("html", "") if isinstance(payload, dict) else ""
+        tree = parse_html(markup)
+        table = tree.find(id_contains="autosuggestions") or tree
+        rows = [row.text.strip() for row in table.find_all(tag="tr")]
+        return [row for row in rows if row]
+
+    def part_search(self, part_number):
+        """Return the listings on the part number search page."""
+        _, tree = self.get_page(PART_SEARCH_PATH.format(part_number=part_number))
+        if not tree.find(class_name="listings-container"):
+            return []
+        return [self._listing_record(node)
+                for node in tree.find_all(class_contains="listing-border-top-line listing-inner-content")]
+
+    def buyers_guide(self, listing):
+        """Return (make, model, years text) rows from a listing's buyers guide."""
+        if not listing.get("info_url"):
+            return []
+        _, tree = self.get_page(listing["info_url"])
+        container = tree.find(id_contains="buyersguide") or tree
+        rows = []
+        for row in container.find_all(tag="tr"):
+            cells = row.cells()
+            if len(cells) >= 3 and cells[0].tag == "td":
+                rows.append((cells[0].text, cells[1].text, cells[2].text))
+        return rows
+
+    def listing_rows(self, make, model, year, engine):
+        """
+        Walk make/year/model -> engine -> Brake & Wheel Hub -> Wheel Bearing & Hub
+        the way the Selenium flow clicks through it and return the listing rows,
+        or None if the engine or category links are missing.
+        """
+        path = CATALOG_PATH + ",".join(self._slug(part) for part in (make, year, model))
+        path, tree = self.get_page(path)
+        link_text = engine_substring(make, model, year, engine)
+        link = self._find_link(tree, link_text)
+        if link is None:
+            logger.info(f"No catalog link matching '{link_text}' under {path}")
+            return None
+        return self.engine_listing(self._relative(link.attrs["href"], path))
+
+    def engine_listing(self, path):
+        """
+        Listing rows reached from an engine's catalog page at path through
+        Brake & Wheel Hub -> Wheel Bearing & Hub, None if a link is missing.
+        """
+        path, tree = self.get_page(path)
+        for link_text in ("brake & wheel hub", "wheel bearing & hub"):
+            link = self._find_link(tree, link_text)
+            if link is None:
+                logger.info(f"No catalog link matching '{link_text}' under {path}")
+                return None
+            path, tree = self.get_page(self._relative(link.attrs["href"], path))
+
+        table = tree.find(tag="table", class_contains="nobmp")
+        if table is None:
+            return []
+        rows = []
+        for row in table.find_all(tag="tr"):
+            record = self._listing_record(row)
+            if record["manufacturer"] or record["part_number"]:
+                rows.append(record)
+        return rows
+
+    def _find_link(self, tree, text):
+        for link in tree.find_all(tag="a"):
+            if text in link.text.lower() and link.attrs.get("href"):
+                return link
+        return None
+
+    def _listing_record(self, node):
+        """Extract the fields the scrapers read from one listing row."""
+        def field(class_name):
+            element = node.find(class_name=class_name)
+            return element.text.strip() if element else ""
+
+        info_link = node.find(id_contains="vew_partnumber")
+        info_url = info_link.attrs.get("href") if info_link is not None and info_link.tag == "a" else None
+        return {
+            "manufacturer": field("listing-final-manufacturer"),
+            "part_number": field("listing-final-partnumber"),
+            "drive_info": field("listing-text-row"),
+            "text": node.text,
+            "info_url": info_url,
+        }
+
+    def _slug(self, value):
+        return str(value).lower().replace(" ", "+")
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,72 @@
+"""
+Journal of a batch job: every input line's status and record, written as soon
+as the line finishes, so a restarted job skips the lines already done.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class JobJournal:
+    """
+    SQLite file with one row per input line. A line counts as done only when
+    its search finished without error and the input text is unchanged; failed,
+    cancelled, interrupted (still "running") and edited lines are searched again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS lines (
+                line INTEGER PRIMARY KEY,
+                input TEXT NOT NULL,
+                status TEXT NOT NULL,
+                record TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def completed(self, line_number, text):
+        """The stored record of a line that is done with this input, else None"""
+        with self._lock:
+            row = self._conn.execute("SELECT input, status, record FROM lines WHERE line = ?",
+                                     (line_number,)).fetchone()
+        if row is None or row[0] != text or row[1] != "done":
+            return None
+        return json.loads(row[2])
+
+    def start(self, line_number, text):
+        """Mark a line as running; a crash leaves it that way and it is retried"""
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO lines (line, input, status, attempts, updated_at) VALUES (?, ?, 'running', 1, ?)
+                ON CONFLICT (line) DO UPDATE SET
+                    attempts = CASE WHEN input = excluded.input THEN attempts + 1 ELSE 1 END,
+                    input = excluded.input, status = 'running', record = NULL, updated_at = excluded.updated_at
+            """, (line_number, text, time.time()))
+            self._conn.commit()
+
+    def finish(self, line_number, record):
+        status = "cancelled" if record.get("cancelled") else "failed" if record.get("error") else "done"
+        with self._lock:
+            self._conn.execute("UPDATE lines SET status = ?, record = ?, updated_at = ? WHERE line = ?",
+                               (status, json.dumps(record), time.time(), line_number))
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM lines GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".prev_version", "lookup_cache.sqlite3")
+DEFAULT_TTL = 7 * 24 * 3600  # Catalog data rarely changes within a week
+NEGATIVE_TTL = 24 * 3600  # "Not found" answers are re-checked sooner
+DEFAULT_MAX_ENTRIES = 50000
+
+# Returned by get() on a miss, so cached None/False/{} values stay distinguishable
+MISS = object()
+
+
+def normalize_key(*parts):
+    """Build a cache key from make/model/year/position/engine parts."""
+    return "|".join(" ".join(str(part).lower().split()) for part in parts)
+
+
+class LookupCache:
+    """
+    Persistent SQLite cache for catalog lookups.
+    Entries live in a namespace, expire after a per-entry TTL and are evicted
+    least-recently-used first once the cache grows past max_entries.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 ttl=DEFAULT_TTL, negative_ttl=NEGATIVE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                negative INTEGER NOT NULL DEFAULT 0,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+
+    def get(self, namespace, *key_parts):
+        """Return the cached value, or MISS if absent or expired."""
+        key = normalize_key(*key_parts)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key)).fetchone()
+            if row is None:
+                return MISS
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                self._conn.commit()
+                return MISS
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key))
+            self._conn.commit()
+        logger.debug(f"Cache hit {namespace}:{key}")
+        return json.loads(value)
+
+    def set(self, namespace, key_parts, value, ttl=None, negative=False):
+        """
+        Store a JSON-serializable value under namespace/key_parts.
+        Negative entries ("nothing found") default to the shorter negative TTL.
+        """
+        if ttl is None:
+            ttl = self.negative_ttl if negative else self.ttl
+        key = normalize_key(*key_parts)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, negative, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), int(negative), now + ttl, now))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used ones above the size cap."""
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE rowid IN "
+                "(SELECT rowid FROM entries ORDER BY accessed_at LIMIT ?)", (overflow,))
+            logger.info(f"Evicted {overflow} least recently used cache entries")
+
+    def invalidate(self, namespace=None):
+        """Remove every entry, or only those in one namespace."""
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM entries")
+            else:
+                self._conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,158 @@
+"""
+Index of the model years the catalog lists for each make and model.
+
+A make is indexed in one pass over its catalog year listings (every model
+under every year), so previous-year checks become set lookups. Years read
+from a "make model" autocomplete are also kept, for makes whose listing could
+not be read. A make is never indexed on a lookup's critical path: a miss is
+answered by the autocomplete and the make is queued ("wanted") for a build in
+the background or by CatalogSearch.refresh_year_index(), which also rebuilds
+entries older than max_age.
+"""
+import logging
+import threading
+import time
+
+from lookup_cache import MISS
+from records import vehicle_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_AGE = 30 * 24 * 3600  # Model years are added once a year, a month is plenty fresh
+INDEX_NAMESPACE = "model_years"
+
+
+class ModelYearIndex:
+    """
+    (make, model) -> available years, kept in memory and in the lookup cache.
+    A make entry records when its full listing was last read ("complete") and,
+    per model, the years and when they were last seen.
+    """
+
+    def __init__(self, cache=None, max_age=DEFAULT_INDEX_AGE):
+        self.cache = cache
+        self.max_age = max_age
+        self._makes = {}
+        self._lock = threading.Lock()
+        # One lock per make so parallel lookups wait for a single build
+        self._build_locks = {}
+        # Makes whose listing could not be read, not retried until the process restarts
+        self._failed = set()
+        # Make key -> make name, for makes a lookup missed that are waiting to be indexed
+        self._wanted = {}
+
+    def _load(self, make_key):
+        """In-memory entry for a make, read from the cache the first time"""
+        with self._lock:
+            entry = self._makes.get(make_key)
+        if entry is not None:
+            return entry
+
+        entry = {"complete": None, "models": {}}
+        if self.cache:
+            try:
+                stored = self.cache.get(INDEX_NAMESPACE, make_key)
+                if stored is not MISS:
+                    entry = {"complete": stored.get("complete"),
+                             "models": {model: (set(years), seen) for model, (years, seen) in stored["models"].items()}}
+            except Exception as e:
+                logger.error(f"Could not read the model year index for {make_key}: {str(e)}")
+        with self._lock:
+            return self._makes.setdefault(make_key, entry)
+
+    def _save(self, make_key, entry):
+        if not self.cache:
+            return
+        with self._lock:
+            stored = {"complete": entry["complete"],
+                      "models": {model: [sorted(years), seen] for model, (years, seen) in entry["models"].items()}}
+        try:
+            self.cache.set(INDEX_NAMESPACE, (make_key,), stored, ttl=self.max_age * 2)
+        except Exception as e:
+            logger.error(f"Could not store the model year index for {make_key}: {str(e)}")
+
+    def is_fresh(self, make):
+        complete = self._load(vehicle_key(make, "")[0])["complete"]
+        return complete is not None and time.time() - complete < self.max_age
+
+    def has_year(self, make, model, year):
+        """
+        True/False if the index knows the make/model's years, None on an index
+        miss (model not indexed or its entry is out of date).
+        """
+        make_key, model_key = vehicle_key(make, model)
+        entry = self._load(make_key)
+        with self._lock:
+            known = entry["models"].get(model_key)
+        if known is None:
+            return None
+        years, seen = known
+        if time.time() - seen >= self.max_age:
+            return None
+        return int(year) in years
+
+    def years(self, make, model):
+        """Sorted years the index knows for a make/model, None on an index miss"""
+        make_key, model_key = vehicle_key(make, model)
+        entry = self._load(make_key)
+        with self._lock:
+            known = entry["models"].get(model_key)
+        if known is None or time.time() - known[1] >= self.max_age:
+            return None
+        return sorted(known[0])
+
+    def store_make(self, make, models, persist=True):
+        """Replace a make's entry with a full listing: {model name: years}"""
+        make_key = vehicle_key(make, "")[0]
+        now = time.time()
+        entry = {"complete": now,
+                 "models": {vehicle_key(make, model)[1]: ({int(year) for year in years}, now)
+                            for model, years in models.items()}}
+        with self._lock:
+            self._makes[make_key] = entry
+        if persist:
+            self._save(make_key, entry)
+
+    def store_model(self, make, model, years):
+        """Record the years seen for one make/model outside a full make listing"""
+        make_key, model_key = vehicle_key(make, model)
+        entry = self._load(make_key)
+        with self._lock:
+            entry["models"][model_key] = ({int(year) for year in years}, time.time())
+        self._save(make_key, entry)
+
+    def needs_build(self, make):
+        return not self.is_fresh(make) and vehicle_key(make, "")[0] not in self._failed
+
+    def want(self, make):
+        """Queue a make that missed the index for a build off the lookup path"""
+        if self.needs_build(make):
+            with self._lock:
+                self._wanted.setdefault(vehicle_key(make, "")[0], make)
+
+    def has_wanted(self):
+        with self._lock:
+            return bool(self._wanted)
+
+    def take_wanted(self):
+        """Names of the queued makes, emptying the queue"""
+        with self._lock:
+            makes = list(self._wanted.values())
+            self._wanted.clear()
+        return makes
+
+    def mark_failed(self, make):
+        with self._lock:
+            self._failed.add(vehicle_key(make, "")[0])
+
+    def build_lock(self, make):
+        with self._lock:
+            return self._build_locks.setdefault(vehicle_key(make, "")[0], threading.Lock())
+
+    def stale_makes(self):
+        """Makes indexed in this process whose full listing is older than max_age"""
+        with self._lock:
+            makes = list(self._makes.items())
+        now = time.time()
+        return [make for make, entry in makes
+                if entry["complete"] is not None and now - entry["complete"] >= self.max_age]
@@ -0,0 +1,165 @@
+"""
+Central pacing for catalog requests.
+
+Every catalog request (a browser page load or an HTTP fetch) goes through one
+AdaptiveLimiter, which caps how many run at once. Waits for content on a page
+that did load are not requests: they never take a slot or count as timeouts. The cap follows AIMD like TCP congestion
+control: while it is fully used it grows by one per cap's worth of healthy
+responses, and it is cut multiplicatively on a timeout, a throttling answer
+or a response much slower than the usual for its stage. Transient timeouts are retried after a jittered
+exponential backoff, so a throttled site is not hit again in lockstep.
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+MAX_LIMIT = 16
+MIN_LIMIT = 1
+# Cut on a timeout or throttling answer, and on a slowdown
+TIMEOUT_BACKOFF = 0.5
+SLOWDOWN_BACKOFF = 0.8
+# A response this many times slower than its stage's baseline (and at least
+# SLOW_MARGIN seconds slower) counts as the site slowing down
+SLOW_FACTOR = 2.5
+SLOW_MARGIN = 0.25
+# The baseline is the fastest recent latency, drifting up slowly so one lucky
+# response does not set it forever
+BASELINE_DRIFT = 0.02
+# Responses failing together count as one congestion signal
+DECREASE_INTERVAL = 1.0
+RETRIES = 2
+RETRY_BASE_DELAY = 0.5
+
+
+class Throttled(TimeoutError):
+    """The site answered with a throttling status (429/503)."""
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit shared by every session of a search (and every
+    worker of the service). Thread-safe; slots are per thread and re-entrant,
+    so nested calls share the outer call's slot.
+    """
+
+    def __init__(self, initial=4, min_limit=MIN_LIMIT, max_limit=MAX_LIMIT, retries=RETRIES,
+                 retry_on=(TimeoutError,)):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.retries = retries
+        # Exceptions that mean the site is overloaded: cut the limit and retry
+        self.retry_on = tuple(retry_on)
+        self._in_flight = 0
+        self._baselines = {}
+        self._last_decrease = 0.0
+        self._counts = {"requests": 0, "timeouts": 0, "slowdowns": 0, "retries": 0}
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def _allowed(self):
+        return self._in_flight < max(self.min_limit, int(self.limit))
+
+    def acquire(self):
+        with self._cond:
+            while not self._allowed():
+                self._cond.wait()
+            self._in_flight += 1
+
+    def try_acquire(self):
+        """Take a slot if one is free right now, for callers that cannot block"""
+        with self._cond:
+            if not self._allowed():
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self, stage, latency=None, timed_out=False):
+        """
+        Give a slot back and adjust the limit. latency None releases without a
+        signal (request abandoned).
+        """
+        with self._cond:
+            # Only a limit that was actually reached has shown it can grow
+            saturated = self._in_flight >= int(self.limit)
+            self._in_flight -= 1
+            if timed_out:
+                self._counts["timeouts"] += 1
+                self._decrease(TIMEOUT_BACKOFF)
+            elif latency is not None:
+                self._counts["requests"] += 1
+                baseline = self._baselines.get(stage)
+                if baseline is None or latency < baseline:
+                    baseline = latency
+                else:
+                    baseline += (latency - baseline) * BASELINE_DRIFT
+                self._baselines[stage] = baseline
+                if latency > baseline * SLOW_FACTOR and latency - baseline > SLOW_MARGIN:
+                    self._counts["slowdowns"] += 1
+                    self._decrease(SLOWDOWN_BACKOFF)
+                elif saturated:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _decrease(self, factor):
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_INTERVAL:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * factor)
+        logger.info(f"Catalog request limit lowered to {self.limit:.1f}")
+
+    @contextmanager
+    def slot(self, stage):
+        """Hold a slot around one request, measuring it for the limit"""
+        if getattr(self._local, "depth", 0):
+            yield
+            return
+        self.acquire()
+        self._local.depth = 1
+        started = time.monotonic()
+        timed_out = False
+        failed = False
+        try:
+            yield
+        except self.retry_on:
+            timed_out = True
+            raise
+        except BaseException:
+            # Other errors say nothing about the site's load
+            failed = True
+            raise
+        finally:
+            self._local.depth = 0
+            self.release(stage, None if failed else time.monotonic() - started, timed_out)
+
+    def run(self, fn, stage):
+        """
+        Call fn() in a slot, retrying transient timeouts with jittered backoff.
+        Nested calls run once and leave retrying to the outermost one.
+        """
+        nested = getattr(self._local, "depth", 0)
+        attempt = 0
+        while True:
+            try:
+                with self.slot(stage):
+                    return fn()
+            except self.retry_on as e:
+                if nested or attempt >= self.retries:
+                    raise
+                attempt += 1
+                delay = random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt)
+                with self._cond:
+                    self._counts["retries"] += 1
+                logger.info(f"{stage} timed out ({str(e) or type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                time.sleep(delay)
+
+    def stats(self):
+        with self._cond:
+            return {"limit": round(self.limit, 2), "in_flight": self._in_flight,
+                    "baselines": {stage: round(value, 4) for stage, value in self._baselines.items()},
+                    **self._counts}
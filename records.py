@@ -0,0 +1,88 @@
+import threading
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from vehicle_names import make_key, model_key
+
+
+def vehicle_key(make, model):
+    """Index key for a make/model pair: make aliases applied, case, spacing and punctuation ignored."""
+    return (make_key(make), model_key(model))
+
+
+class Vehicle(NamedTuple):
+    """One buyers guide row: a make/model sold over a year range."""
+    make: str
+    model: str
+    start_year: int
+    end_year: int
+
+
+class PreviousYear(NamedTuple):
+    """A make/model confirmed to exist the year before a range starts."""
+    make: str
+    model: str
+    year: int
+
+
+class Fitment(NamedTuple):
+    """Position and drive type read from a vehicle's current listings."""
+    make: str
+    model: str
+    year: int
+    position: str
+    drive_type: str
+
+
+class FinalResult(NamedTuple):
+    """A previous year vehicle joined with the fitment of its current generation."""
+    make: str
+    model: str
+    prev_year: int
+    current_year: int
+    position: str
+    drive_type: str
+
+
+@dataclass(slots=True)
+class SearchState:
+    """
+    Everything one search accumulates. A fresh instance is created per search,
+    so nothing is shared between searches or SearchBarApp instances.
+    """
+    search_text: str = ""
+    # Insertion-ordered set of PreviousYear records
+    previous_years: dict = field(default_factory=dict)
+    # vehicle_key(make, model) -> first Fitment recorded for that make/model
+    fitments: dict = field(default_factory=dict)
+    final_results: list = field(default_factory=list)
+    # Lookups that failed instead of answering; the search's answer cannot be trusted
+    failures: list = field(default_factory=list)
+    # Set when cancel() stopped the search before it finished
+    cancelled: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_previous_year(self, make, model, year):
+        with self.lock:
+            self.previous_years[PreviousYear(make, model, int(year))] = None
+
+    def add_failure(self, message):
+        with self.lock:
+            self.failures.append(message)
+
+    def add_fitment(self, fitment):
+        with self.lock:
+            self.fitments.setdefault(vehicle_key(fitment.make, fitment.model), fitment)
+
+    def join(self):
+        """Pair every previous year vehicle with its make/model's fitment, one hash lookup each"""
+        with self.lock:
+            previous_years = list(self.previous_years)
+        results = []
+        for previous in previous_years:
+            fitment = self.fitments.get(vehicle_key(previous.make, previous.model))
+            if fitment:
+                results.append(FinalResult(previous.make, previous.model, previous.year,
+                                           fitment.year, fitment.position, fitment.drive_type))
+        self.final_results = results
+        return results
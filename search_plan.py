@@ -0,0 +1,43 @@
+"""
+Planning stage between the buyers guide and any catalog work.
+
+A buyers guide often lists one make/model several times: adjacent year
+ranges, overlapping ranges from different manufacturers' listings, repeated
+sub-model rows. Only the first year of a continuous run can have a distinct
+previous generation, so rows are merged into one Vehicle per continuous run
+and each gets a fixed representative year for its fitment lookup.
+"""
+from records import Vehicle, vehicle_key
+
+
+def merge_ranges(vehicles):
+    """
+    One Vehicle per continuous year run of each make/model, overlapping and
+    adjacent ranges merged. Keeps the first spelling seen and the order in
+    which make/models first appear, runs of one make/model by start year.
+    """
+    groups = {}
+    for vehicle in vehicles:
+        groups.setdefault(vehicle_key(vehicle.make, vehicle.model), []).append(vehicle)
+
+    planned = []
+    for rows in groups.values():
+        make, model = rows[0].make, rows[0].model
+        runs = []
+        for vehicle in sorted(rows, key=lambda row: (row.start_year, row.end_year)):
+            start, end = sorted((vehicle.start_year, vehicle.end_year))
+            if runs and start <= runs[-1][1] + 1:
+                runs[-1][1] = max(runs[-1][1], end)
+            else:
+                runs.append([start, end])
+        planned.extend(Vehicle(make, model, start, end) for start, end in runs)
+    return planned
+
+
+def representative_year(vehicle):
+    """
+    Year whose listings stand for the whole run: its first year, the one right
+    after the previous generation, so the same vehicle always maps to the same
+    fitment lookup and cache key.
+    """
+    return vehicle.start_year
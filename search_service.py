@@ -0,0 +1,328 @@
+"""
+Local HTTP/JSON service: one box answers the lookups of the whole shop.
+
+    python search_service.py --workers 2 --port 8765
+    curl -s localhost:8765/lookup -d '{"input": "513121"}'
+    curl -sN localhost:8765/lookup -H 'Accept: text/event-stream' \\
+         -d '{"position": "Front", "car": "10~12 Toyota Camry"}'
+    curl -sN 'localhost:8765/lookup?input=513121&stream=1'
+
+Lookups are queued onto a fixed set of workers, each owning one browser
+session (the browser budget) and running the same search code as the window
+and batch_cli.py. Workers share one lookup cache, year index, in-flight
+lookup table and set of stage metrics, so a lookup one counter already ran
+is answered for the next one without a page load.
+
+A lookup answers with the batch_cli.py record as JSON, or streams server-sent
+events: "queued", "output" for every progress chunk, "answer", then "done"
+with the record. GET /status shows the queue and workers, GET /metrics the
+stage metrics in Prometheus text format.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import queue
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from batch_cli import BatchSearch
+from catalog_snapshot import DEFAULT_SNAPSHOT_PATH
+from lookup_cache import DEFAULT_CACHE_PATH
+from tab_fanout import DEFAULT_MAX_TABS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+MAX_QUEUED = 100
+MAX_BODY = 64 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceSearch(BatchSearch):
+    """A worker's search: also hands every chunk of output to the job it is running."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.emit = None
+
+    def share(self, other):
+        """Use another worker's cache, year index, vehicle names, engine ranking, in-flight lookups, request limit and metrics"""
+        if self.cache and self.cache is not other.cache:
+            self.cache.close()
+        self.cache = other.cache
+        self.year_index = other.year_index
+        self.names = other.names
+        self.engine_ranking = other.engine_ranking
+        self.flights = other.flights
+        self.tracer = other.tracer
+        self.waiter = other.waiter
+        self.limiter = other.limiter
+        if self.http_backend and hasattr(self.http_backend, "tracer"):
+            self.http_backend.tracer = other.tracer
+            self.http_backend.limiter = other.limiter
+
+    def report(self, text):
+        super().report(text)
+        if self.emit:
+            self.emit("output", {"text": text})
+
+    def copy_to_clipboard(self, text):
+        super().copy_to_clipboard(text)
+        if self.emit:
+            self.emit("answer", {"answer": text})
+
+
+class Job:
+    """One queued lookup; its events are delivered to the request's event loop."""
+
+    def __init__(self, job_id, text, loop):
+        self.id = job_id
+        self.text = text
+        self.loop = loop
+        self.events = asyncio.Queue()
+        self.cancelled = False
+        self.search = None
+
+    def emit(self, event, data):
+        """Thread-safe: queue an event for the client"""
+        self.loop.call_soon_threadsafe(self.events.put_nowait, (event, data))
+
+    def cancel(self):
+        self.cancelled = True
+        if self.search:
+            self.search.cancel()
+
+
+class SearchService:
+    """Job queue, worker threads and the HTTP front end."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_queued=MAX_QUEUED, **search_options):
+        self.jobs = queue.Queue(maxsize=max_queued)
+        self.job_ids = itertools.count(1)
+        self.searches = []
+        for _ in range(max(1, workers)):
+            search = ServiceSearch(**search_options)
+            if self.searches:
+                search.share(self.searches[0])
+            self.searches.append(search)
+        self.busy = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+        self.threads = []
+
+    def start(self):
+        for index, search in enumerate(self.searches):
+            # Browsers start while the server comes up
+            search.prewarm()
+            thread = threading.Thread(target=self.work, args=(search,), name=f"search-worker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def work(self, search):
+        """Worker loop: run queued jobs one at a time on this worker's session"""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            if job.cancelled:
+                continue
+            with self._lock:
+                self.busy += 1
+            job.search = search
+            search.emit = job.emit
+            try:
+                record = search.search_line(job.id, job.text)
+            except BaseException as e:
+                # search_line reports search errors itself, this is anything it let through
+                logger.error(f"Worker failed on job {job.id}: {str(e)}")
+                record = {"line": job.id, "input": job.text, "answer": None, "error": str(e)}
+            finally:
+                search.emit = None
+                job.search = None
+                with self._lock:
+                    self.busy -= 1
+                    self.completed += 1
+            job.emit("done", record)
+
+    def submit(self, text, loop):
+        job = Job(next(self.job_ids), text, loop)
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            raise HttpError(503, "Too many lookups queued, try again shortly")
+        return job
+
+    def status(self):
+        with self._lock:
+            busy, completed = self.busy, self.completed
+        return {"workers": len(self.searches), "busy": busy, "queued": self.jobs.qsize(),
+                "completed": completed, "in_flight_shared": self.searches[0].flights.shared,
+                "requests": self.searches[0].limiter.stats(),
+                "engine_ranking": self.searches[0].engine_ranking.stats()}
+
+    def stop(self):
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join(timeout=5)
+        for search in self.searches:
+            search.close()
+
+    # HTTP front end
+
+    async def handle(self, reader, writer):
+        try:
+            method, target, headers, body = await self.read_request(reader)
+            url = urlsplit(target)
+            if url.path == "/lookup":
+                await self.lookup(method, url, headers, body, writer)
+            elif url.path == "/status" and method == "GET":
+                await self.respond(writer, 200, self.status())
+            elif url.path == "/metrics" and method == "GET":
+                await self.respond(writer, 200, self.searches[0].tracer.to_prometheus(),
+                                   content_type="text/plain; version=0.0.4")
+            else:
+                raise HttpError(404, f"No such endpoint: {method} {url.path}")
+        except HttpError as e:
+            await self.respond(writer, e.status, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"Request failed: {str(e)}")
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY:
+            raise HttpError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    def lookup_text(self, method, url, body):
+        """The search bar line for a request: input, or part_number, or position + car"""
+        if method == "GET":
+            params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        elif method == "POST":
+            try:
+                params = json.loads(body or b"{}")
+            except ValueError:
+                raise HttpError(400, "Body must be JSON")
+            if not isinstance(params, dict):
+                raise HttpError(400, "Body must be a JSON object")
+        else:
+            raise HttpError(405, "Use GET or POST")
+
+        if params.get("input"):
+            return str(params["input"])
+        if params.get("part_number"):
+            return str(params["part_number"]).strip()
+        if params.get("position") and params.get("car"):
+            return f"{params['position']}\t{params['car']}"
+        raise HttpError(400, "Give input, part_number, or position and car")
+
+    async def lookup(self, method, url, headers, body, writer):
+        text = self.lookup_text(method, url, body)
+        stream = ("text/event-stream" in headers.get("accept", "")
+                  or parse_qs(url.query).get("stream", ["0"])[0] in ("1", "true"))
+        job = self.submit(text, asyncio.get_running_loop())
+        logger.info(f"Queued job {job.id}: {text!r}")
+
+        try:
+            if not stream:
+                while True:
+                    event, data = await job.events.get()
+                    if event == "done":
+                        await self.respond(writer, 200, data)
+                        return
+
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+            await self.send_event(writer, "queued", {"job": job.id, "position": self.jobs.qsize()})
+            while True:
+                event, data = await job.events.get()
+                await self.send_event(writer, event, data)
+                if event == "done":
+                    return
+        except (ConnectionError, asyncio.CancelledError):
+            # The client went away, stop its search at the next navigation boundary
+            job.cancel()
+            raise
+
+    async def send_event(self, writer, event, data):
+        writer.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        await writer.drain()
+
+    async def respond(self, writer, status, payload, content_type="application/json"):
+        body = (payload if isinstance(payload, str) else json.dumps(payload)).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        logger.info(f"Serving lookups on http://{host}:{port} with {len(self.searches)} workers")
+        async with server:
+            await server.serve_forever()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve previous generation lookups over HTTP")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Lookups run at once, one browser session each")
+    parser.add_argument("--max-queued", type=int, default=MAX_QUEUED)
+    parser.add_argument("--backend", choices=["selenium", "http", "snapshot"], default="selenium")
+    parser.add_argument("--snapshot", default=DEFAULT_SNAPSHOT_PATH, help="Snapshot database for --backend snapshot")
+    parser.add_argument("--pool-size", type=int, default=1, help="Extra sessions per worker for parallel lookups")
+    parser.add_argument("--max-tabs", type=int, default=DEFAULT_MAX_TABS)
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--lean", action="store_true", help="Skip images, fonts, ads and trackers in the browser")
+    parser.add_argument("--generations", action="store_true",
+                        help="Bisect the true generation boundaries instead of trusting the given year ranges")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    service = SearchService(workers=args.workers, max_queued=args.max_queued,
+                            pool_size=args.pool_size, cache_path=args.cache_path, backend=args.backend,
+                            lean=args.lean, snapshot_path=args.snapshot, max_tabs=args.max_tabs,
+                            find_generations=args.generations)
+    service.start()
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,93 @@
+"""
+Request coalescing for catalog lookups.
+
+Calls with the same key while one is running wait for it and share its result
+instead of driving a browser of their own. Finished results are kept for a
+short while, so repeats later in the same search or batch are answered too.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Long enough to span one search or a batch of related part numbers; the lookup
+# cache keeps results for longer when it is enabled
+DEFAULT_REMEMBER = 10 * 60
+DEFAULT_MAX_RESULTS = 5000
+
+
+class Call:
+    """One in-flight lookup and the outcome its followers receive."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Keyed single-flight: do(key, fn) runs fn once per key at a time. None
+    results and exceptions are handed to the calls already waiting but not
+    remembered, so a failed lookup is retried by the next caller. Exceptions in
+    retry_on belong to the leading caller rather than the lookup (its search was
+    cancelled); a waiting call then runs the lookup itself instead of failing.
+    """
+
+    def __init__(self, remember=DEFAULT_REMEMBER, max_results=DEFAULT_MAX_RESULTS, retry_on=()):
+        self.remember = remember
+        self.max_results = max_results
+        self.retry_on = tuple(retry_on)
+        self.shared = 0
+        self._calls = {}
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                remembered = self._results.get(key)
+                if remembered is not None and remembered[1] > now:
+                    self.shared += 1
+                    return remembered[0]
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = Call()
+                else:
+                    self.shared += 1
+
+            if leader:
+                break
+            logger.debug(f"Waiting for the in-flight lookup {key}")
+            call.done.wait()
+            if isinstance(call.error, self.retry_on):
+                logger.debug(f"The lookup {key} was stopped by its caller, running it again")
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and call.result is not None and self.remember:
+                    self._results[key] = (call.result, time.monotonic() + self.remember)
+                    self._results.move_to_end(key)
+                    while len(self._results) > self.max_results:
+                        self._results.popitem(last=False)
+            call.done.set()
+        return call.result
+
+    def forget(self):
+        """Drop every remembered result, e.g. after the catalog was re-read"""
+        with self._lock:
+            self._results.clear()
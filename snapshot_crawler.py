@@ -0,0 +1,194 @@
+"""
+Crawler that fills a catalog snapshot, resumable and incrementally refreshed.
+
+    python snapshot_crawler.py crawl --make Honda --make Toyota --backend http
+    python snapshot_crawler.py refresh --max-age-days 14 --window 1-5
+    python snapshot_crawler.py stats
+    python batch_cli.py parts.txt --backend snapshot
+
+It walks make -> year -> model -> engine -> Brake & Wheel Hub -> Wheel Bearing
+& Hub. Every catalog page is a row in crawl_nodes with its own status, so an
+interrupted crawl resumes where it stopped. A refresh queues the pages older
+than the maximum age again and re-walks only those; run it from cron during
+off hours, or give it a --window of local hours to stay inside.
+"""
+import argparse
+import logging
+import time
+
+from catalog_search import CatalogSearch
+from catalog_snapshot import CatalogSnapshot, DEFAULT_SNAPSHOT_PATH, normalize
+from driver_pool import DEFAULT_POOL_SIZE
+from http_backend import BASE_URL, CATALOG_PATH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE = 14 * 24 * 3600
+
+# Path segments of each kind of catalog page, e.g. honda,2009,accord,2.4l+l4,1441370
+KIND_DEPTH = {"root": 0, "make": 1, "year": 2, "model": 3, "engine": 5}
+CHILD_KIND = {"root": "make", "make": "year", "year": "model", "model": "engine"}
+
+
+class SnapshotCrawler:
+    """Walks the catalog with a CatalogSearch's backend and fills a CatalogSnapshot."""
+
+    def __init__(self, search, snapshot, preferred_only=True):
+        self.search = search
+        self.snapshot = snapshot
+        self.preferred_only = preferred_only
+
+    def seed(self, makes=None):
+        """Queue the catalog root, or just the given makes"""
+        if not makes:
+            self.snapshot.add_nodes([self.node(CATALOG_PATH, "root")])
+            return
+        self.snapshot.add_nodes([self.node(f"{CATALOG_PATH}{normalize(make).replace(' ', '+')}", "make",
+                                           make=normalize(make), label=make) for make in makes])
+
+    def node(self, path, kind, make=None, year=None, model=None, engine=None, label=None):
+        return {"path": path, "kind": kind, "make": make, "year": year, "model": model,
+                "engine": engine, "label": label}
+
+    def children(self, node, links):
+        """Child pages of a catalog page, from its links"""
+        kind = CHILD_KIND[node["kind"]]
+        depth = KIND_DEPTH[kind]
+        prefix = self.search.catalog_path_parts(node["path"]) or []
+        children = {}
+        for text, href in links:
+            parts = self.search.catalog_path_parts(href)
+            if not parts or len(parts) != depth or parts[:len(prefix)] != prefix or not text:
+                continue
+            path = CATALOG_PATH + ",".join(parts)
+            if kind == "make":
+                children[path] = self.node(path, kind, make=normalize(text), label=text)
+            elif kind == "year" and parts[1].isdigit():
+                children[path] = self.node(path, kind, make=node["make"], year=int(parts[1]), label=node["label"])
+            elif kind == "model":
+                children[path] = self.node(path, kind, make=node["make"], year=node["year"],
+                                           model=normalize(text), label=f"{node['label']}|{text}")
+            elif kind == "engine":
+                # Same text as the engine rows of the search box autocomplete
+                engine = normalize(f"{node['make']} {node['model']} {node['year']} {text}")
+                children[path] = self.node(path, kind, make=node["make"], year=node["year"], model=node["model"],
+                                           engine=engine, label=node["label"])
+        return list(children.values())
+
+    def visit(self, driver, node):
+        """Read one page: child links for tree pages, listing rows for engines"""
+        if node["kind"] != "engine":
+            return self.search.catalog_links(node["path"], driver)
+        # The engine page is known, no need to find it again from the model page
+        return self.search.engine_listing_rows(driver, node["path"], node["engine"])
+
+    def crawl(self, max_nodes=None, until=None):
+        """
+        Process pending pages a pool-sized batch at a time until none are left,
+        max_nodes were visited or the until() callback returns True.
+        Returns the number of pages visited.
+        """
+        visited = 0
+        batch_size = max(self.search.pool_size, 1)
+        while max_nodes is None or visited < max_nodes:
+            if until and until():
+                logger.info("Crawl window closed, stopping")
+                break
+            limit = batch_size if max_nodes is None else min(batch_size, max_nodes - visited)
+            nodes = self.snapshot.pending_nodes(limit)
+            if not nodes:
+                break
+            results = self.search.map_lookups(lambda driver, node: self.safe_visit(driver, node), nodes)
+            for node, result in zip(nodes, results):
+                self.record(node, result)
+            visited += len(nodes)
+            logger.info(f"Crawled {visited} pages, {self.snapshot.stats()['nodes']}")
+        return visited
+
+    def safe_visit(self, driver, node):
+        try:
+            return self.visit(driver, node)
+        except Exception as e:
+            logger.error(f"Could not crawl {node['path']}: {str(e)}")
+            return None
+
+    def record(self, node, result):
+        if result is None:
+            self.snapshot.finish_node(node["path"], failed=True)
+            return
+        if node["kind"] == "engine":
+            rows = result
+            if self.preferred_only:
+                rows = [row for row in rows
+                        if any(brand in row["text"].lower() for brand in self.search.preferred_manufacturers)]
+            display_make, _, display_model = (node["label"] or "").partition("|")
+            self.snapshot.store_listing(node, display_make or node["make"].title(),
+                                        display_model or node["model"].title(), rows)
+        else:
+            self.snapshot.add_nodes(self.children(node, result))
+        self.snapshot.finish_node(node["path"])
+
+
+def hour_window(spec):
+    """until() callback for an 'start-end' local hour window such as '1-5' (may wrap midnight)"""
+    start, end = (int(hour) for hour in spec.split("-"))
+
+    def outside():
+        hour = time.localtime().tm_hour
+        inside = start <= hour < end if start <= end else hour >= start or hour < end
+        return not inside
+    return outside
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Crawl the catalog into a local snapshot")
+    parser.add_argument("--snapshot", default=DEFAULT_SNAPSHOT_PATH, help="Snapshot database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("crawl", "Start or resume a crawl"),
+                            ("refresh", "Re-crawl pages older than --max-age-days")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--make", action="append", help="Only crawl this make, may be repeated")
+        command.add_argument("--backend", choices=["selenium", "http"], default="http")
+        command.add_argument("--base-url", default=BASE_URL, help="Catalog site to crawl")
+        command.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+        command.add_argument("--max-nodes", type=int, help="Stop after this many pages")
+        command.add_argument("--window", help="Only crawl between these local hours, e.g. 1-5")
+        command.add_argument("--all-manufacturers", action="store_true",
+                             help="Keep every listing, not just the preferred manufacturers")
+        if name == "refresh":
+            command.add_argument("--max-age-days", type=float, default=DEFAULT_MAX_AGE / 86400)
+
+    commands.add_parser("stats", help="Show crawl progress and snapshot size")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    snapshot = CatalogSnapshot(args.snapshot)
+    try:
+        if args.command == "stats":
+            print(snapshot.stats())
+            return 0
+
+        search = CatalogSearch(pool_size=args.pool_size, backend=args.backend, base_url=args.base_url)
+        try:
+            if not search.http_backend and not search.setup_driver(headless=True):
+                return 1
+            crawler = SnapshotCrawler(search, snapshot, preferred_only=not args.all_manufacturers)
+            crawler.seed(args.make)
+            if args.command == "refresh":
+                stale = snapshot.mark_stale(args.max_age_days * 86400)
+                logger.info(f"Queued {stale} pages for refresh")
+            crawler.crawl(max_nodes=args.max_nodes, until=hour_window(args.window) if args.window else None)
+            print(snapshot.stats())
+        finally:
+            search.close()
+    finally:
+        snapshot.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
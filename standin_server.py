@@ -0,0 +1,148 @@
+"""
+Local stand-in for the catalog site that serves recorded pages.
+
+A recording directory holds the saved pages plus a routes.json file:
+
+    [
+        {"method": "GET", "path": "/en/partsearch/?partnum=513121", "file": "partsearch_513121.html"},
+        {"method": "POST", "path": "/catalog/catalogapi.php", "body_contains": ["honda accord"],
+         "file": "autocomplete_honda_accord.html"}
+    ]
+
+Routes are matched in order on method, exact path (including the query
+string) and, optionally, substrings of the URL-decoded request body.
+"status", "content_type" and "delay" (seconds) may also be set per route.
+
+Run with: python standin_server.py <recording_dir> [--port 8000]
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote_plus
+
+logger = logging.getLogger(__name__)
+
+
+class RecordedRoutes:
+    """Route table loaded from a recording directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "routes.json"), encoding="utf-8") as f:
+            self.routes = json.load(f)
+
+    def match(self, method, path, body=""):
+        decoded = unquote_plus(body).lower()
+        for route in self.routes:
+            if route.get("method", "GET").upper() != method:
+                continue
+            if route["path"] != path:
+                continue
+            if all(fragment.lower() in decoded for fragment in route.get("body_contains", [])):
+                return route
+        return None
+
+    def read(self, route):
+        with open(os.path.join(self.directory, route["file"]), "rb") as f:
+            return f.read()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes, don't let Nagle hold the body back on keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.respond("GET", "")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8", errors="replace") if length else ""
+        self.respond("POST", body)
+
+    def respond(self, method, body):
+        server = self.server
+        server.record(method, self.path)
+        route = server.routes.match(method, self.path, body)
+        if route is None:
+            payload = f"No recording for {method} {self.path}".encode("utf-8")
+            status, content_type = 404, "text/plain; charset=utf-8"
+        else:
+            payload = server.routes.read(route)
+            status = route.get("status", 200)
+            content_type = route.get("content_type", "text/html; charset=utf-8")
+            if route.get("delay"):
+                time.sleep(route["delay"])
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        if route is not None and route.get("location"):
+            self.send_header("Location", route["location"])
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """HTTP server replaying a recording directory, counting requests per path."""
+
+    daemon_threads = True
+
+    def __init__(self, directory, host="127.0.0.1", port=0):
+        super().__init__((host, port), StandInHandler)
+        self.routes = RecordedRoutes(directory)
+        self.requests = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, method, path):
+        with self._lock:
+            self.requests.append((method, path))
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests.clear()
+
+    def start(self):
+        """Serve on a background thread and return the base URL."""
+        self._thread = threading.Thread(target=self.serve_forever, name="standin-server", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded catalog pages locally")
+    parser.add_argument("directory", help="Recording directory containing routes.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = StandInServer(args.directory, host=args.host, port=args.port)
+    logger.info(f"Serving {args.directory} at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
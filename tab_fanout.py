@@ -0,0 +1,213 @@
+"""
+Run several browser flows at once in tabs of a single WebDriver session.
+
+A flow is written as a generator of steps instead of blocking calls:
+
+    def steps(driver):
+        yield Load(url)
+        element = yield Wait(EC.presence_of_element_located(LOCATOR), "page")
+        ...
+        return result
+
+CatalogSearch.run_steps() drives one flow on the current tab, blocking on each
+step exactly like the plain Selenium calls would. TabFanout drives many flows,
+one tab each: navigations are started without waiting for them, and while a
+page loads the scheduler moves on to the next tab, so the pages load in
+parallel without paying for extra Chrome processes.
+
+Required waits that time out raise TimeoutException inside the flow, optional
+ones (required=False) send None back, mirroring AdaptiveWaiter.until/poll.
+"""
+import logging
+import time
+from collections import deque
+from typing import Any, NamedTuple
+
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException,
+                                        TimeoutException)
+
+from waits import POLL_FREQUENCY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TABS = 4
+
+# Navigations are dispatched by script so they do not block the session. The
+# marker survives until the new document replaces the old one, so a tab is not
+# checked against the page it is leaving.
+LEAVE_SCRIPT = ("document.documentElement.setAttribute('data-leaving', '1');"
+                "window.location.href = arguments[0];")
+ARRIVED_SCRIPT = ("return document.readyState !== 'loading'"
+                  " && !document.documentElement.hasAttribute('data-leaving');")
+
+
+class Load(NamedTuple):
+    """Step: navigate the flow's tab to url"""
+    url: str
+
+
+class Wait(NamedTuple):
+    """Step: wait for condition(driver); the flow receives its value"""
+    condition: Any
+    stage: str
+    required: bool = True
+
+
+class Tab:
+    """One flow in progress: its window handle, generator and pending step."""
+
+    def __init__(self, key, handle, steps):
+        self.key = key
+        self.handle = handle
+        self.steps = steps
+        self.step = None
+        self.deadline = None
+        self.navigating = False
+        # URL waiting for a limiter slot, and when the slot held for a navigation was taken
+        self.queued_url = None
+        self.slot_taken = None
+        self.done = False
+        self.result = None
+
+
+class TabFanout:
+    """
+    Drives flows in up to max_tabs tabs of one driver and hands their results
+    back as they finish. Wait timeouts are the waiter's stage timeouts scaled by
+    the number of open tabs, since every tab shares the session's time.
+    """
+
+    def __init__(self, driver, waiter, max_tabs=DEFAULT_MAX_TABS, check=None, limiter=None):
+        self.driver = driver
+        self.waiter = waiter
+        self.max_tabs = max(1, max_tabs)
+        # Called between steps, e.g. to raise when the search was cancelled
+        self.check = check
+        # Optional rate_control.AdaptiveLimiter; a navigation holds a slot until its page arrives
+        self.limiter = limiter
+
+    def run(self, jobs):
+        """
+        Yield (key, result) for every (key, make_steps) job in completion order;
+        make_steps() returns the flow's step generator. Flows that fail log the
+        error and yield None. Closing this generator early closes the tabs
+        still running, and the driver is always left on its original tab.
+        """
+        driver = self.driver
+        origin = driver.current_window_handle
+        pending = deque(jobs)
+        active = []
+        try:
+            while pending or active:
+                while pending and len(active) < self.max_tabs:
+                    key, make_steps = pending.popleft()
+                    driver.switch_to.new_window("tab")
+                    tab = Tab(key, driver.current_window_handle, make_steps())
+                    active.append(tab)
+                    self.advance(tab, tab.steps.send, None, len(active))
+
+                progressed = False
+                for tab in list(active):
+                    if self.check:
+                        self.check()
+                    if not tab.done:
+                        driver.switch_to.window(tab.handle)
+                        progressed |= self.poll(tab, len(active))
+                    if tab.done:
+                        progressed = True
+                        active.remove(tab)
+                        self.close_tab(tab, origin)
+                        yield tab.key, tab.result
+                if not progressed:
+                    time.sleep(POLL_FREQUENCY)
+        finally:
+            for tab in active:
+                self.close_tab(tab, origin)
+            try:
+                driver.switch_to.window(origin)
+            except Exception as e:
+                logger.error(f"Could not return to the original tab: {str(e)}")
+
+    def advance(self, tab, method, value, open_tabs):
+        """Resume the flow with method(value) and run it up to its next wait"""
+        while True:
+            try:
+                step = method(value)
+            except StopIteration as done:
+                tab.done, tab.result = True, done.value
+                return
+            except Exception as e:
+                logger.error(f"Tab flow for {tab.key} failed: {str(e)}")
+                tab.done, tab.result = True, None
+                return
+            if isinstance(step, Load):
+                tab.queued_url = step.url
+                self.navigate(tab)
+                method, value = tab.steps.send, None
+                continue
+            tab.step = step
+            tab.deadline = time.monotonic() + self.waiter.timeout_for(step.stage) * open_tabs
+            return
+
+    def navigate(self, tab):
+        """Start the tab's queued navigation once the limiter has a free slot"""
+        # A navigation that never arrived gives its slot up to the next one
+        self.release_slot(tab)
+        if self.limiter:
+            if not self.limiter.try_acquire():
+                return
+            tab.slot_taken = time.monotonic()
+            if tab.step:
+                # Time spent queued for the slot does not count against the wait
+                tab.deadline = time.monotonic() + self.waiter.timeout_for(tab.step.stage) * self.max_tabs
+        self.driver.execute_script(LEAVE_SCRIPT, tab.queued_url)
+        tab.queued_url = None
+        tab.navigating = True
+
+    def release_slot(self, tab, arrived=False, timed_out=False):
+        if tab.slot_taken is None:
+            return
+        latency = time.monotonic() - tab.slot_taken if arrived else None
+        tab.slot_taken = None
+        self.limiter.release("page_load", latency, timed_out=timed_out)
+
+    def poll(self, tab, open_tabs):
+        """Check the tab's pending wait once; True if the flow moved on"""
+        driver = self.driver
+        step = tab.step
+        try:
+            if tab.queued_url:
+                self.navigate(tab)
+            if tab.navigating:
+                tab.navigating = not driver.execute_script(ARRIVED_SCRIPT)
+                if not tab.navigating:
+                    self.release_slot(tab, arrived=True)
+            value = False if tab.navigating or tab.queued_url else step.condition(driver)
+        except (NoSuchElementException, StaleElementReferenceException):
+            value = False
+
+        if value:
+            self.advance(tab, tab.steps.send, value, open_tabs)
+            return True
+        if tab.queued_url or time.monotonic() < tab.deadline:
+            return False
+        # A page that never arrived is the site slowing down
+        self.release_slot(tab, timed_out=tab.navigating)
+        # Counted as a full wait of the stage's timeout, the tabs only shared the polling
+        self.waiter.record(step.stage, self.waiter.timeout_for(step.stage), timed_out=True)
+        logger.info(f"Tab for {tab.key} timed out waiting for {step.stage}")
+        if step.required:
+            self.advance(tab, tab.steps.throw, TimeoutException(f"Timed out waiting for {step.stage}"), open_tabs)
+        else:
+            self.advance(tab, tab.steps.send, None, open_tabs)
+        return True
+
+    def close_tab(self, tab, origin):
+        self.release_slot(tab)
+        tab.steps.close()
+        try:
+            self.driver.switch_to.window(tab.handle)
+            self.driver.close()
+            self.driver.switch_to.window(origin)
+        except Exception as e:
+            logger.error(f"Could not close the tab for {tab.key}: {str(e)}")
@@ -0,0 +1,28 @@
+import io
+import json
+
+from batch_cli import BatchSearch, JsonlWriter, read_lines, run_batch
+from job_journal import JobJournal
+
+
+class CancelledSearch(BatchSearch):
+    """Every search is cancelled part way, like a service job whose client went away"""
+
+    def perform_part_number_search(self, text):
+        self.cancel()
+        self.check_cancelled()
+
+
+def test_cancelled_lines_are_journaled_as_cancelled_and_searched_again(tmp_path):
+    search = CancelledSearch(cache_path=None, backend="http", base_url="http://127.0.0.1:9")
+    journal = JobJournal(str(tmp_path / "job.journal"))
+    output = io.StringIO()
+    try:
+        run_batch(read_lines(io.StringIO("513121\n")), JsonlWriter(output), search, journal)
+        assert journal.stats() == {"cancelled": 1}
+        assert journal.completed(1, "513121") is None
+    finally:
+        journal.close()
+        search.close()
+    record = json.loads(output.getvalue())
+    assert record["error"] == "Search cancelled" and record["cancelled"] is True
@@ -0,0 +1,78 @@
+from catalog_search import AUTOCOMPLETE_ROWS_XPATH, AUTOCOMPLETE_TABLE, CatalogSearch
+from lookup_cache import MISS
+
+
+class FakeInput:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def send_keys(self, text):
+        self.driver.typed = text
+
+
+class FakeDriver:
+    """A catalog page whose search box answers with rows, an empty table, or nothing (None)"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.typed = None
+        self.loads = []
+        self.page_source = "<html></html>"
+        self.profile_dir = None
+
+    def get(self, url):
+        self.loads.append(url)
+        self.typed = None
+
+    def find_element(self, by, value):
+        return FakeInput(self)
+
+    def find_elements(self, by, value):
+        answered = self.typed is not None and self.rows is not None
+        if value == AUTOCOMPLETE_TABLE[1]:
+            return [object()] if answered else []
+        return [object()] * len(self.rows) if answered else []
+
+    def execute_script(self, script, xpath):
+        assert xpath == AUTOCOMPLETE_ROWS_XPATH
+        return list(self.rows)
+
+    def quit(self):
+        pass
+
+
+def make_search(tmp_path, rows):
+    search = CatalogSearch(cache_path=str(tmp_path / "cache.sqlite3"))
+    search.waiter.defaults["autocomplete"] = 0.3
+    search.driver = FakeDriver(rows)
+    return search
+
+
+def test_autocomplete_rows_are_read_once_settled(tmp_path):
+    search = make_search(tmp_path, ["Vehicles", "HONDA ACCORD 2008", "HONDA ACCORD 2009"])
+    assert search.check_previous_year_model("Honda", "Accord", 2009) is True
+    assert search.state.failures == []
+    assert search.cache_get("previous_year", "Honda", "Accord", "2008") is True
+    search.close()
+
+
+def test_empty_suggestion_table_is_an_answer(tmp_path):
+    search = make_search(tmp_path, [])
+    assert search.check_previous_year_model("Honda", "Accord", 2009) is False
+    assert search.state.failures == []
+    assert search.cache_get("previous_year", "Honda", "Accord", "2008") is False
+    search.close()
+
+
+def test_autocomplete_that_never_answers_fails_the_lookup(tmp_path):
+    search = make_search(tmp_path, None)
+    limit = search.limiter.limit
+    assert search.check_previous_year_model("Honda", "Accord", 2009) is False
+    assert len(search.state.failures) == 1 and "TimeoutException" in search.state.failures[0]
+    # Nothing is cached or remembered, the next lookup asks the site again
+    assert search.cache_get("previous_year", "Honda", "Accord", "2008") is MISS
+    search.driver.rows = ["HONDA ACCORD 2008"]
+    assert search.check_previous_year_model("Honda", "Accord", 2009) is True
+    # Waiting for suggestions is not a request, the request limit is untouched
+    assert search.limiter.limit == limit
+    search.close()
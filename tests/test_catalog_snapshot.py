@@ -0,0 +1,98 @@
+import pytest
+
+from benchmark_site import build_site
+from catalog_search import CatalogSearch
+from catalog_snapshot import CatalogSnapshot, SnapshotBackend
+from snapshot_crawler import SnapshotCrawler
+from standin_server import StandInServer
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    snapshot = CatalogSnapshot(str(tmp_path / "snapshot.sqlite3"))
+    yield snapshot
+    snapshot.close()
+
+
+@pytest.fixture
+def backend(snapshot):
+    for year in (2010, 2011):
+        node = {"make": "chevrolet", "model": "silverado 1500", "year": year,
+                "engine": f"chevrolet silverado 1500 {year} 5.3l v8"}
+        snapshot.store_listing(node, "Chevrolet", "Silverado 1500", [
+            {"manufacturer": "MOOG", "part_number": "515036", "drive_info": "Front; 4WD",
+             "text": "MOOG 515036 Front; 4WD"}])
+    return SnapshotBackend(snapshot)
+
+
+def test_autocomplete_answers_like_the_search_box(backend):
+    assert backend.autocomplete("chevrolet silverado 1500") == ["CHEVROLET SILVERADO 1500 2010",
+                                                               "CHEVROLET SILVERADO 1500 2011"]
+    assert backend.autocomplete("chevrolet silverado 1500 2011") == ["chevrolet silverado 1500 2011 5.3l v8"]
+    assert backend.autocomplete("chevrolet tahoe") == []
+
+
+def test_autocomplete_matches_any_spelling(backend):
+    assert backend.autocomplete("Chevy Silverado-1500") == ["CHEVROLET SILVERADO 1500 2010",
+                                                           "CHEVROLET SILVERADO 1500 2011"]
+
+
+def test_listing_rows_match_any_spelling(backend):
+    rows = backend.listing_rows("Chevy", "Silverado-1500", 2010, "chevrolet silverado 1500 2010 5.3l v8")
+    assert [row["part_number"] for row in rows] == ["515036"]
+
+
+def test_listing_rows_and_part_search(backend):
+    rows = backend.listing_rows("Chevrolet", "Silverado 1500", 2010, "chevrolet silverado 1500 2010 5.3l v8")
+    assert [row["part_number"] for row in rows] == ["515036"]
+    assert [listing["manufacturer"] for listing in backend.part_search("515036")] == ["MOOG"]
+
+
+def test_buyers_guide_folds_years(backend):
+    assert backend.buyers_guide({"part_number": "515036", "manufacturer": "MOOG"}) == [
+        ("Chevrolet", "Silverado 1500", "2010-2011")]
+
+
+def test_storing_a_listing_again_replaces_it(backend, snapshot):
+    node = {"make": "chevrolet", "model": "silverado 1500", "year": 2010,
+            "engine": "chevrolet silverado 1500 2010 5.3l v8"}
+    snapshot.store_listing(node, "Chevrolet", "Silverado 1500", [])
+    assert backend.listing_rows("Chevrolet", "Silverado 1500", 2010, node["engine"]) == []
+    assert snapshot.stats()["parts"] == 1
+
+
+def test_failed_pages_are_retried_until_max_attempts(snapshot):
+    snapshot.add_nodes([{"path": "/en/catalog/honda", "kind": "make", "make": "honda", "year": None,
+                         "model": None, "engine": None, "label": "Honda"}])
+    for _ in range(3):
+        assert len(snapshot.pending_nodes(10)) == 1
+        snapshot.finish_node("/en/catalog/honda", failed=True)
+    assert snapshot.pending_nodes(10) == []
+    assert snapshot.mark_stale(0) == 1
+
+
+def test_crawl_fills_the_snapshot_from_the_catalog(tmp_path, snapshot):
+    directory = build_site(str(tmp_path / "site"), {"vehicles": [{
+        "make": "Jeep", "model": "Grand Cherokee", "years": [2011, 2012],
+        "engines": {"3.6L V6": [("MOOG", "513271", "Front")], "5.7L V8": [("Generic", "X1", "Front")]},
+    }]})
+    server = StandInServer(directory)
+    search = CatalogSearch(cache_path=None, backend="http", base_url=server.start(), pool_size=2)
+    try:
+        crawler = SnapshotCrawler(search, snapshot)
+        crawler.seed(["Jeep"])
+        assert crawler.crawl() == 1 + 2 + 2 + 4
+        # Every catalog page is read once: make, years, models, then each engine's three pages
+        assert len(server.requests) == 1 + 2 + 2 + 4 * 3
+    finally:
+        search.close()
+        server.stop()
+
+    assert snapshot.stats()["nodes"] == {"done": 9}
+    offline = SnapshotBackend(snapshot)
+    assert offline.autocomplete("jeep grand cherokee") == ["JEEP GRAND CHEROKEE 2011", "JEEP GRAND CHEROKEE 2012"]
+    # Only the preferred manufacturers' rows are kept
+    assert snapshot.stats()["parts"] == 2
+    # Names are shown the way the catalog's links spell them
+    assert offline.buyers_guide({"part_number": "513271", "manufacturer": "MOOG"}) == [
+        ("Jeep", "GRAND CHEROKEE", "2011-2012")]
@@ -0,0 +1,130 @@
+import os
+import socket
+
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import driver_pool
+from driver_pool import DriverPool, claim_profile_dir, profile_in_use, release_profile_dir, session_lost
+
+
+class FakeDriver:
+    profile_dir = None
+
+    def __init__(self):
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_pool(size=1):
+    created = []
+
+    def factory(headless=True):
+        created.append(FakeDriver())
+        return created[-1]
+
+    return DriverPool(size=size, factory=factory), created
+
+
+def test_session_lost_tells_browser_errors_from_page_errors():
+    assert session_lost(WebDriverException("chrome not reachable"))
+    assert not session_lost(TimeoutException("page did not load"))
+    assert not session_lost(ValueError("not a WebDriver error"))
+
+
+def test_sessions_are_reused():
+    pool, created = make_pool()
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        pass
+    assert first is second and len(created) == 1
+
+
+def test_lost_session_is_replaced():
+    pool, created = make_pool()
+    with pytest.raises(WebDriverException):
+        with pool.session():
+            raise WebDriverException("chrome not reachable")
+    assert created[0].quit_called
+    with pool.session() as driver:
+        assert driver is created[1]
+    assert pool.drivers() == [created[1]]
+
+
+def test_page_errors_keep_the_session():
+    pool, created = make_pool()
+    with pytest.raises(TimeoutException):
+        with pool.session():
+            raise TimeoutException("slow page")
+    with pool.session() as driver:
+        assert driver is created[0]
+    assert not created[0].quit_called
+
+
+def test_session_marked_broken_is_replaced_when_handed_back():
+    pool, created = make_pool()
+    with pool.session() as driver:
+        pool.mark_broken(driver)
+    assert created[0].quit_called
+    with pool.session() as driver:
+        assert driver is created[1]
+
+
+def test_mark_broken_ignores_sessions_of_other_pools():
+    pool, created = make_pool()
+    pool.mark_broken(FakeDriver())
+    with pool.session():
+        pass
+    assert not created[0].quit_called
+
+
+def test_map_keeps_item_order():
+    pool, created = make_pool(size=3)
+    assert pool.map(lambda driver, item: item * 2, range(10)) == [item * 2 for item in range(10)]
+    assert len(created) <= 3
+    pool.close()
+    assert all(driver.quit_called for driver in created)
+
+
+def lock_profile(path, owner):
+    os.makedirs(path, exist_ok=True)
+    os.symlink(owner, os.path.join(path, "SingletonLock"))
+
+
+def dead_pid():
+    pid = 999999
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return pid
+        except PermissionError:
+            pass
+        pid -= 1
+
+
+def test_profile_lock_owner_is_checked(tmp_path):
+    host = socket.gethostname()
+    assert not profile_in_use(str(tmp_path / "unused"))
+    lock_profile(str(tmp_path / "live"), f"{host}-{os.getpid()}")
+    assert profile_in_use(str(tmp_path / "live"))
+    lock_profile(str(tmp_path / "stale"), f"{host}-{dead_pid()}")
+    assert not profile_in_use(str(tmp_path / "stale"))
+    lock_profile(str(tmp_path / "remote"), f"other-host-{os.getpid()}")
+    assert profile_in_use(str(tmp_path / "remote"))
+
+
+def test_claimed_profiles_are_reused_once_released(tmp_path):
+    root = str(tmp_path)
+    lock_profile(os.path.join(root, "session-0"), f"{socket.gethostname()}-{os.getpid()}")
+    first = claim_profile_dir(root)
+    second = claim_profile_dir(root)
+    assert [os.path.basename(first), os.path.basename(second)] == ["session-1", "session-2"]
+    release_profile_dir(first)
+    assert claim_profile_dir(root) == first
+    for path in (first, second):
+        release_profile_dir(path)
+    assert not driver_pool._claimed_profiles & {first, second}
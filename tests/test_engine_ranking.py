@@ -0,0 +1,47 @@
+from catalog_search import CatalogSearch
+from engine_ranking import EngineRanking, engine_variant
+from lookup_cache import LookupCache
+
+ENGINES = ["FORD F-150 2012 3.5L V6", "FORD F-150 2012 5.0L V8", "FORD F-150 2012 6.2L V8"]
+
+
+def test_engine_variant_drops_make_model_and_year():
+    assert engine_variant("Ford", "F-150", 2012, "FORD F-150 2012 5.0L V8") == "5.0l v8"
+
+
+def test_engines_that_hit_before_are_read_first():
+    ranking = EngineRanking()
+    assert ranking.order("Ford", "F-150", 2012, ENGINES) == ENGINES
+    ranking.record("Ford", "F-150", 2011, {"FORD F-150 2011 3.5L V6": None,
+                                           "FORD F-150 2011 5.0L V8": ("K80673", "MOOG")},
+                   winner="FORD F-150 2011 5.0L V8")
+    # A known miss ranks below a variant never read
+    assert ranking.order("Ford", "F-150", 2012, ENGINES) == [ENGINES[1], ENGINES[2], ENGINES[0]]
+
+
+def test_stats_count_parts_picked_per_manufacturer():
+    ranking = EngineRanking()
+    ranking.record("Ford", "F-150", 2012, {ENGINES[0]: ("K80673", "MOOG")}, winner=ENGINES[0])
+    ranking.record("Ford", "F-150", 2012, {ENGINES[0]: None, ENGINES[1]: ("HA590", "TIMKEN")}, winner=ENGINES[1])
+    ranking.record("Honda", "Accord", 2009, {"HONDA ACCORD 2009 2.4L L4": ("K500", "MOOG")},
+                   winner="HONDA ACCORD 2009 2.4L L4")
+    ranking.record("Honda", "Civic", 2009, {"HONDA CIVIC 2009 1.8L L4": None})
+    assert ranking.stats() == {"lookups": 4, "hits": 3, "engines_visited": 4, "average_visited": 1.33,
+                               "manufacturers": {"MOOG": 2, "TIMKEN": 1}}
+    assert ranking.manufacturers("Ford", "F-150") == {"MOOG": 1, "TIMKEN": 1}
+
+
+def test_manufacturer_counts_are_kept_in_the_cache(tmp_path):
+    cache = LookupCache(str(tmp_path / "cache.sqlite3"))
+    EngineRanking(cache).record("Ford", "F-150", 2012, {ENGINES[0]: ("K80673", "MOOG")}, winner=ENGINES[0])
+    assert EngineRanking(cache).manufacturers("ford", "F150") == {"MOOG": 1}
+    cache.close()
+
+
+def test_manufacturer_counts_leave_the_preferred_order_alone(tmp_path):
+    search = CatalogSearch(cache_path=str(tmp_path / "cache.sqlite3"))
+    search.engine_ranking.record("Ford", "F-150", 2012, {ENGINES[0]: ("HA590", "TIMKEN")}, winner=ENGINES[0])
+    rows = [{"text": "TIMKEN HA590 Front", "part_number": "HA590", "manufacturer": "TIMKEN"},
+            {"text": "MOOG K80673 Front", "part_number": "K80673", "manufacturer": "MOOG"}]
+    assert search.match_position_rows(rows, ["front"]) == ("K80673", "MOOG")
+    search.close()
@@ -0,0 +1,98 @@
+from generations import GenerationFinder, fitment_fingerprint
+from lookup_cache import MISS
+from tracing import Tracer
+
+PREFERRED = ["moog", "timken"]
+
+
+def listing(part_number, drive_info="Front", manufacturer="MOOG"):
+    return [{"manufacturer": manufacturer, "part_number": part_number, "drive_info": drive_info,
+             "text": f"{manufacturer} {part_number} {drive_info}"}]
+
+
+class FakeYearIndex:
+    def __init__(self, years):
+        self._years = years
+
+    def years(self, make, model):
+        return self._years
+
+
+class FakeSearch:
+    """The parts of CatalogSearch GenerationFinder reads, over a {year: part number} catalog"""
+
+    preferred_manufacturers = PREFERRED
+
+    def __init__(self, parts, indexed=True):
+        self.parts = parts
+        self.year_index = FakeYearIndex(sorted(parts) if indexed else None)
+        self.tracer = Tracer()
+        self.cache = {}
+        self.probed = []
+
+    def cache_get(self, namespace, *key_parts):
+        return self.cache.get((namespace, *key_parts), MISS)
+
+    def cache_set(self, namespace, key_parts, value, **kwargs):
+        self.cache[(namespace, *key_parts)] = value
+
+    def lookup_previous_year(self, make, model, year, driver=None):
+        return None
+
+    def fetch_engines(self, make, model, year, driver=None):
+        return ["2.4l l4"] if int(year) in self.parts else []
+
+    def listings_as_completed(self, make, model, year, engines, driver=None):
+        self.probed.append(int(year))
+        for engine in engines:
+            yield engine, listing(self.parts[int(year)])
+
+
+def catalog(first, last, generations):
+    """{year: part number} where generations are (start, end, part number) and other years use "OTHER" """
+    parts = {year: "OTHER" for year in range(first, last + 1)}
+    for start, end, part_number in generations:
+        parts.update({year: part_number for year in range(start, end + 1)})
+    return parts
+
+
+def test_fingerprint_keeps_preferred_manufacturers_only():
+    listings = {"a": listing("513121") + listing("X1", manufacturer="Generic"), "b": listing("513121")}
+    assert fitment_fingerprint(listings, PREFERRED) == (("front", "513121", "front"),)
+
+
+def test_span_is_bisected():
+    search = FakeSearch(catalog(2000, 2012, [(2003, 2007, "A"), (2008, 2012, "B")]))
+    assert GenerationFinder(search).span("Honda", "Accord", 2005) == (2003, 2007)
+    # A year-by-year scan would probe all 13 years
+    assert len(set(search.probed)) < 13
+
+
+def test_span_without_year_index_uses_a_bounded_window():
+    search = FakeSearch(catalog(1990, 2030, [(2009, 2013, "A")]), indexed=False)
+    assert GenerationFinder(search).span("Honda", "Accord", 2010) == (2009, 2013)
+
+
+def test_known_spans_answer_without_probes_and_are_cached():
+    search = FakeSearch(catalog(2000, 2012, [(2003, 2007, "A")]))
+    finder = GenerationFinder(search)
+    finder.span("Honda", "Accord", 2004)
+    search.probed.clear()
+    assert finder.span("HONDA", "accord", 2007) == (2003, 2007)
+    assert search.probed == []
+    # A new finder reads the span back from the cache
+    assert GenerationFinder(search).known_span("Honda", "Accord", 2006) == (2003, 2007)
+
+
+def test_year_without_listings_has_no_span():
+    search = FakeSearch(catalog(2000, 2005, []))
+    assert GenerationFinder(search).span("Honda", "Accord", 2010) is None
+
+
+def test_longer_span_replaces_the_ones_it_covers():
+    search = FakeSearch({})
+    finder = GenerationFinder(search)
+    finder.remember("Honda", "Accord", (2004, 2005))
+    finder.remember("Honda", "Accord", (2010, 2011))
+    finder.remember("Honda", "Accord", (2003, 2007))
+    assert search.cache[("generation_spans", "honda", "accord")] == [[2003, 2007], [2010, 2011]]
@@ -0,0 +1,79 @@
+import pytest
+
+from benchmark_site import build_site
+from http_backend import HttpCatalogBackend, engine_substring, parse_html
+from standin_server import StandInServer
+
+
+def test_parse_html_builds_tree_and_tolerates_unclosed_tags():
+    tree = parse_html("<div id='outer' class='a b'><p>one<p>two</div><span>three</span>")
+    outer = tree.find(id_contains="outer")
+    assert outer.classes == ["a", "b"]
+    assert [node.tag for node in outer.find_all()] == ["p", "p"]
+    assert tree.find(tag="span").parent is tree
+
+
+def test_node_text_separates_blocks_and_skips_scripts():
+    tree = parse_html("<table><tr><td>BR930<div>Front</div></td><td>FWD</td></tr></table>"
+                      "<script>var x = 1;</script><b>bo</b><i>ld</i>")
+    assert tree.text == "BR930 Front FWD bold"
+    assert tree.find(tag="tr").text == "BR930 Front FWD"
+
+
+def test_node_text_line_breaks():
+    assert parse_html("<td>3.6L<br>V6</td>").text == "3.6L V6"
+
+
+def test_row_cells():
+    row = parse_html("<table><tr><th>Make</th><td>Jeep</td><td><table><td>x</td></table></td></tr></table>").find(tag="tr")
+    assert [cell.tag for cell in row.cells()] == ["th", "td", "td"]
+
+
+def test_engine_substring_drops_every_make_and_model_word():
+    assert engine_substring("Jeep", "Grand Cherokee", 2012, "JEEP GRAND CHEROKEE 2012 5.7L V8") == "5.7l v8"
+    assert engine_substring("Land Rover", "LR4", "2012", "land rover lr4 2012 5.0l v8") == "5.0l v8"
+
+
+@pytest.fixture(scope="module")
+def catalog(tmp_path_factory):
+    directory = build_site(str(tmp_path_factory.mktemp("site")), {
+        "parts": {"513271": [("MOOG", [("Jeep", "Grand Cherokee", "2011-2012")])]},
+        "vehicles": [{
+            "make": "Jeep", "model": "Grand Cherokee", "years": [2011, 2012],
+            "engines": {"3.6L V6": [("MOOG", "513271", "Front; 2WD")],
+                        "5.7L V8": [("TIMKEN", "HA590", "Front; 4WD"), ("SKF", "BR930", "Rear")]},
+        }],
+    })
+    server = StandInServer(directory)
+    backend = HttpCatalogBackend(base_url=server.start(), pool_size=2)
+    yield backend, server
+    backend.close()
+    server.stop()
+
+
+def test_recorded_listing_of_multi_word_model(catalog):
+    backend, _ = catalog
+    rows = backend.listing_rows("Jeep", "Grand Cherokee", 2012, "jeep grand cherokee 2012 5.7l v8")
+    assert [(row["manufacturer"], row["part_number"]) for row in rows] == [("TIMKEN", "HA590"), ("SKF", "BR930")]
+    assert rows[0]["drive_info"] == "Front; 4WD"
+
+
+def test_recorded_listing_missing_engine(catalog):
+    backend, _ = catalog
+    assert backend.listing_rows("Jeep", "Grand Cherokee", 2012, "jeep grand cherokee 2012 6.4l v8") is None
+
+
+def test_recorded_autocomplete(catalog):
+    backend, _ = catalog
+    rows = backend.autocomplete("jeep grand cherokee")
+    assert rows == ["Vehicles", "JEEP GRAND CHEROKEE 2011", "JEEP GRAND CHEROKEE 2012"]
+    assert "jeep grand cherokee 2011 3.6l v6" in backend.autocomplete("jeep grand cherokee 2011")
+
+
+def test_recorded_part_search_and_buyers_guide(catalog):
+    backend, server = catalog
+    server.reset_counts()
+    listings = backend.part_search("513271")
+    assert [(listing["manufacturer"], listing["part_number"]) for listing in listings] == [("MOOG", "513271")]
+    assert backend.buyers_guide(listings[0]) == [("Jeep", "Grand Cherokee", "2011-2012")]
+    assert len(server.requests) == 2
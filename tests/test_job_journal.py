@@ -0,0 +1,49 @@
+import pytest
+
+from job_journal import JobJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = JobJournal(str(tmp_path / "job.journal"))
+    yield journal
+    journal.close()
+
+
+def test_finished_lines_are_replayed(journal):
+    journal.start(1, "513121")
+    journal.finish(1, {"line": 1, "answer": "Honda Accord", "error": None})
+    assert journal.completed(1, "513121") == {"line": 1, "answer": "Honda Accord", "error": None}
+    assert journal.stats() == {"done": 1}
+
+
+def test_failed_interrupted_and_edited_lines_are_searched_again(journal):
+    journal.start(1, "513121")
+    journal.finish(1, {"error": "1 lookups failed: TimeoutException"})
+    journal.start(2, "513122")
+    journal.start(3, "513123")
+    journal.finish(3, {"error": None})
+    assert journal.completed(1, "513121") is None
+    assert journal.completed(2, "513122") is None
+    assert journal.completed(3, "HA590") is None
+    assert journal.stats() == {"failed": 1, "running": 1, "done": 1}
+
+
+def test_attempts_count_retries_of_the_same_input(journal):
+    journal.start(1, "513121")
+    journal.start(1, "513121")
+    journal.start(2, "513121")
+    journal.start(2, "HA590")
+    attempts = dict(journal._conn.execute("SELECT line, attempts FROM lines").fetchall())
+    assert attempts == {1: 2, 2: 1}
+
+
+def test_journal_survives_reopening(tmp_path):
+    path = str(tmp_path / "job.journal")
+    journal = JobJournal(path)
+    journal.start(1, "513121")
+    journal.finish(1, {"error": None})
+    journal.close()
+    reopened = JobJournal(path)
+    assert reopened.completed(1, "513121") == {"error": None}
+    reopened.close()
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from lookup_cache import MISS, LookupCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LookupCache(str(tmp_path / "cache.sqlite3"), ttl=100, negative_ttl=10)
+    yield cache
+    cache.close()
+
+
+def test_get_set_and_key_normalization(cache, clock):
+    assert cache.get("fitment", "Honda", "Accord", 2009) is MISS
+    cache.set("fitment", ("Honda", "Accord", 2009), ["513121", "MOOG"])
+    assert cache.get("fitment", "honda", " ACCORD ", "2009") == ["513121", "MOOG"]
+    assert cache.get("other", "honda", "accord", "2009") is MISS
+
+
+def test_cached_none_is_not_a_miss(cache, clock):
+    cache.set("previous_year", ("honda", "accord", 2008), None, negative=True)
+    assert cache.get("previous_year", "honda", "accord", 2008) is None
+
+
+def test_entries_expire_after_their_ttl(cache, clock):
+    cache.set("fitment", ("a",), 1)
+    cache.set("fitment", ("b",), 2, ttl=1000)
+    clock.now += 100
+    assert cache.get("fitment", "a") is MISS
+    assert cache.get("fitment", "b") == 2
+
+
+def test_negative_entries_use_the_shorter_ttl(cache, clock):
+    cache.set("fitment", ("found",), [1])
+    cache.set("fitment", ("missing",), [None, None], negative=True)
+    clock.now += 10
+    assert cache.get("fitment", "missing") is MISS
+    assert cache.get("fitment", "found") == [1]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = LookupCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.set("n", ("a",), 1)
+    clock.now += 1
+    cache.set("n", ("b",), 2)
+    clock.now += 1
+    cache.get("n", "a")
+    clock.now += 1
+    cache.set("n", ("c",), 3)
+    assert cache.get("n", "b") is MISS
+    assert cache.get("n", "a") == 1 and cache.get("n", "c") == 3
+    cache.close()
+
+
+def test_invalidate_namespace(cache, clock):
+    cache.set("a", ("x",), 1)
+    cache.set("b", ("x",), 2)
+    cache.invalidate("a")
+    assert cache.get("a", "x") is MISS
+    assert cache.get("b", "x") == 2
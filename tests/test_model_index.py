@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from benchmark_site import build_site
+from catalog_search import CatalogSearch, SearchCancelled
+from lookup_cache import LookupCache
+from model_index import ModelYearIndex
+from standin_server import StandInServer
+
+
+def test_years_of_a_stored_make():
+    index = ModelYearIndex()
+    assert index.has_year("Honda", "Accord", 2008) is None
+    index.store_make("Honda", {"Accord": [2008, 2009], "CR-V": ["2010"]})
+    assert index.has_year("HONDA", "accord", "2008") is True
+    assert index.has_year("Honda", "Accord", 2007) is False
+    assert index.years("Honda", "CRV") == [2010]
+    assert index.is_fresh("Honda") and not index.needs_build("Honda")
+
+
+def test_autocomplete_years_do_not_make_a_make_complete():
+    index = ModelYearIndex()
+    index.store_model("Toyota", "Camry", ["2010", "2011"])
+    assert index.has_year("Toyota", "Camry", 2011) is True
+    assert index.needs_build("Toyota")
+
+
+def test_old_entries_are_misses_and_stale(monkeypatch):
+    index = ModelYearIndex(max_age=100)
+    index.store_make("Honda", {"Accord": [2008]})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 100)
+    assert index.has_year("Honda", "Accord", 2008) is None
+    assert index.stale_makes() == ["honda"]
+
+
+def test_index_is_kept_in_the_cache(tmp_path):
+    cache = LookupCache(str(tmp_path / "cache.sqlite3"))
+    ModelYearIndex(cache).store_make("Chevrolet", {"Silverado 1500": [2010]})
+    assert ModelYearIndex(cache).has_year("Chevy", "Silverado-1500", 2010) is True
+    cache.close()
+
+
+def test_wanted_makes_are_queued_once_and_failed_makes_not_again():
+    index = ModelYearIndex()
+    index.want("Chevy")
+    index.want("Chevrolet")
+    assert index.has_wanted()
+    assert index.take_wanted() == ["Chevy"]
+    assert not index.has_wanted()
+    index.mark_failed("Ford")
+    index.want("Ford")
+    assert index.take_wanted() == []
+
+
+@pytest.fixture
+def search(tmp_path):
+    directory = build_site(str(tmp_path / "site"), {"vehicles": [
+        {"make": "Honda", "model": "Accord", "years": [2008, 2009], "engines": {"2.4L L4": []}},
+        {"make": "Honda", "model": "CR-V", "years": [2009], "engines": {"2.4L L4": []}},
+    ]})
+    server = StandInServer(directory)
+    search = CatalogSearch(cache_path=None, backend="http", base_url=server.start())
+    yield search
+    search.close()
+    server.stop()
+
+
+def test_refresh_is_not_stopped_by_an_earlier_cancel(search):
+    search.year_index.want("Honda")
+    search.cancel()
+    search.refresh_year_index()
+    assert search.year_index.years("Honda", "Accord") == [2008, 2009]
+    assert search.year_index.has_year("Honda", "CR-V", 2008) is False
+
+
+def test_cancelled_refresh_stops_cleanly(search, monkeypatch):
+    search.year_index.store_make("Honda", {"Accord": [2008]})
+    search.year_index.max_age = 0
+    search.flights.do("key", lambda: "remembered")
+
+    def cancelled(make, driver=None):
+        raise SearchCancelled()
+
+    monkeypatch.setattr(search, "build_make_index", cancelled)
+    search.refresh_year_index()
+    assert search.flights.do("key", lambda: "fresh") == "fresh"
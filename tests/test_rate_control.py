@@ -0,0 +1,78 @@
+import pytest
+
+import rate_control
+from rate_control import AdaptiveLimiter, Throttled
+
+
+@pytest.fixture(autouse=True)
+def no_backoff_sleep(monkeypatch):
+    monkeypatch.setattr(rate_control.time, "sleep", lambda seconds: None)
+
+
+def test_saturated_limit_grows_additively():
+    limiter = AdaptiveLimiter(initial=1)
+    limiter.run(lambda: None, "page_load")
+    assert limiter.limit == 2.0
+    # One request at a limit of two does not use the limit up
+    limiter.run(lambda: None, "page_load")
+    assert limiter.limit == 2.0
+
+
+def test_timeouts_are_retried_and_cut_the_limit():
+    limiter = AdaptiveLimiter(initial=8, retries=2)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Throttled("503")
+        return "page"
+
+    assert limiter.run(flaky, "page_load") == "page"
+    stats = limiter.stats()
+    assert stats["retries"] == 2 and stats["timeouts"] == 2
+    # Both timeouts arrive within DECREASE_INTERVAL and count as one congestion signal
+    assert limiter.limit == 4.0
+    assert stats["in_flight"] == 0
+
+
+def test_timeouts_past_the_retries_are_raised():
+    limiter = AdaptiveLimiter(retries=1)
+    with pytest.raises(TimeoutError):
+        limiter.run(lambda: (_ for _ in ()).throw(TimeoutError()), "page_load")
+    assert limiter.stats()["retries"] == 1
+
+
+def test_other_errors_are_not_retried_and_leave_the_limit():
+    limiter = AdaptiveLimiter(initial=4)
+    with pytest.raises(ValueError):
+        limiter.run(lambda: (_ for _ in ()).throw(ValueError()), "page_load")
+    stats = limiter.stats()
+    assert limiter.limit == 4.0 and stats["retries"] == 0 and stats["requests"] == 0
+
+
+def test_slow_responses_cut_the_limit():
+    limiter = AdaptiveLimiter(initial=10)
+    limiter.acquire()
+    limiter.release("page_load", 0.2)
+    limiter.acquire()
+    limiter.release("page_load", 2.0)
+    assert limiter.stats()["slowdowns"] == 1
+    assert limiter.limit == pytest.approx(8.0)
+
+
+def test_nested_slots_share_the_outer_slot():
+    limiter = AdaptiveLimiter(initial=1)
+
+    def outer():
+        return limiter.run(lambda: limiter.stats()["in_flight"], "inner")
+
+    assert limiter.run(outer, "outer") == 1
+
+
+def test_try_acquire_respects_the_limit():
+    limiter = AdaptiveLimiter(initial=1)
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release("page_load")
+    assert limiter.try_acquire()
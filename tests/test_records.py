@@ -0,0 +1,41 @@
+from records import FinalResult, Fitment, SearchState, vehicle_key
+
+
+def test_vehicle_key_ignores_case_spacing_and_punctuation():
+    assert vehicle_key("Ford", "F~150") == vehicle_key("FORD", "F-150") == vehicle_key("ford", "f 150") == ("ford", "f150")
+
+
+def test_vehicle_key_applies_make_aliases():
+    assert vehicle_key("Chevy", "Silverado 1500") == vehicle_key("Chevrolet", "Silverado-1500")
+    assert vehicle_key("MBZ", "C230") == vehicle_key("Mercedes~Benz", "C230") == ("mercedesbenz", "c230")
+    assert vehicle_key("Alfa", "Giulia") == vehicle_key("Alfa Romeo", "Giulia")
+
+
+def test_vehicle_key_keeps_different_vehicles_apart():
+    assert vehicle_key("Ford", "F-150") != vehicle_key("Ford", "F-250")
+    assert vehicle_key("Land Rover", "LR4") != vehicle_key("Rover", "LR4")
+
+
+def test_previous_years_are_deduplicated_in_order():
+    state = SearchState()
+    state.add_previous_year("Honda", "Accord", "2007")
+    state.add_previous_year("Toyota", "Camry", 2011)
+    state.add_previous_year("Honda", "Accord", 2007)
+    assert [(previous.make, previous.year) for previous in state.previous_years] == [("Honda", 2007), ("Toyota", 2011)]
+
+
+def test_join_pairs_previous_years_with_the_first_fitment_of_their_vehicle():
+    state = SearchState()
+    state.add_previous_year("Ford", "F-150", 2003)
+    state.add_previous_year("Toyota", "Camry", 2011)
+    state.add_fitment(Fitment("Ford", "F~150", 2004, "Front", "4WD"))
+    state.add_fitment(Fitment("FORD", "F150", 2005, "Rear", "2WD"))
+    assert state.join() == [FinalResult("Ford", "F-150", 2003, 2004, "Front", "4WD")]
+    assert state.final_results == state.join()
+
+
+def test_states_do_not_share_results():
+    first, second = SearchState(), SearchState()
+    first.add_previous_year("Honda", "Accord", 2007)
+    first.add_failure("TimeoutException: page")
+    assert not second.previous_years and not second.failures
@@ -0,0 +1,24 @@
+from records import Vehicle
+from search_plan import merge_ranges
+
+
+def test_overlapping_and_adjacent_ranges_merge():
+    vehicles = [Vehicle("Honda", "Accord", 2008, 2010), Vehicle("Honda", "Accord", 2011, 2012),
+                Vehicle("Honda", "Accord", 2009, 2009)]
+    assert merge_ranges(vehicles) == [Vehicle("Honda", "Accord", 2008, 2012)]
+
+
+def test_gaps_keep_separate_runs_sorted_by_start_year():
+    vehicles = [Vehicle("Honda", "Accord", 2013, 2015), Vehicle("Honda", "Accord", 2003, 2007)]
+    assert merge_ranges(vehicles) == [Vehicle("Honda", "Accord", 2003, 2007), Vehicle("Honda", "Accord", 2013, 2015)]
+
+
+def test_spellings_share_a_group_and_first_spelling_and_order_are_kept():
+    vehicles = [Vehicle("Ford", "F~150", 2004, 2006), Vehicle("Chevy", "Silverado", 2007, 2010),
+                Vehicle("FORD", "F-150", 2007, 2008), Vehicle("Chevrolet", "Silverado", 2011, 2013)]
+    assert merge_ranges(vehicles) == [Vehicle("Ford", "F~150", 2004, 2008),
+                                      Vehicle("Chevy", "Silverado", 2007, 2013)]
+
+
+def test_reversed_years_are_ordered():
+    assert merge_ranges([Vehicle("Jeep", "Wrangler", 2012, 2007)]) == [Vehicle("Jeep", "Wrangler", 2007, 2012)]
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from benchmark import single_part_catalog
+from benchmark_site import build_site
+from search_service import SearchService
+from standin_server import StandInServer
+
+
+@pytest.fixture
+def service(tmp_path):
+    server = StandInServer(build_site(str(tmp_path / "site"), single_part_catalog()))
+    service = SearchService(workers=2, cache_path=None, backend="http", base_url=server.start())
+    service.start()
+    yield service
+    service.stop()
+    server.stop()
+
+
+async def request(port, method, target, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), payload.decode()
+
+
+def call(service, *requests):
+    """Serve on a free port and return the (status, body) of each request"""
+    async def main():
+        server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return [await request(port, *args) for args in requests]
+    return asyncio.run(main())
+
+
+def test_workers_share_lookup_state(service):
+    first, second = service.searches
+    assert first.cache is second.cache and first.flights is second.flights
+    assert first.year_index is second.year_index and first.limiter is second.limiter
+
+
+def test_lookup_answers_with_the_batch_record(service):
+    (status, body), = call(service, ("POST", "/lookup", json.dumps({"part_number": "513121"}).encode()))
+    record = json.loads(body)
+    assert status == 200
+    assert record["error"] is None and not record["cancelled"]
+    assert "513121" in record["answer"]
+
+
+def test_bad_requests(service):
+    responses = call(service, ("POST", "/lookup", b"not json"), ("POST", "/lookup", b"{}"),
+                     ("GET", "/nowhere"), ("GET", "/status"))
+    assert [status for status, _ in responses] == [400, 400, 404, 200]
+    assert json.loads(responses[3][1])["workers"] == 2
+
+
+class EventLog:
+    """Stands in for a request's event loop, collecting the job's events"""
+
+    def __init__(self):
+        self.events = []
+        self.done = threading.Event()
+
+    def call_soon_threadsafe(self, put, event):
+        self.events.append(event)
+        if event[0] == "done":
+            self.done.set()
+
+
+def test_cancelled_job_is_recorded_as_cancelled(tmp_path):
+    service = SearchService(workers=1, cache_path=None, backend="http", base_url="http://127.0.0.1:9")
+    search = service.searches[0]
+    started = threading.Event()
+
+    def slow_search(text):
+        started.set()
+        search.cancel_event.wait(5)
+        search.check_cancelled()
+
+    search.perform_part_number_search = slow_search
+    service.start()
+    try:
+        log = EventLog()
+        job = service.submit("513121", log)
+        assert started.wait(5)
+        # What lookup() does when the client disconnects
+        job.cancel()
+        assert log.done.wait(5)
+    finally:
+        service.stop()
+    record = dict(log.events)["done"]
+    assert record["error"] == "Search cancelled" and record["cancelled"] is True
@@ -0,0 +1,168 @@
+import threading
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from catalog_search import CatalogSearch
+from single_flight import SingleFlight
+
+
+class Cancelled(Exception):
+    pass
+
+
+def run_followers(flight, key, fn, count):
+    """Start count threads calling flight.do(key, fn), return their outcomes once all finished"""
+    outcomes = [None] * count
+
+    def follow(index):
+        try:
+            outcomes[index] = flight.do(key, fn)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=follow, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def wait_for_followers(flight, count):
+    for _ in range(500):
+        if flight.shared >= count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("followers never joined the call")
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    leader, outcomes = run_followers(flight, "key", lookup, 1)
+    while not calls:
+        threading.Event().wait(0.01)
+    threads, outcomes = run_followers(flight, "key", lookup, 3)
+    wait_for_followers(flight, 3)
+    release.set()
+    for thread in leader + threads:
+        thread.join(5)
+    assert outcomes == [42, 42, 42]
+    assert len(calls) == 1
+
+
+def test_results_are_remembered_but_none_and_errors_are_not():
+    flight = SingleFlight()
+    calls = []
+
+    def lookup(value):
+        calls.append(value)
+        return value
+
+    assert flight.do("a", lambda: lookup(1)) == 1
+    assert flight.do("a", lambda: lookup(2)) == 1
+    assert flight.do("none", lambda: lookup(None)) is None
+    assert flight.do("none", lambda: lookup(3)) == 3
+
+    with pytest.raises(ValueError):
+        flight.do("error", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flight.do("error", lambda: lookup(4)) == 4
+    assert calls == [1, None, 3, 4]
+
+
+def test_forget_and_result_cap():
+    flight = SingleFlight(max_results=2)
+    for key in "abc":
+        flight.do(key, lambda: key)
+    assert flight.do("a", lambda: "again") == "again"
+    flight.forget()
+    assert flight.do("c", lambda: "fresh") == "fresh"
+
+
+def test_follower_of_cancelled_leader_runs_the_lookup_itself():
+    flight = SingleFlight(retry_on=(Cancelled,))
+    started = threading.Event()
+    cancel = threading.Event()
+
+    def cancelled_lookup():
+        started.set()
+        cancel.wait(5)
+        raise Cancelled()
+
+    leader, leader_outcome = run_followers(flight, "key", cancelled_lookup, 1)
+    started.wait(5)
+    threads, outcomes = run_followers(flight, "key", lambda: 7, 2)
+    wait_for_followers(flight, 2)
+    cancel.set()
+    for thread in leader + threads:
+        thread.join(5)
+    assert isinstance(leader_outcome[0], Cancelled)
+    assert outcomes == [7, 7]
+
+
+def test_follower_shares_the_leaders_errors():
+    flight = SingleFlight()
+    started = threading.Event()
+    fail = threading.Event()
+
+    def failing_lookup():
+        started.set()
+        fail.wait(5)
+        raise ValueError("catalog error")
+
+    leader, _ = run_followers(flight, "key", failing_lookup, 1)
+    started.wait(5)
+    threads, outcomes = run_followers(flight, "key", lambda: 7, 1)
+    wait_for_followers(flight, 1)
+    fail.set()
+    for thread in leader + threads:
+        thread.join(5)
+    assert isinstance(outcomes[0], ValueError)
+
+
+class FakePool:
+    def __init__(self):
+        self.broken = []
+
+    def mark_broken(self, driver):
+        self.broken.append(driver)
+
+
+def test_only_the_session_that_ran_a_shared_lookup_is_replaced():
+    search = CatalogSearch(cache_path=None)
+    search.driver_pool = FakePool()
+    started = threading.Event()
+    lose = threading.Event()
+    leader_driver, follower_driver = object(), object()
+
+    def lookup_previous_year(make, model, year, driver):
+        if driver is leader_driver:
+            started.set()
+            lose.wait(5)
+            raise WebDriverException("chrome not reachable")
+        return True
+
+    search.lookup_previous_year = lookup_previous_year
+    answers = {}
+    leader = threading.Thread(target=lambda: answers.setdefault(
+        "leader", search.check_previous_year_model("Honda", "Accord", 2009, leader_driver)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: answers.setdefault(
+        "follower", search.check_previous_year_model("Honda", "Accord", 2009, follower_driver)))
+    follower.start()
+    wait_for_followers(search.flights, 1)
+    lose.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert answers == {"leader": False, "follower": False}
+    assert search.driver_pool.broken == [leader_driver]
+    assert len(search.state.failures) == 2
+    assert not search.driver_lost
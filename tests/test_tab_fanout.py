@@ -0,0 +1,122 @@
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from rate_control import AdaptiveLimiter
+from tab_fanout import ARRIVED_SCRIPT, LEAVE_SCRIPT, Load, TabFanout, Wait
+from waits import AdaptiveWaiter
+
+
+class FakeDriver:
+    """One session's tabs; a navigation arrives after load_polls ARRIVED_SCRIPT checks"""
+
+    def __init__(self, load_polls=2):
+        self.load_polls = load_polls
+        self.tabs = {"origin": {"url": "origin", "loading": 0}}
+        self.current_window_handle = "origin"
+        self.switch_to = self
+        self.closed = []
+        self.most_open = 1
+
+    def new_window(self, kind):
+        handle = f"tab{len(self.tabs)}"
+        self.tabs[handle] = {"url": "about:blank", "loading": 0}
+        self.current_window_handle = handle
+        self.most_open = max(self.most_open, len(self.tabs) - len(self.closed))
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    def close(self):
+        self.closed.append(self.current_window_handle)
+
+    def execute_script(self, script, *args):
+        tab = self.tabs[self.current_window_handle]
+        if script == LEAVE_SCRIPT:
+            tab["url"], tab["loading"] = args[0], self.load_polls
+            return None
+        if script == ARRIVED_SCRIPT:
+            tab["loading"] = max(0, tab["loading"] - 1)
+            return tab["loading"] == 0
+        raise AssertionError(script)
+
+    @property
+    def url(self):
+        tab = self.tabs[self.current_window_handle]
+        return None if tab["loading"] else tab["url"]
+
+
+def page_flow(url):
+    def steps():
+        yield Load(url)
+        loaded = yield Wait(lambda driver: driver.url, "page")
+        return f"read {loaded}"
+    return steps
+
+
+def waiter(**defaults):
+    return AdaptiveWaiter(defaults={"page": 5, **defaults})
+
+
+def test_flows_run_in_tabs_and_results_come_back():
+    driver = FakeDriver()
+    fanout = TabFanout(driver, waiter(), max_tabs=2)
+    results = dict(fanout.run([(index, page_flow(f"/engine/{index}")) for index in range(5)]))
+    assert results == {index: f"read /engine/{index}" for index in range(5)}
+    assert driver.most_open == 3
+    assert len(driver.closed) == 5
+    assert driver.current_window_handle == "origin"
+
+
+def test_required_timeouts_raise_in_the_flow_and_optional_ones_send_none():
+    def flow():
+        optional = yield Wait(lambda driver: False, "filter_input", required=False)
+        try:
+            yield Wait(lambda driver: False, "listings")
+        except TimeoutException:
+            return ("timed out", optional)
+
+    fanout = TabFanout(FakeDriver(), waiter(filter_input=0.05, listings=0.05))
+    assert list(fanout.run([("engine", flow)])) == [("engine", ("timed out", None))]
+
+
+def test_failed_flows_yield_none():
+    def flow():
+        yield Load("/engine")
+        raise ValueError("broken page")
+
+    fanout = TabFanout(FakeDriver(), waiter())
+    assert list(fanout.run([("engine", flow), ("other", page_flow("/other"))])) == [
+        ("engine", None), ("other", "read /other")]
+
+
+def test_closing_early_closes_the_open_tabs():
+    driver = FakeDriver()
+    fanout = TabFanout(driver, waiter(), max_tabs=3)
+    results = fanout.run([(index, page_flow(f"/engine/{index}")) for index in range(3)])
+    next(results)
+    results.close()
+    assert len(driver.closed) == 3
+    assert driver.current_window_handle == "origin"
+
+
+def test_navigations_wait_for_limiter_slots():
+    limiter = AdaptiveLimiter(initial=1, max_limit=1)
+    fanout = TabFanout(FakeDriver(), waiter(), max_tabs=3, limiter=limiter)
+    results = dict(fanout.run([(index, page_flow(f"/engine/{index}")) for index in range(3)]))
+    assert len(results) == 3
+    stats = limiter.stats()
+    assert stats["requests"] == 3 and stats["in_flight"] == 0
+
+
+def test_check_stops_the_run():
+    class Cancelled(Exception):
+        pass
+
+    def check():
+        raise Cancelled()
+
+    driver = FakeDriver()
+    fanout = TabFanout(driver, waiter(), check=check)
+    with pytest.raises(Cancelled):
+        list(fanout.run([(1, page_flow("/engine"))]))
+    assert driver.closed == ["tab1"]
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from tracing import Tracer
+
+
+class FakeDriver:
+    def execute(self, command, params=None):
+        return {"value": command}
+
+
+def test_spans_count_time_commands_and_errors():
+    tracer = Tracer(buckets=(0.5, 5))
+    driver = tracer.instrument(FakeDriver())
+    with tracer.span("page_load"):
+        driver.execute("get")
+        driver.execute("findElements")
+    with pytest.raises(ValueError):
+        with tracer.span("page_load"):
+            raise ValueError()
+    stage = tracer.snapshot()["page_load"]
+    assert stage["count"] == 2 and stage["errors"] == 1
+    assert stage["webdriver_commands"] == 2
+    assert stage["buckets"] == {"0.5": 2, "5": 0}
+    assert tracer.commands == 2
+
+
+def test_instrumented_driver_still_answers():
+    tracer = Tracer()
+    assert tracer.instrument(FakeDriver()).execute("getTitle") == {"value": "getTitle"}
+
+
+def test_prometheus_buckets_are_cumulative():
+    tracer = Tracer(buckets=(0.5, 5))
+    with tracer.span("filter"):
+        pass
+    text = tracer.to_prometheus()
+    assert 'catalog_search_stage_seconds_bucket{stage="filter",le="0.5"} 1' in text
+    assert 'catalog_search_stage_seconds_bucket{stage="filter",le="5"} 1' in text
+    assert 'catalog_search_stage_seconds_count{stage="filter"} 1' in text
+
+
+def test_dump_creates_the_directory(tmp_path):
+    tracer = Tracer()
+    with tracer.span("filter"):
+        pass
+    path = tmp_path / "metrics" / "stage_metrics.json"
+    tracer.dump(str(path))
+    assert json.loads(path.read_text())["stages"]["filter"]["count"] == 1
+    tracer.dump(str(tmp_path / "metrics.prom"))
+    assert (tmp_path / "metrics.prom").read_text().startswith("# HELP")
+
+
+def test_reset():
+    tracer = Tracer()
+    with tracer.span("filter"):
+        pass
+    tracer.reset()
+    assert tracer.snapshot() == {} and tracer.commands == 0
@@ -0,0 +1,42 @@
+from catalog_search import CatalogSearch
+from lookup_cache import LookupCache
+from vehicle_names import VehicleNames
+
+
+def test_split_make_keeps_multi_word_makes_whole():
+    names = VehicleNames()
+    assert names.split_make("Alfa Romeo Giulia") == ("Alfa Romeo", "Giulia")
+    assert names.split_make("Land Rover Range Rover Sport") == ("Land Rover", "Range Rover Sport")
+    assert names.split_make("Ford F-150") == ("Ford", "F-150")
+    assert names.split_make("Chevy Silverado 1500") == ("Chevy", "Silverado 1500")
+
+
+def test_split_make_gives_model_lines_their_make():
+    names = VehicleNames()
+    assert names.split_make("Range Rover Sport") == ("Land Rover", "Range Rover Sport")
+    assert names.split_make("Range Rover Evoque") == ("Land Rover", "Range Rover Evoque")
+    assert names.split_make("Rover 75") == ("Rover", "75")
+
+
+def test_parse_car_description_keeps_range_rover_in_the_model(tmp_path):
+    search = CatalogSearch(cache_path=str(tmp_path / "cache.sqlite3"))
+    assert search.parse_car_description("12 Range Rover Sport") == ("Land Rover", "Range Rover Sport", "2012", "2012")
+    assert search.parse_car_description("10~12 Land Rover Range Rover Sport") == (
+        "Land Rover", "Range Rover Sport", "2010", "2012")
+    search.close()
+
+
+def test_split_make_uses_learned_makes():
+    names = VehicleNames()
+    assert names.split_make("Aston Martin DB9") == ("Aston", "Martin DB9")
+    names.learn("Aston Martin", ["DB9"])
+    assert names.split_make("Aston Martin DB9") == ("Aston Martin", "DB9")
+
+
+def test_resolve_returns_catalog_spellings(tmp_path):
+    cache = LookupCache(str(tmp_path / "cache.sqlite3"))
+    VehicleNames(cache).learn("Chevrolet", ["Silverado 1500"])
+    # A new instance reads the learned names back from the cache
+    assert VehicleNames(cache).resolve("Chevy", "silverado-1500") == ("Chevrolet", "Silverado 1500")
+    assert VehicleNames(cache).resolve("VW", "Jetta") == ("Volkswagen", "Jetta")
+    cache.close()
@@ -0,0 +1,91 @@
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from waits import AdaptiveWaiter, rows_stable
+
+
+class FakeDriver:
+    def __init__(self, counts=()):
+        self.counts = list(counts)
+
+    def find_elements(self, by, value):
+        count = self.counts.pop(0) if len(self.counts) > 1 else self.counts[0]
+        return [object()] * count
+
+
+def test_default_timeout_until_enough_samples():
+    waiter = AdaptiveWaiter(min_samples=10)
+    for _ in range(9):
+        waiter.record("page", 0.2)
+    assert waiter.timeout_for("page") == 10
+    assert waiter.timeout_for("unknown_stage") == 10
+
+
+def test_timeout_is_learned_from_fast_waits():
+    waiter = AdaptiveWaiter()
+    for _ in range(20):
+        waiter.record("page", 0.2)
+    assert waiter.timeout_for("page") == 1.0
+    for _ in range(20):
+        waiter.record("page", 2.0)
+    assert waiter.timeout_for("page") == 4.0
+
+
+def test_learned_timeout_is_capped_at_twice_the_default():
+    waiter = AdaptiveWaiter()
+    for _ in range(20):
+        waiter.record("listings", 30)
+    assert waiter.timeout_for("listings") == 6
+
+
+def test_timeout_grows_back_after_a_run_of_timeouts():
+    waiter = AdaptiveWaiter()
+    for _ in range(20):
+        waiter.record("page", 0.2)
+    timeouts = []
+    for _ in range(5):
+        timeouts.append(waiter.timeout_for("page"))
+        waiter.record("page", timeouts[-1], timed_out=True)
+    assert timeouts == [1.0, 2.0, 4.0, 8.0, 10]
+    assert waiter.timeout_for("page") >= 10
+    assert waiter.stats()["page"]["timeouts"] == 5
+
+
+def test_success_after_timeouts_drops_the_backoff():
+    waiter = AdaptiveWaiter(window=20)
+    for _ in range(20):
+        waiter.record("page", 0.2)
+    waiter.record("page", 1.0, timed_out=True)
+    assert waiter.timeout_for("page") == 2.0
+    for _ in range(20):
+        waiter.record("page", 0.2)
+    assert waiter.timeout_for("page") == 1.0
+
+
+def test_until_returns_the_condition_value_and_records_it():
+    waiter = AdaptiveWaiter()
+    assert waiter.until(FakeDriver(), lambda driver: "ready", "page") == "ready"
+    assert waiter.stats()["page"]["samples"] == 1
+
+
+def test_until_raises_and_poll_returns_none_on_timeout():
+    waiter = AdaptiveWaiter()
+    with pytest.raises(TimeoutException):
+        waiter.until(FakeDriver(), lambda driver: False, "page", timeout=0.1)
+    assert waiter.poll(FakeDriver(), lambda driver: False, "page", timeout=0.1) is None
+    assert waiter.stats()["page"]["timeouts"] == 2
+
+
+def test_rows_stable_waits_for_the_count_to_settle():
+    condition = rows_stable(("css selector", "tr"), settle=0)
+    driver = FakeDriver([1, 3, 3])
+    assert condition(driver) is False
+    assert condition(driver) is False
+    assert len(condition(driver)) == 3
+
+
+def test_rows_stable_needs_at_least_one_row():
+    condition = rows_stable(("css selector", "tr"), settle=0)
+    driver = FakeDriver([0])
+    assert condition(driver) is False
+    assert condition(driver) is False
@@ -0,0 +1,166 @@
+"""
+Per-stage timing spans with WebDriver round-trip counts.
+
+    with tracer.span("page_load"):
+        driver.get(url)
+
+Every span records its duration and the number of WebDriver commands the
+current thread issued inside it. Spans are aggregated into one histogram per
+stage, which can be dumped as JSON or Prometheus text at any time.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, roughly from a single script call up to a slow page load
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRIC_PREFIX = "catalog_search"
+
+
+class StageHistogram:
+    """Duration histogram plus command and error totals for one stage."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.commands = 0
+        self.errors = 0
+
+    def observe(self, duration, commands, failed):
+        for i, bound in enumerate(self.buckets):
+            if duration <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.commands += commands
+        self.errors += 1 if failed else 0
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else None,
+            "max": round(self.max, 6),
+            "webdriver_commands": self.commands,
+            "errors": self.errors,
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.bucket_counts)},
+        }
+
+
+class Tracer:
+    """Collects spans from any thread into per-stage histograms."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._stages = {}
+        self._commands = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def instrument(self, driver):
+        """
+        Count every command a driver sends. WebElement methods go through their
+        parent driver's execute(), so element reads and clicks are counted too.
+        """
+        execute = driver.execute
+
+        def counted_execute(command, params=None):
+            self._local.commands = getattr(self._local, "commands", 0) + 1
+            with self._lock:
+                self._commands += 1
+            return execute(command, params)
+
+        driver.execute = counted_execute
+        return driver
+
+    @property
+    def commands(self):
+        """WebDriver commands sent by every instrumented driver so far"""
+        with self._lock:
+            return self._commands
+
+    @contextmanager
+    def span(self, stage, **fields):
+        """Time a block as one occurrence of stage; fields are added to the debug log line"""
+        started = time.perf_counter()
+        commands_before = getattr(self._local, "commands", 0)
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            commands = getattr(self._local, "commands", 0) - commands_before
+            with self._lock:
+                histogram = self._stages.get(stage)
+                if histogram is None:
+                    histogram = self._stages[stage] = StageHistogram(self.buckets)
+                histogram.observe(duration, commands, failed)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(json.dumps({"span": stage, "duration": round(duration, 6), "commands": commands,
+                                         "failed": failed, **fields}, default=str))
+
+    def snapshot(self):
+        """Per-stage statistics as plain data"""
+        with self._lock:
+            return {stage: histogram.snapshot() for stage, histogram in sorted(self._stages.items())}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._commands = 0
+
+    def to_json(self):
+        return json.dumps({"webdriver_commands": self.commands, "stages": self.snapshot()}, indent=2)
+
+    def to_prometheus(self, prefix=METRIC_PREFIX):
+        """Prometheus text exposition format, with cumulative buckets"""
+        stages = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent per search stage.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for stage, data in stages.items():
+            cumulative = 0
+            for bound, count in data["buckets"].items():
+                cumulative += count
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {data["count"]}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {data["sum"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+
+        lines.append(f"# HELP {prefix}_stage_webdriver_commands_total WebDriver commands sent per search stage.")
+        lines.append(f"# TYPE {prefix}_stage_webdriver_commands_total counter")
+        for stage, data in stages.items():
+            lines.append(f'{prefix}_stage_webdriver_commands_total{{stage="{stage}"}} {data["webdriver_commands"]}')
+
+        lines.append(f"# HELP {prefix}_stage_errors_total Spans that ended with an exception.")
+        lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+        for stage, data in stages.items():
+            lines.append(f'{prefix}_stage_errors_total{{stage="{stage}"}} {data["errors"]}')
+
+        lines.append(f"# HELP {prefix}_webdriver_commands_total WebDriver commands sent by all sessions.")
+        lines.append(f"# TYPE {prefix}_webdriver_commands_total counter")
+        lines.append(f"{prefix}_webdriver_commands_total {self.commands}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write the metrics to path, as Prometheus text for .prom/.txt files and JSON otherwise"""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        logger.info(f"Wrote stage metrics to {path}")
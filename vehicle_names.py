@@ -0,0 +1,161 @@
+"""
+Make/model name normalization.
+
+The buyers guide, the autocomplete and typed input spell the same vehicle in
+different ways: "F~150", "F-150" and "F150", "Chevy" and "Chevrolet", "MBZ"
+and "Mercedes-Benz". Keys are built from a compact form (lowercase letters
+and digits only) after make aliases are applied, so every spelling of a
+vehicle shares one cache, index and de-dup key.
+
+VehicleNames also learns the catalog's own spelling of every make and model
+it sees in the catalog listings, so typed names can be turned back into the
+text the catalog search box expects.
+"""
+import logging
+import re
+import threading
+import time
+
+from lookup_cache import MISS
+
+logger = logging.getLogger(__name__)
+
+NAMES_NAMESPACE = "vehicle_names"
+# Catalog spellings hardly ever change; the names are re-saved at least every
+# RESAVE_AGE while they are in use so they never expire
+NAMES_TTL = 365 * 24 * 3600
+RESAVE_AGE = 7 * 24 * 3600
+
+# Compact alias -> catalog spelling of the make
+MAKE_ALIASES = {
+    "chevy": "Chevrolet",
+    "vw": "Volkswagen",
+    "mbz": "Mercedes-Benz",
+    "mercedes": "Mercedes-Benz",
+    "benz": "Mercedes-Benz",
+    "alfa": "Alfa Romeo",
+    "landrover": "Land Rover",
+    "olds": "Oldsmobile",
+    "caddy": "Cadillac",
+    "infinity": "Infiniti",
+    "hyundia": "Hyundai",
+}
+
+# Compact model line -> catalog spelling of its make, for input that leaves the
+# make out ("Range Rover Sport"); the model line stays part of the model
+MODEL_LINE_MAKES = {
+    "rangerover": "Land Rover",
+}
+
+_NOT_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+
+def compact(name):
+    """Lowercase letters and digits only: "F~150", "F-150" and "f 150" all become "f150" """
+    return _NOT_ALPHANUMERIC.sub("", str(name).lower())
+
+
+def make_key(make):
+    alias = MAKE_ALIASES.get(compact(make))
+    return compact(alias or make)
+
+
+def model_key(model):
+    return compact(model)
+
+
+class VehicleNames:
+    """
+    Catalog spellings of makes and models by key, learned from the catalog's
+    listings and kept in the lookup cache between runs.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self._makes = {}
+        self._models = {}
+        self._loaded = False
+        self._saved_at = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._loaded:
+            return
+        stored = MISS
+        if self.cache:
+            try:
+                stored = self.cache.get(NAMES_NAMESPACE, "all")
+            except Exception as e:
+                logger.error(f"Could not read the learned vehicle names: {str(e)}")
+        with self._lock:
+            if not self._loaded and stored is not MISS:
+                self._makes.update(stored.get("makes", {}))
+                self._models.update({tuple(key.split("|", 1)): name for key, name in stored.get("models", {}).items()})
+                self._saved_at = stored.get("saved_at", 0)
+            self._loaded = True
+
+    def _save(self):
+        if not self.cache:
+            return
+        with self._lock:
+            self._saved_at = time.time()
+            stored = {"makes": dict(self._makes),
+                      "models": {f"{make}|{model}": name for (make, model), name in self._models.items()},
+                      "saved_at": self._saved_at}
+        try:
+            self.cache.set(NAMES_NAMESPACE, ("all",), stored, ttl=NAMES_TTL)
+        except Exception as e:
+            logger.error(f"Could not store the learned vehicle names: {str(e)}")
+
+    def learn(self, make, models=()):
+        """Record the catalog spelling of a make and any of its models"""
+        self._load()
+        make_name = " ".join(str(make).split())
+        key = make_key(make_name)
+        added = False
+        with self._lock:
+            if key not in self._makes:
+                self._makes[key] = make_name
+                added = True
+            for model in models:
+                model_name = " ".join(str(model).split())
+                if (key, model_key(model_name)) not in self._models:
+                    self._models[(key, model_key(model_name))] = model_name
+                    added = True
+            stale = time.time() - self._saved_at >= RESAVE_AGE
+        if added or stale:
+            self._save()
+
+    def split_make(self, text):
+        """
+        ("Make", "Model") of "Make Model" text, taking the longest known make or
+        alias it starts with so "Alfa Romeo Giulia" keeps its two-word make.
+        Text that starts with a model line instead ("Range Rover Sport") gets
+        that line's make and keeps the whole text as the model. Unknown makes
+        are the first word.
+        """
+        self._load()
+        words = text.split()
+        with self._lock:
+            known = set(self._makes)
+        known |= set(MAKE_ALIASES) | {make_key(name) for name in MAKE_ALIASES.values()}
+        for length in range(len(words) - 1, 0, -1):
+            if compact(" ".join(words[:length])) in known:
+                return " ".join(words[:length]), " ".join(words[length:])
+        for length in range(len(words), 0, -1):
+            make = MODEL_LINE_MAKES.get(compact(" ".join(words[:length])))
+            if make:
+                return make, " ".join(words)
+        return words[0], " ".join(words[1:])
+
+    def resolve(self, make, model):
+        """
+        (make, model) in the catalog's spelling when it has been seen, otherwise
+        the make alias spelled out and the model as given.
+        """
+        self._load()
+        key = make_key(make)
+        with self._lock:
+            make_name = self._makes.get(key) or MAKE_ALIASES.get(compact(make)) or make
+            model_name = self._models.get((key, model_key(model)), model)
+        return make_name, model_name
@@ -0,0 +1,149 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+logger = logging.getLogger(__name__)
+
+# Hand-tuned timeouts used until a stage has enough observed waits
+DEFAULT_TIMEOUTS = {
+    "page": 10,
+    "autocomplete": 10,
+    "engine_autocomplete": 2,
+    "catalog_category": 3,
+    "disambiguation": 10,
+    "disambiguated_category": 10,
+    "part_type": 10,
+    "filter_input": 10,
+    "listings": 3,
+    "part_search": 5,
+    "buyers_guide": 5,
+}
+FALLBACK_TIMEOUT = 10
+MIN_TIMEOUT = 1.0
+POLL_FREQUENCY = 0.05
+
+
+class rows_stable:
+    """
+    Condition that holds once at least one element matches the locator and the
+    count has not changed for `settle` seconds. Returns the matching elements.
+    With a container locator it also holds for zero rows once the container is
+    there, since an empty container is an answer too; it then returns True.
+    """
+
+    def __init__(self, locator, settle=0.15, container=None):
+        self.locator = locator
+        self.settle = settle
+        self.container = container
+        self._count = None
+        self._since = None
+
+    def __call__(self, driver):
+        if self.container and not driver.find_elements(*self.container):
+            self._count = None
+            return False
+        elements = driver.find_elements(*self.locator)
+        now = time.monotonic()
+        if len(elements) != self._count:
+            self._count = len(elements)
+            self._since = now
+            return False
+        if now - self._since < self.settle:
+            return False
+        return elements or bool(self.container)
+
+
+class AdaptiveWaiter:
+    """
+    Central place for every explicit wait. Each wait is tagged with a stage name,
+    its duration is recorded, and once a stage has enough samples its timeout
+    becomes the observed percentile times a headroom factor. A timed-out wait
+    counts as a sample of its full duration and doubles the stage's timeout
+    (at least back to its default) until a wait succeeds again, so a site that
+    slowed down is not cut off by a timeout learned while it was fast.
+    """
+
+    def __init__(self, percentile=95, headroom=2.0, min_samples=10, window=200,
+                 min_timeout=MIN_TIMEOUT, defaults=None, tracer=None):
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.min_timeout = min_timeout
+        self.defaults = dict(DEFAULT_TIMEOUTS)
+        self.defaults.update(defaults or {})
+        # Optional tracing.Tracer, every wait becomes a "wait_<stage>" span
+        self.tracer = tracer
+        self._window = window
+        self._samples = {}
+        self._timeouts = {}
+        # Stage -> timeout to use at least, raised by timeouts and dropped on the next success
+        self._backoff = {}
+        self._lock = threading.Lock()
+
+    def timeout_for(self, stage):
+        """Current timeout for a stage, at most twice its hand-tuned default."""
+        default = self.defaults.get(stage, FALLBACK_TIMEOUT)
+        with self._lock:
+            samples = sorted(self._samples.get(stage, ()))
+            backoff = self._backoff.get(stage, 0)
+        if len(samples) < self.min_samples:
+            return max(default, backoff)
+        index = min(len(samples) - 1, math.ceil(self.percentile / 100 * len(samples)) - 1)
+        return max(self.min_timeout, backoff, min(default * 2, samples[index] * self.headroom))
+
+    def record(self, stage, duration, timed_out=False):
+        default = self.defaults.get(stage, FALLBACK_TIMEOUT)
+        with self._lock:
+            # The wait took at least this long either way
+            self._samples.setdefault(stage, deque(maxlen=self._window)).append(duration)
+            if timed_out:
+                self._timeouts[stage] = self._timeouts.get(stage, 0) + 1
+                self._backoff[stage] = min(max(default, duration), duration * 2)
+            else:
+                self._backoff.pop(stage, None)
+
+    def until(self, driver, condition, stage, timeout=None):
+        """
+        Wait for condition on driver, raising TimeoutException like WebDriverWait.
+        The timeout defaults to the stage's adaptive value.
+        """
+        timeout = self.timeout_for(stage) if timeout is None else timeout
+        started = time.monotonic()
+        span = self.tracer.span(f"wait_{stage}") if self.tracer else nullcontext()
+        try:
+            with span:
+                result = WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition)
+        except TimeoutException:
+            self.record(stage, time.monotonic() - started, timed_out=True)
+            raise
+        self.record(stage, time.monotonic() - started)
+        return result
+
+    def poll(self, driver, condition, stage, timeout=None):
+        """Like until(), but returns None instead of raising on timeout."""
+        try:
+            return self.until(driver, condition, stage, timeout=timeout)
+        except TimeoutException:
+            return None
+
+    def stats(self):
+        """Per-stage sample count, timeouts, median and current timeout."""
+        with self._lock:
+            stages = set(self._samples) | set(self._timeouts)
+            snapshot = {stage: sorted(self._samples.get(stage, ())) for stage in stages}
+            timeouts = dict(self._timeouts)
+        result = {}
+        for stage, samples in snapshot.items():
+            result[stage] = {
+                "samples": len(samples),
+                "timeouts": timeouts.get(stage, 0),
+                "median": samples[len(samples) // 2] if samples else None,
+                "timeout": self.timeout_for(stage),
+            }
+        return result